@@ -0,0 +1,241 @@
+"""Аутентификация по токену с кешированием пользователя.
+
+TokenAuthentication на каждый запрос выполняет SELECT токена вместе с
+пользователем. CachedTokenAuthentication хранит снимок токена в двух
+уровнях кеша: в памяти процесса с коротким TTL и в общем кеше Django
+(Redis). Ключ в Redis - SHA-256 токена, поэтому сами токены в кеш не
+попадают.
+
+В снимок входят только поля, нужные для проверки токена: ID и
+активность пользователя. Остальные поля восстановленного пользователя
+отложены и загружаются из базы одним запросом при первом обращении
+(см. User.refresh_from_db), поэтому устаревший снимок не перезапишет
+данные, измененные через update() без сигналов, а save() пользователя
+без обращения к другим полям сохраняет только ID и активность.
+
+Запись удаляется из кеша при удалении токена (выход), сохранении
+пользователя (смена пароля, деактивация; сохранение одного last_login
+при входе кеш не сбрасывает) и удалении пользователя. Локальный кеш
+других процессов при этом не очищается и может отдавать снимок не
+дольше TOKEN_LOCAL_CACHE_TTL. Отсутствующие токены не кешируются, а
+неактивный пользователь отклоняется с той же ошибкой, что и в
+TokenAuthentication.
+
+SignedAccessTokenAuthentication проверяет короткоживущий токен доступа
+(заголовок "Bearer <токен>"), подписанный HMAC на SECRET_KEY через
+django.core.signing. Подпись проверяется без обращений к базе и кешу:
+пользователь восстанавливается из ID в токене так же, как из снимка
+кеша, и остальные его поля загружаются одним запросом только при первом
+обращении к ним. Токен доступа выдается и обновляется по токену из
+таблицы authtoken только активному пользователю, поэтому выход и
+деактивация действуют на него не позже чем через ACCESS_TOKEN_LIFETIME.
+Если пользователь удален раньше, чтение его полей отклоняется
+apps.api.exceptions.exception_handler с той же ошибкой, что и для
+неактивного пользователя.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import (
+    BaseAuthentication,
+    TokenAuthentication,
+    get_authorization_header,
+)
+from rest_framework.authtoken.models import Token
+
+from foodgram.constants import (
+    ACCESS_TOKEN_LIFETIME,
+    TOKEN_CACHE_TTL,
+    TOKEN_LOCAL_CACHE_SIZE,
+    TOKEN_LOCAL_CACHE_TTL,
+)
+
+User = get_user_model()
+
+# Поля пользователя в снимке; остальные, включая хеш пароля, отложены
+SNAPSHOT_FIELDS = ("id", "is_active")
+
+ACCESS_TOKEN_SALT = "apps.api.authentication.access"
+
+
+class LocalTTLCache:
+    """Кеш в памяти процесса с вытеснением LRU и временем жизни."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Значение по ключу или None, если его нет или оно устарело."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Сохраняет значение, вытесняя самое старое при переполнении."""
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """Удаляет значение."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Очищает кеш."""
+        with self._lock:
+            self._data.clear()
+
+
+local_cache = LocalTTLCache(TOKEN_LOCAL_CACHE_SIZE, TOKEN_LOCAL_CACHE_TTL)
+
+
+def token_cache_key(key):
+    """Ключ общего кеша для токена."""
+    digest = hashlib.sha256(key.encode()).hexdigest()
+    return f"auth:token:{digest}"
+
+
+def make_snapshot(token):
+    """Снимок токена и пользователя для кеша."""
+    return {
+        "created": token.created,
+        "user": {name: getattr(token.user, name) for name in SNAPSHOT_FIELDS},
+    }
+
+
+def restore_user(values):
+    """Пользователь с полями SNAPSHOT_FIELDS и остальными отложенными."""
+    return User.from_db(
+        DEFAULT_DB_ALIAS,
+        SNAPSHOT_FIELDS,
+        [values[name] for name in SNAPSHOT_FIELDS],
+    )
+
+
+def restore_token(key, snapshot):
+    """Новые объекты токена и пользователя с отложенными полями из снимка."""
+    user = restore_user(snapshot["user"])
+    token = Token.from_db(
+        DEFAULT_DB_ALIAS,
+        ["key", "user_id", "created"],
+        [key, user.pk, snapshot["created"]],
+    )
+    token.user = user
+    return token
+
+
+def invalidate_token(key):
+    """Удаляет токен из кешей."""
+    cache_key = token_cache_key(key)
+    local_cache.delete(cache_key)
+    cache.delete(cache_key)
+
+
+def invalidate_user_tokens(user_id):
+    """Удаляет из кешей токены пользователя."""
+    for key in Token.objects.filter(user_id=user_id).values_list(
+        "key", flat=True
+    ):
+        invalidate_token(key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication со снимком пользователя в двухуровневом кеше."""
+
+    model = Token
+
+    def authenticate_credentials(self, key):
+        """Пользователь и токен из кеша или из базы."""
+        cache_key = token_cache_key(key)
+        snapshot = local_cache.get(cache_key)
+        if snapshot is None:
+            snapshot = cache.get(cache_key)
+            if snapshot is None:
+                # Неизвестный токен и неактивный пользователь не кешируются
+                user, token = super().authenticate_credentials(key)
+                snapshot = make_snapshot(token)
+                cache.set(cache_key, snapshot, TOKEN_CACHE_TTL)
+                local_cache.set(cache_key, snapshot)
+                return user, token
+            # Срок в локальном кеше не продлевается при обращениях
+            local_cache.set(cache_key, snapshot)
+
+        token = restore_token(key, snapshot)
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _("User inactive or deleted.")
+            )
+        return token.user, token
+
+
+def issue_access_token(user):
+    """
+    Подписанный токен доступа пользователя.
+
+    Returns:
+        Словарь с токеном и сроком его действия в секундах
+    """
+    return {
+        "access_token": signing.dumps(
+            {"uid": user.pk}, salt=ACCESS_TOKEN_SALT
+        ),
+        "expires_in": ACCESS_TOKEN_LIFETIME,
+    }
+
+
+class SignedAccessTokenAuthentication(BaseAuthentication):
+    """Аутентификация по подписанному токену доступа без запросов к базе."""
+
+    keyword = "Bearer"
+
+    def authenticate(self, request):
+        """Пользователь из заголовка Authorization: Bearer <токен>."""
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed(
+                _("Invalid token header. No credentials provided.")
+            )
+
+        try:
+            payload = signing.loads(
+                auth[1].decode(),
+                salt=ACCESS_TOKEN_SALT,
+                max_age=ACCESS_TOKEN_LIFETIME,
+            )
+        except signing.SignatureExpired:
+            raise exceptions.AuthenticationFailed(
+                "Срок действия токена доступа истек."
+            )
+        except (signing.BadSignature, UnicodeError):
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
+
+        # Токены выдаются только активным пользователям
+        return restore_user({"id": payload["uid"], "is_active": True}), payload
+
+    def authenticate_header(self, request):
+        """Значение заголовка WWW-Authenticate для ответа 401."""
+        return self.keyword
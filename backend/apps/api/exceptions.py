@@ -0,0 +1,33 @@
+"""Обработка исключений API."""
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions, views
+
+User = get_user_model()
+
+
+def exception_handler(exc, context):
+    """
+    Обработчик исключений DRF, отклоняющий удаленных пользователей.
+
+    Пользователь из снимка кеша или токена доступа загружает поля лениво.
+    Если его удалили, пока снимок или токен еще действуют, чтение полей
+    вызывает User.DoesNotExist: вместо ошибки 500 отдается 401.
+    """
+    request = context.get("request")
+    if (
+        isinstance(exc, User.DoesNotExist)
+        and request is not None
+        and request.successful_authenticator is not None
+        and not User.objects.filter(pk=request.user.pk).exists()
+    ):
+        response = views.exception_handler(
+            exceptions.AuthenticationFailed(_("User inactive or deleted.")),
+            context,
+        )
+        response[
+            "WWW-Authenticate"
+        ] = request.successful_authenticator.authenticate_header(request)
+        return response
+    return views.exception_handler(exc, context)
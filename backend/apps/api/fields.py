@@ -1,43 +1,244 @@
 """Кастомные поля для API."""
 import base64
 import binascii
-import imghdr
+import re
 import uuid
+from tempfile import SpooledTemporaryFile
 
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
 
+from PIL import Image
 from rest_framework import serializers
 
+from apps.recipes.uploads import supports_direct_upload, upload_prefix
+from foodgram.constants import (
+    BASE64_DECODE_CHUNK_SIZE,
+    MAX_IMAGE_SIZE,
+    UPLOAD_CONTENT_TYPES,
+)
+
+# Сигнатуры форматов изображений по первым байтам файла
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+    (b"BM", "bmp"),
+    (b"II*\x00", "tiff"),
+    (b"MM\x00*", "tiff"),
+)
+
+# Расширение из заголовка data URL попадает в имя файла, поэтому
+# разделители путей и точки в нем недопустимы
+IMAGE_EXTENSION_RE = re.compile(r"[a-z0-9-]+")
+WHITESPACE_RE = re.compile(r"\s")
+
+
+def sniff_image_format(header):
+    """Определяет формат изображения по первым байтам."""
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    for signature, image_format in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return image_format
+    return None
+
 
 class Base64ImageField(serializers.ImageField):
     """
     Поле для работы с изображениями в формате base64.
 
-    Декодирует base64 строку в файл изображения.
+    Декодирует base64 строку в файл изображения. Размер проверяется по
+    длине base64 до декодирования, данные декодируются частями во
+    временный файл, который затем проверяется Pillow без повторного
+    чтения в память. С verify=False проверяется только сигнатура
+    формата, а полная проверка остается фоновой обработке.
     """
 
+    default_error_messages = {
+        "invalid_base64": "Невалидная base64 строка изображения.",
+        "too_large": (
+            f"Размер изображения не должен превышать "
+            f"{MAX_IMAGE_SIZE // (1024 * 1024)} МБ."
+        ),
+    }
+
+    def __init__(self, *args, verify=True, **kwargs):
+        self.verify = verify
+        super().__init__(*args, **kwargs)
+
     def to_internal_value(self, data):
         """Преобразование base64 в файл."""
         # Проверяем, что это base64 строка
         if isinstance(data, str) and data.startswith("data:image/"):
-            # Извлекаем format и данные
-            format, imgstr = data.split(";base64,")
-            ext = format.split("/")[-1]
-
-            # Декодируем base64
-            try:
-                decoded_data = base64.b64decode(imgstr)
-                # Проверяем, что это действительно изображение
-                img_format = imghdr.what(None, decoded_data)
-                if img_format:
-                    ext = img_format
-
-                # Генерируем уникальное имя файла
-                filename = f"{uuid.uuid4()}.{ext}"
-                data = ContentFile(decoded_data, name=filename)
-            except binascii.Error:
-                raise serializers.ValidationError(
-                    "Невалидная base64 строка изображения."
-                )
+            return self.decode_data_url(data)
 
         return super().to_internal_value(data)
+
+    def decode_data_url(self, data):
+        """Декодирует data URL во временный файл и проверяет его."""
+        marker = data.find(";base64,")
+        if marker == -1:
+            self.fail("invalid_base64")
+        ext = data[len("data:image/") : marker].lower()
+        start = marker + len(";base64,")
+        # Переносы строк допустимы в base64, но не при validate=True
+        if WHITESPACE_RE.search(data, start):
+            data, start = "".join(data[start:].split()), 0
+
+        # Размер декодированных данных известен по длине base64 строки
+        padding = data[-2:].count("=")
+        if (len(data) - start) * 3 // 4 - padding > MAX_IMAGE_SIZE:
+            self.fail("too_large")
+
+        decoded = SpooledTemporaryFile(
+            max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+        )
+        try:
+            for offset in range(start, len(data), BASE64_DECODE_CHUNK_SIZE):
+                decoded.write(
+                    base64.b64decode(
+                        data[offset : offset + BASE64_DECODE_CHUNK_SIZE],
+                        validate=True,
+                    )
+                )
+        except (binascii.Error, ValueError):
+            decoded.close()
+            self.fail("invalid_base64")
+
+        decoded.seek(0)
+        sniffed = sniff_image_format(decoded.read(16))
+        decoded.seek(0)
+        if sniffed is None and (
+            not self.verify or not IMAGE_EXTENSION_RE.fullmatch(ext)
+        ):
+            decoded.close()
+            self.fail("invalid_image")
+        ext = sniffed or ext
+
+        # Генерируем уникальное имя файла
+        file = File(decoded, name=f"{uuid.uuid4()}.{ext}")
+        # Проверки имени и размера FileField без чтения файла в память
+        file = serializers.FileField.to_internal_value(self, file)
+        if self.verify:
+            self.verify_image(file)
+        return file
+
+    def verify_image(self, file):
+        """Проверяет, что файл - изображение, читая его из файла."""
+        try:
+            Image.open(file).verify()
+        except Exception:
+            file.close()
+            self.fail("invalid_image")
+        file.seek(0)
+
+
+def build_absolute_url(field, url):
+    """Абсолютный URL относительно текущего запроса, как у ImageField."""
+    request = field.context.get("request")
+    return request.build_absolute_uri(url) if request else url
+
+
+class PlaceholderImageField(serializers.ImageField):
+    """ImageField только для чтения, отдающий заглушку без изображения."""
+
+    def __init__(self, placeholder, **kwargs):
+        self.placeholder = placeholder
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        """URL изображения или заглушки."""
+        if not value:
+            return build_absolute_url(self, self.placeholder)
+        return super().to_representation(value)
+
+
+class ImageVariantField(serializers.Field):
+    """
+    URL уменьшенной копии изображения, srcset его WebP-вариантов или
+    встроенное превью.
+
+    Пока варианты не созданы, thumb отдает URL оригинала (или заглушки,
+    если изображения еще нет), srcset - пустую строку, а preview - None.
+    """
+
+    def __init__(self, kind="thumb", placeholder=None, **kwargs):
+        self.kind = kind
+        self.placeholder = placeholder
+        kwargs["source"] = "*"
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        """Строит URL по сохраненным вариантам изображения модели."""
+        image = getattr(instance, instance.variants_source)
+        variants = {}
+        if image and instance.image_variants.get("source") == image.name:
+            variants = instance.image_variants
+        if self.kind == "preview":
+            return variants.get("preview") or None
+
+        sizes = sorted(
+            variants.get("sizes", []), key=lambda size: size["width"]
+        )
+
+        if self.kind == "srcset":
+            return ", ".join(
+                f"{self.build_url(image.storage, size['webp'])} "
+                f"{size['width']}w"
+                for size in sizes
+            )
+        if not image:
+            return self.placeholder and build_absolute_url(
+                self, self.placeholder
+            )
+        name = sizes[0]["file"] if sizes else image.name
+        return self.build_url(image.storage, name)
+
+    def build_url(self, storage, name):
+        """Абсолютный URL файла в хранилище."""
+        return build_absolute_url(self, storage.url(name))
+
+
+class UploadedImageKeyField(serializers.CharField):
+    """
+    Ключ изображения, загруженного клиентом напрямую в хранилище.
+
+    Ключ должен лежать в каталоге загрузок текущего пользователя, а
+    объект - существовать, что проверяется одним запросом HEAD.
+    """
+
+    default_error_messages = {
+        "unavailable": "Прямая загрузка в хранилище недоступна.",
+        "foreign": "Ключ не относится к загрузкам текущего пользователя.",
+        "missing": "Загруженный файл не найден.",
+        "too_large": Base64ImageField.default_error_messages["too_large"],
+        "invalid_type": "Загруженный файл не является изображением.",
+    }
+
+    def __init__(self, kind, **kwargs):
+        self.kind = kind
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        """Проверяет ключ и метаданные загруженного объекта."""
+        key = super().to_internal_value(data)
+        if not supports_direct_upload():
+            self.fail("unavailable")
+
+        prefix = upload_prefix(self.kind, self.context["request"].user)
+        if not key.startswith(prefix) or "/" in key[len(prefix) :]:
+            self.fail("foreign")
+
+        meta = default_storage.head(key)
+        if meta is None:
+            self.fail("missing")
+        if meta["size"] > MAX_IMAGE_SIZE:
+            self.fail("too_large")
+        if meta["content_type"] not in UPLOAD_CONTENT_TYPES:
+            self.fail("invalid_type")
+        return key
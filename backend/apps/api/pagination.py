@@ -1,5 +1,21 @@
 """Кастомные пагинаторы для API."""
-from rest_framework.pagination import PageNumberPagination
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    BasePagination,
+    CursorPagination,
+    PageNumberPagination,
+    _positive_int,
+)
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 from foodgram.constants import MAX_PAGE_SIZE, RECIPES_PAGE_SIZE
 
@@ -10,3 +26,148 @@ class CustomPageNumberPagination(PageNumberPagination):
     page_size = RECIPES_PAGE_SIZE
     page_size_query_param = "limit"  # Используем 'limit' вместо 'page_size'
     max_page_size = MAX_PAGE_SIZE
+
+
+class RecipeCursorPagination(CursorPagination):
+    """
+    Курсорный пагинатор для ленты рецептов.
+
+    Позиция страницы кодируется в курсоре, поэтому запрос каждой страницы
+    идет по индексу created без OFFSET и не замедляется с глубиной ленты.
+    """
+
+    page_size = RECIPES_PAGE_SIZE
+    page_size_query_param = "limit"
+    max_page_size = MAX_PAGE_SIZE
+    ordering = "-created"
+
+
+class KeysetPagination(BasePagination):
+    """
+    Пагинатор по ключу сортировки (keyset / seek pagination).
+
+    Курсор хранит значения всех полей ordering последней записи страницы,
+    следующая страница выбирается условием вида
+    (a, b) < (a_last, b_last). Последнее поле ordering должно быть
+    уникальным, тогда порядок строгий и без OFFSET при любой глубине.
+    """
+
+    page_size = RECIPES_PAGE_SIZE
+    page_size_query_param = "limit"
+    max_page_size = MAX_PAGE_SIZE
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Неверный курсор."
+    ordering = ("-created", "-id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Возвращает одну страницу queryset после позиции курсора."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.fields = [
+            self.resolve_field(queryset.model, name.lstrip("-"))
+            for name in self.ordering
+        ]
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.get_seek_filter(position))
+
+        results = list(queryset[: self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        """Размер страницы с учетом параметра limit."""
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    @staticmethod
+    def resolve_field(model, path):
+        """Поле модели по пути вида relation__field."""
+        *relations, name = path.split("__")
+        for relation in relations:
+            model = model._meta.get_field(relation).related_model
+        return model._meta.get_field(name)
+
+    def get_seek_filter(self, position):
+        """Условие «строго после position» в порядке ordering."""
+        condition = Q()
+        equal = {}
+        for name, value in zip(self.ordering, position):
+            path = name.lstrip("-")
+            lookup = "lt" if name.startswith("-") else "gt"
+            condition |= Q(**equal, **{f"{path}__{lookup}": value})
+            equal[path] = value
+        return condition
+
+    def decode_cursor(self, request):
+        """Достает позицию из параметра cursor."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if not isinstance(values, list) or len(values) != len(self.fields):
+                raise ValueError
+            position = [
+                field.to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except (TypeError, ValueError, ValidationError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+        if None in position:
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def encode_cursor(self, obj):
+        """Кодирует позицию записи obj в курсор."""
+        values = []
+        for name, field in zip(self.ordering, self.fields):
+            target = obj
+            for relation in name.lstrip("-").split("__")[:-1]:
+                target = getattr(target, relation)
+            values.append(field.value_to_string(target))
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def get_next_link(self):
+        """Ссылка на следующую страницу."""
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            self.encode_cursor(self.page[-1]),
+        )
+
+    def get_paginated_response(self, data):
+        """Ответ со ссылкой на следующую страницу."""
+        return Response(
+            OrderedDict([("next", self.get_next_link()), ("results", data)])
+        )
+
+    def get_paginated_response_schema(self, schema):
+        """Схема ответа для OpenAPI."""
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+
+class PopularRecipePagination(KeysetPagination):
+    """Keyset-пагинатор рецептов по убыванию популярности."""
+
+    ordering = ("-popularity__score", "-id")
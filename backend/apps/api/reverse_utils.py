@@ -52,6 +52,26 @@ class FoodgramURLs:
         """URL для управления аватаром пользователя."""
         return reverse("api:v1:users-avatar")
 
+    @staticmethod
+    def users_uploads():
+        """URL для получения подписанного URL прямой загрузки."""
+        return reverse("api:v1:users-uploads")
+
+    @staticmethod
+    def users_favorites():
+        """URL для списка избранного пользователя."""
+        return reverse("api:v1:users-favorites")
+
+    @staticmethod
+    def users_shopping_cart():
+        """URL для списка покупок пользователя."""
+        return reverse("api:v1:users-shopping-cart")
+
+    @staticmethod
+    def users_notifications():
+        """URL для настроек уведомлений пользователя."""
+        return reverse("api:v1:users-notifications")
+
     @staticmethod
     def users_set_password():
         """URL для изменения пароля."""
@@ -80,11 +100,38 @@ class FoodgramURLs:
             "api:v1:recipes-shopping-cart", kwargs={"pk": recipe_id}
         )
 
+    @staticmethod
+    def recipes_feed():
+        """URL для ленты рецептов подписок."""
+        return reverse("api:v1:recipes-feed")
+
     @staticmethod
     def recipes_download_shopping_cart():
         """URL для скачивания списка покупок."""
         return reverse("api:v1:recipes-download-shopping-cart")
 
+    @staticmethod
+    def recipes_similar(recipe_id):
+        """URL для похожих рецептов."""
+        return reverse("api:v1:recipes-similar", kwargs={"pk": recipe_id})
+
+    @staticmethod
+    def recipes_import():
+        """URL для массового импорта рецептов."""
+        return reverse("api:v1:recipes-import-recipes")
+
+    @staticmethod
+    def recipes_export():
+        """URL для выгрузки всех рецептов."""
+        return reverse("api:v1:recipes-export-recipes")
+
+    @staticmethod
+    def recipes_similar_ingredients(recipe_id):
+        """URL для рецептов с похожими ингредиентами."""
+        return reverse(
+            "api:v1:recipes-similar-ingredients", kwargs={"pk": recipe_id}
+        )
+
     @staticmethod
     def recipes_get_link(recipe_id):
         """URL для получения короткой ссылки на рецепт."""
@@ -1,5 +1,6 @@
 """Serializers for Foodgram API."""
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import transaction
 
@@ -7,6 +8,7 @@ from djoser.serializers import UserCreateSerializer
 from djoser.serializers import UserSerializer as DjoserUserSerializer
 from rest_framework import serializers
 
+from apps.recipes.minhash import index_recipe
 from apps.recipes.models import (
     Favorite,
     Ingredient,
@@ -15,10 +17,27 @@ from apps.recipes.models import (
     ShoppingCart,
     Tag,
 )
+from apps.recipes.tasks import (
+    fanout_recipe_task,
+    notify_subscribers_task,
+    process_recipe_image_task,
+)
+from apps.recipes.uploads import stage_recipe_image
 from apps.users.models import Subscription
-from foodgram.constants import MAX_COOKING_TIME, MIN_COOKING_TIME
+from foodgram.constants import (
+    MAX_COOKING_TIME,
+    MAX_IMAGE_SIZE,
+    MIN_COOKING_TIME,
+    UPLOAD_CONTENT_TYPES,
+)
 
-from .fields import Base64ImageField
+from .fields import (
+    Base64ImageField,
+    ImageVariantField,
+    PlaceholderImageField,
+    UploadedImageKeyField,
+)
+from .utils import parse_limit
 
 User = get_user_model()
 
@@ -26,10 +45,10 @@ User = get_user_model()
 class IngredientInRecipeCreateSerializer(serializers.Serializer):
     """Сериализатор для создания ингредиентов в рецепте."""
 
-    id = serializers.PrimaryKeyRelatedField(
-        queryset=Ingredient.objects.all(),
+    id = serializers.IntegerField(
         error_messages={
-            "does_not_exist": "Ингредиент с указанным ID не существует."
+            "invalid": "ID ингредиента должен быть целым числом.",
+            "required": "Укажите ID ингредиента.",
         },
     )
     amount = serializers.IntegerField(
@@ -60,6 +79,8 @@ class UserSerializer(DjoserUserSerializer):
     """Сериализатор для модели User."""
 
     is_subscribed = serializers.SerializerMethodField()
+    avatar_thumb = ImageVariantField()
+    avatar_srcset = ImageVariantField(kind="srcset")
 
     class Meta:
         model = User
@@ -71,10 +92,15 @@ class UserSerializer(DjoserUserSerializer):
             "last_name",
             "is_subscribed",
             "avatar",
+            "avatar_thumb",
+            "avatar_srcset",
         )
 
     def get_is_subscribed(self, obj):
         """Проверяет подписку текущего пользователя на данного."""
+        is_subscribed = getattr(obj, "is_subscribed", None)
+        if is_subscribed is not None:
+            return is_subscribed
         request = self.context.get("request")
         if request and request.user.is_authenticated:
             return Subscription.objects.filter(
@@ -117,7 +143,38 @@ class CustomUserCreateSerializer(UserCreateSerializer):
 class SetAvatarSerializer(serializers.Serializer):
     """Сериализатор для установки аватара пользователя."""
 
-    avatar = Base64ImageField()
+    avatar = Base64ImageField(required=False)
+    avatar_key = UploadedImageKeyField(kind="avatar", required=False)
+
+    def validate(self, data):
+        """Нужен ровно один источник аватара."""
+        if ("avatar" in data) == ("avatar_key" in data):
+            raise serializers.ValidationError(
+                {"avatar": ["Передайте изображение или ключ загрузки."]}
+            )
+        return data
+
+
+class UploadSerializer(serializers.Serializer):
+    """Сериализатор запроса URL для прямой загрузки изображения."""
+
+    kind = serializers.ChoiceField(choices=["recipe", "avatar"])
+    content_type = serializers.ChoiceField(choices=list(UPLOAD_CONTENT_TYPES))
+    size = serializers.IntegerField(min_value=1, max_value=MAX_IMAGE_SIZE)
+
+
+class AccessTokenRefreshSerializer(serializers.Serializer):
+    """Сериализатор запроса нового токена доступа."""
+
+    auth_token = serializers.CharField()
+
+
+class NotificationSettingsSerializer(serializers.ModelSerializer):
+    """Сериализатор настроек уведомлений пользователя."""
+
+    class Meta:
+        model = User
+        fields = ("notification_mode",)
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -155,9 +212,26 @@ class IngredientInRecipeSerializer(serializers.ModelSerializer):
 class RecipeMinifiedSerializer(serializers.ModelSerializer):
     """Минифицированный сериализатор рецепта для избранного/корзины."""
 
+    image = PlaceholderImageField(
+        placeholder=settings.RECIPE_IMAGE_PLACEHOLDER
+    )
+    image_thumb = ImageVariantField(
+        placeholder=settings.RECIPE_IMAGE_PLACEHOLDER
+    )
+    image_srcset = ImageVariantField(kind="srcset")
+    image_preview = ImageVariantField(kind="preview")
+
     class Meta:
         model = Recipe
-        fields = ("id", "name", "image", "cooking_time")
+        fields = (
+            "id",
+            "name",
+            "image",
+            "image_thumb",
+            "image_srcset",
+            "image_preview",
+            "cooking_time",
+        )
         read_only_fields = ("id", "name", "image", "cooking_time")
 
 
@@ -171,6 +245,14 @@ class RecipeSerializer(serializers.ModelSerializer):
     )
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    image = PlaceholderImageField(
+        placeholder=settings.RECIPE_IMAGE_PLACEHOLDER
+    )
+    image_thumb = ImageVariantField(
+        placeholder=settings.RECIPE_IMAGE_PLACEHOLDER
+    )
+    image_srcset = ImageVariantField(kind="srcset")
+    image_preview = ImageVariantField(kind="preview")
 
     class Meta:
         model = Recipe
@@ -183,13 +265,20 @@ class RecipeSerializer(serializers.ModelSerializer):
             "is_in_shopping_cart",
             "name",
             "image",
+            "image_thumb",
+            "image_srcset",
+            "image_preview",
+            "image_status",
             "text",
             "cooking_time",
         )
-        read_only_fields = ("id", "author")
+        read_only_fields = ("id", "author", "image_status")
 
     def get_is_favorited(self, obj):
         """Проверяет находится ли рецепт в избранном."""
+        is_favorited = getattr(obj, "is_favorited", None)
+        if is_favorited is not None:
+            return is_favorited
         request = self.context.get("request")
         if request and request.user.is_authenticated:
             return Favorite.objects.filter(
@@ -199,6 +288,9 @@ class RecipeSerializer(serializers.ModelSerializer):
 
     def get_is_in_shopping_cart(self, obj):
         """Проверяет находится ли рецепт в списке покупок."""
+        is_in_shopping_cart = getattr(obj, "is_in_shopping_cart", None)
+        if is_in_shopping_cart is not None:
+            return is_in_shopping_cart
         request = self.context.get("request")
         if request and request.user.is_authenticated:
             return ShoppingCart.objects.filter(
@@ -210,13 +302,16 @@ class RecipeSerializer(serializers.ModelSerializer):
 class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
     """Сериализатор для создания и обновления рецептов."""
 
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(), many=True, required=True
+    tags = serializers.ListField(
+        child=serializers.IntegerField(), required=True
     )
     ingredients = IngredientInRecipeCreateSerializer(
         many=True, write_only=True, required=True
     )
-    image = Base64ImageField(required=False)
+    image = Base64ImageField(required=False, verify=False)
+    image_key = UploadedImageKeyField(
+        kind="recipe", required=False, write_only=True
+    )
     cooking_time = serializers.IntegerField(
         min_value=MIN_COOKING_TIME, max_value=MAX_COOKING_TIME
     )
@@ -228,6 +323,7 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
             "ingredients",
             "name",
             "image",
+            "image_key",
             "text",
             "cooking_time",
         )
@@ -253,8 +349,11 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
                     errors[field] = ["Описание рецепта обязательно."]
 
         # Проверяем изображение только при создании нового рецепта
-        if not self.instance and ("image" not in data or not data["image"]):
+        has_image = bool(data.get("image")) or bool(data.get("image_key"))
+        if not self.instance and not has_image:
             errors["image"] = ["Необходимо загрузить изображение."]
+        if data.get("image") and data.get("image_key"):
+            errors["image"] = ["Передайте изображение или ключ загрузки."]
 
         if errors:
             raise serializers.ValidationError(errors)
@@ -269,14 +368,25 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
             )
 
         # Используем множества для проверки дубликатов
-        ingredient_ids = {item["id"].id for item in value}
+        ingredient_ids = {item["id"] for item in value}
 
         if len(ingredient_ids) != len(value):
             raise serializers.ValidationError(
                 "Ингредиенты не должны повторяться."
             )
 
-        return value
+        # Загружаем все ингредиенты одним запросом вместо запроса на каждый
+        ingredients = Ingredient.objects.in_bulk(ingredient_ids)
+        errors = [
+            {}
+            if item["id"] in ingredients
+            else {"id": ["Ингредиент с указанным ID не существует."]}
+            for item in value
+        ]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        return [{**item, "id": ingredients[item["id"]]} for item in value]
 
     def validate_tags(self, value):
         """Валидация тегов."""
@@ -288,20 +398,39 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
         if len(value) != len(set(value)):
             raise serializers.ValidationError("Теги не должны повторяться.")
 
-        return value
+        tags = Tag.objects.in_bulk(value)
+        for tag_id in value:
+            if tag_id not in tags:
+                raise serializers.ValidationError(
+                    serializers.PrimaryKeyRelatedField.default_error_messages[
+                        "does_not_exist"
+                    ].format(pk_value=tag_id)
+                )
+
+        return [tags[tag_id] for tag_id in value]
 
     @transaction.atomic
     def create(self, validated_data):
         """Создание нового рецепта."""
         tags = validated_data.pop("tags")
         ingredients = validated_data.pop("ingredients")
+        image = validated_data.pop("image", None)
+        image_key = validated_data.pop("image_key", "")
 
         recipe = Recipe.objects.create(
-            author=self.context["request"].user, **validated_data
+            author=self.context["request"].user,
+            image_status=Recipe.ImageStatus.PROCESSING,
+            **validated_data,
         )
 
+        self._stage_image(recipe, image, image_key)
         self._create_ingredients(recipe, ingredients)
         recipe.tags.set(tags)
+        index_recipe(recipe.pk, [item["id"].pk for item in ingredients])
+
+        transaction.on_commit(lambda: notify_subscribers_task.delay(recipe.pk))
+        if settings.FEED_FANOUT_ENABLED:
+            transaction.on_commit(lambda: fanout_recipe_task.delay(recipe.pk))
 
         return recipe
 
@@ -310,15 +439,81 @@ class RecipeCreateUpdateSerializer(serializers.ModelSerializer):
         """Обновление рецепта."""
         tags = validated_data.pop("tags", None)
         ingredients = validated_data.pop("ingredients", None)
+        image = validated_data.pop("image", None)
+        image_key = validated_data.pop("image_key", "")
 
-        if tags is not None:
-            instance.tags.set(tags)
+        if image is not None or image_key:
+            self._stage_image(instance, image, image_key)
+            validated_data["image_status"] = Recipe.ImageStatus.PROCESSING
 
-        if ingredients is not None:
-            instance.recipe_ingredients.all().delete()
-            self._create_ingredients(instance, ingredients)
+        if tags is not None:
+            self._update_tags(instance, tags)
+
+        if ingredients is not None and self._update_ingredients(
+            instance, ingredients
+        ):
+            index_recipe(instance.pk, [item["id"].pk for item in ingredients])
+
+        changed_data = {
+            attr: value
+            for attr, value in validated_data.items()
+            if getattr(instance, attr) != value
+        }
+        if not changed_data:
+            return instance
+        return super().update(instance, changed_data)
+
+    def _stage_image(self, recipe, image, image_key):
+        """Откладывает загрузку изображения до фиксации транзакции."""
+        stage_recipe_image(recipe, image, key=image_key)
+        transaction.on_commit(
+            lambda: process_recipe_image_task.delay(recipe.pk)
+        )
 
-        return super().update(instance, validated_data)
+    def _update_tags(self, recipe, tags):
+        """Добавляет и удаляет только изменившиеся теги рецепта."""
+        current_ids = set(recipe.tags.values_list("pk", flat=True))
+        new_ids = {tag.pk for tag in tags}
+
+        if current_ids - new_ids:
+            recipe.tags.remove(*(current_ids - new_ids))
+        if new_ids - current_ids:
+            recipe.tags.add(*(new_ids - current_ids))
+
+    def _update_ingredients(self, recipe, ingredients):
+        """Применяет к ингредиентам рецепта только разницу с текущими.
+
+        Возвращает True, если изменился состав ингредиентов.
+        """
+        current = {
+            item.ingredient_id: item
+            for item in recipe.recipe_ingredients.all()
+        }
+        submitted = {item["id"].pk: item for item in ingredients}
+
+        removed_ids = current.keys() - submitted.keys()
+        added = [
+            item
+            for ingredient_id, item in submitted.items()
+            if ingredient_id not in current
+        ]
+        changed = []
+        for ingredient_id, item in submitted.items():
+            existing = current.get(ingredient_id)
+            if existing is not None and existing.amount != item["amount"]:
+                existing.amount = item["amount"]
+                changed.append(existing)
+
+        if removed_ids:
+            recipe.recipe_ingredients.filter(
+                ingredient_id__in=removed_ids
+            ).delete()
+        if changed:
+            IngredientInRecipe.objects.bulk_update(changed, ["amount"])
+        if added:
+            self._create_ingredients(recipe, added)
+
+        return bool(removed_ids or added)
 
     def _create_ingredients(self, recipe, ingredients):
         """Создание связей рецепта с ингредиентами."""
@@ -355,14 +550,13 @@ class UserWithRecipesSerializer(UserSerializer):
         recipes_limit = None
 
         if request:
-            recipes_limit = request.query_params.get("recipes_limit")
+            recipes_limit = parse_limit(
+                request.query_params.get("recipes_limit")
+            )
 
         recipes = obj.recipes.all()
-        if recipes_limit:
-            try:
-                recipes = recipes[: int(recipes_limit)]
-            except ValueError:
-                pass
+        if recipes_limit is not None:
+            recipes = recipes[:recipes_limit]
 
         return RecipeMinifiedSerializer(
             recipes, many=True, context=self.context
@@ -370,4 +564,7 @@ class UserWithRecipesSerializer(UserSerializer):
 
     def get_recipes_count(self, obj):
         """Возвращает количество рецептов пользователя."""
+        recipes_count = getattr(obj, "recipes_count", None)
+        if recipes_count is not None:
+            return recipes_count
         return obj.recipes.count()
@@ -0,0 +1,25 @@
+"""Сброс кеша аутентификации при изменении токенов и пользователей."""
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_token, invalidate_user_tokens
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    """Выход пользователя: токен больше не действителен."""
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    """Смена пароля, деактивация и другие изменения пользователя."""
+    # Вход обновляет только last_login, который в снимок не входит
+    if created or update_fields == frozenset({"last_login"}):
+        return
+    invalidate_user_tokens(instance.pk)
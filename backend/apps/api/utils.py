@@ -1,7 +1,9 @@
 """Утилиты для API приложения."""
-from django.conf import settings
-from django.core.mail import send_mail
-from django.db.models import Sum
+from django.db import connections, router
+from django.db.models import F, Sum, Window
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
+from django.db.models.sql import InsertQuery
 
 from apps.recipes.models import IngredientInRecipe
 
@@ -38,21 +40,86 @@ def generate_shopping_list(user):
     return "\n".join(shopping_list)
 
 
-def send_recipe_notification(user_email, recipe_title):
+def insert_ignore_conflicts(model, **values):
     """
-    Отправляет уведомление о новом рецепте подписанным пользователям.
+    Создает запись одним INSERT ... ON CONFLICT DO NOTHING.
+
+    В отличие от связки exists() + create() не оставляет окна для гонки
+    при параллельных запросах и не требует дополнительных обращений к БД.
 
     Args:
-        user_email: Email получателя
-        recipe_title: Название рецепта
+        model: Класс модели
+        **values: Значения полей новой записи
+
+    Returns:
+        True, если запись была вставлена, и False, если она уже существовала
     """
-    subject = "Новый рецепт от автора, на которого вы подписаны!"
-    message = f"Был добавлен новый рецепт: {recipe_title}"
-
-    send_mail(
-        subject,
-        message,
-        settings.DEFAULT_FROM_EMAIL,
-        [user_email],
-        fail_silently=False,
+    obj = model(**values)
+    fields = [
+        field for field in model._meta.concrete_fields if not field.primary_key
+    ]
+    query = InsertQuery(model, ignore_conflicts=True)
+    query.insert_values(fields, [obj])
+
+    using = router.db_for_write(model)
+    compiler = query.get_compiler(using=using)
+    inserted = 0
+    with connections[using].cursor() as cursor:
+        for sql, params in compiler.as_sql():
+            cursor.execute(sql, params)
+            inserted += cursor.rowcount
+    return inserted > 0
+
+
+def parse_limit(value):
+    """Возвращает неотрицательный лимит из query-параметра или None."""
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return None
+    return limit if limit >= 0 else None
+
+
+def top_n_per_group(queryset, group_field, limit):
+    """
+    Оставляет в queryset не более limit записей на каждую группу.
+
+    Записи нумеруются оконной функцией ROW_NUMBER() OVER (PARTITION BY
+    group_field ORDER BY <ordering модели>), после чего отбираются только
+    первые limit номеров. Результат годится для Prefetch: все группы
+    обслуживаются одним запросом.
+
+    Args:
+        queryset: Исходный queryset
+        group_field: Поле, по которому разбиваются группы
+        limit: Максимальное количество записей в группе
+
+    Returns:
+        Queryset модели, ограниченный первыми limit записями каждой группы
+    """
+    model = queryset.model
+    ordering = [
+        F(field[1:]).desc() if field.startswith("-") else F(field).asc()
+        for field in queryset.query.order_by or model._meta.ordering
+    ]
+    ranked = (
+        queryset.annotate(
+            row_number=Window(
+                expression=RowNumber(),
+                partition_by=[F(group_field)],
+                order_by=ordering,
+            )
+        )
+        .order_by()
+        .values("pk", "row_number")
+    )
+    sql, params = ranked.query.sql_with_params()
+    quote_name = connections[ranked.db].ops.quote_name
+    pk_column = quote_name(model._meta.pk.column)
+    return model._default_manager.filter(
+        pk__in=RawSQL(
+            f"SELECT ranked.{pk_column} FROM ({sql}) ranked "
+            f"WHERE ranked.{quote_name('row_number')} <= %s",
+            (*params, limit),
+        )
     )
@@ -13,6 +13,8 @@ from ..views import (
     RecipeViewSet,
     TagViewSet,
     UserViewSet,
+    access_token_create,
+    access_token_refresh,
     health_check,
 )
 
@@ -42,6 +44,13 @@ urlpatterns = [
     path("schema/", SpectacularAPIView.as_view(), name="schema"),
     # API v1 endpoints
     path("", include(router.urls)),
+    # Подписанные токены доступа рядом с токенами djoser
+    path("auth/token/access/", access_token_create, name="access-token"),
+    path(
+        "auth/token/refresh/",
+        access_token_refresh,
+        name="access-token-refresh",
+    ),
     # Djoser authentication endpoints
     path("auth/", include("djoser.urls.authtoken"), name="auth"),
 ]
@@ -1,32 +1,73 @@
 """Views for Foodgram API."""
 
+from django.conf import settings
 from django.contrib.auth import get_user_model, update_session_auth_hash
-from django.http import HttpResponse, JsonResponse
+from django.core.files.storage import default_storage
+from django.db.models import (
+    BooleanField,
+    Count,
+    Exists,
+    OuterRef,
+    Prefetch,
+    Value,
+)
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect
 
 from django_filters.rest_framework import DjangoFilterBackend
+from djoser.conf import settings as djoser_settings
+from djoser.utils import login_user
 from djoser.views import UserViewSet as DjoserUserViewSet
 from rest_framework import status, viewsets
 from rest_framework.decorators import action, api_view, permission_classes
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import (
+    AllowAny,
+    IsAdminUser,
+    IsAuthenticated,
+)
 from rest_framework.response import Response
 
+from apps.recipes.exporter import export_recipes, parse_since
+from apps.recipes.feed import timeline_queryset, trim_timeline
+from apps.recipes.importer import RecipeImporter
+from apps.recipes.minhash import similar_by_ingredients
 from apps.recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from apps.recipes.tasks import backfill_timeline_task
+from apps.recipes.uploads import (
+    presigned_upload,
+    read_uploaded_image,
+    supports_direct_upload,
+)
 from apps.users.models import Subscription
 
+from .authentication import CachedTokenAuthentication, issue_access_token
 from .filters import IngredientFilter, RecipeFilter
+from .pagination import (
+    KeysetPagination,
+    PopularRecipePagination,
+    RecipeCursorPagination,
+)
 from .permissions import IsAuthorOrReadOnly
 from .serializers import (
+    AccessTokenRefreshSerializer,
     IngredientSerializer,
+    NotificationSettingsSerializer,
     RecipeCreateUpdateSerializer,
     RecipeMinifiedSerializer,
     RecipeSerializer,
     SetAvatarSerializer,
     TagSerializer,
+    UploadSerializer,
     UserSerializer,
     UserWithRecipesSerializer,
 )
-from .utils import generate_shopping_list
+from .utils import (
+    generate_shopping_list,
+    insert_ignore_conflicts,
+    parse_limit,
+    top_n_per_group,
+)
 
 User = get_user_model()
 
@@ -78,9 +119,24 @@ class UserViewSet(DjoserUserViewSet):
     )
     def subscriptions(self, request):
         """Получить список подписок пользователя."""
-        subscriptions = User.objects.filter(
-            subscribers__user=request.user
-        ).prefetch_related("recipes")
+        recipes = Recipe.objects.all()
+        recipes_limit = parse_limit(request.query_params.get("recipes_limit"))
+        if recipes_limit is not None:
+            recipes = top_n_per_group(
+                recipes.filter(author__subscribers__user=request.user),
+                "author",
+                recipes_limit,
+            )
+
+        subscriptions = (
+            User.objects.filter(subscribers__user=request.user)
+            .annotate(
+                recipes_count=Count("recipes"),
+                is_subscribed=Value(True, output_field=BooleanField()),
+            )
+            .prefetch_related(Prefetch("recipes", queryset=recipes))
+            .order_by("username")
+        )
 
         page = self.paginate_queryset(subscriptions)
         if page is not None:
@@ -110,15 +166,15 @@ class UserViewSet(DjoserUserViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        subscription = Subscription.objects.filter(user=user, author=author)
-
-        if subscription.exists():
+        if not insert_ignore_conflicts(Subscription, user=user, author=author):
             return Response(
                 {"errors": "Вы уже подписаны на этого пользователя"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        Subscription.objects.create(user=user, author=author)
+        if settings.FEED_FANOUT_ENABLED:
+            backfill_timeline_task.delay(user.id, author.id)
+
         serializer = UserWithRecipesSerializer(
             author, context={"request": request}
         )
@@ -127,18 +183,20 @@ class UserViewSet(DjoserUserViewSet):
     @subscribe.mapping.delete
     def unsubscribe(self, request, id=None):
         """Отписаться от пользователя."""
-        author = get_object_or_404(User, id=id)
-        user = request.user
-
-        subscription = Subscription.objects.filter(user=user, author=author)
+        deleted, _ = Subscription.objects.filter(
+            user=request.user, author_id=id
+        ).delete()
 
-        if not subscription.exists():
+        if not deleted:
+            get_object_or_404(User, id=id)
             return Response(
                 {"errors": "Вы не были подписаны на этого пользователя"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        subscription.delete()
+        if settings.FEED_FANOUT_ENABLED:
+            trim_timeline(request.user.id, id)
+
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
@@ -150,21 +208,110 @@ class UserViewSet(DjoserUserViewSet):
     def avatar(self, request):
         """Установить аватар пользователя."""
         user = request.user
-        serializer = SetAvatarSerializer(data=request.data)
+        serializer = SetAvatarSerializer(
+            data=request.data, context={"request": request}
+        )
         serializer.is_valid(raise_exception=True)
 
-        user.avatar = serializer.validated_data["avatar"]
+        avatar_key = serializer.validated_data.get("avatar_key")
+        if avatar_key:
+            try:
+                user.avatar = read_uploaded_image(avatar_key)
+            except ValueError as error:
+                return Response(
+                    {"avatar_key": [str(error)]},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            finally:
+                default_storage.delete(avatar_key)
+        else:
+            user.avatar = serializer.validated_data["avatar"]
         user.save()
         return Response({"avatar": user.avatar.url if user.avatar else None})
 
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[IsAuthenticated],
+        url_path="me/uploads",
+    )
+    def uploads(self, request):
+        """Выдать подписанный URL для прямой загрузки изображения."""
+        if not supports_direct_upload():
+            return Response(
+                {"detail": "Прямая загрузка в хранилище недоступна."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        serializer = UploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        upload = presigned_upload(request.user, **serializer.validated_data)
+        return Response(upload, status=status.HTTP_201_CREATED)
+
     @avatar.mapping.delete
     def delete_avatar(self, request):
         """Удалить аватар пользователя."""
         user = request.user
-        user.avatar.delete()
+        # Файл не удаляется: по ключу содержимого на него могут
+        # ссылаться другие записи
+        user.avatar = ""
         user.save()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    def _list_collection(self, request, model):
+        """Общий метод для списка избранного/корзины пользователя."""
+        queryset = model.objects.filter(user=request.user).select_related(
+            "recipe"
+        )
+
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = RecipeMinifiedSerializer(
+            [item.recipe for item in page],
+            many=True,
+            context=self.get_serializer_context(),
+        )
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=[IsAuthenticated],
+        url_path="me/favorites",
+    )
+    def favorites(self, request):
+        """Избранные рецепты пользователя в порядке добавления."""
+        return self._list_collection(request, Favorite)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        permission_classes=[IsAuthenticated],
+        url_path="me/shopping_cart",
+    )
+    def shopping_cart(self, request):
+        """Рецепты в списке покупок пользователя в порядке добавления."""
+        return self._list_collection(request, ShoppingCart)
+
+    @action(
+        detail=False,
+        methods=["get", "put"],
+        permission_classes=[IsAuthenticated],
+        url_path="me/notifications",
+    )
+    def notifications(self, request):
+        """Получить или изменить режим уведомлений пользователя."""
+        if request.method == "GET":
+            serializer = NotificationSettingsSerializer(request.user)
+            return Response(serializer.data)
+
+        serializer = NotificationSettingsSerializer(
+            request.user, data=request.data
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
     @action(
         detail=False,
         methods=["post"],
@@ -249,13 +396,58 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
     def get_permissions(self):
         """Получить разрешения для действия."""
-        if self.action in ["list", "retrieve", "get_link"]:
+        if self.action in [
+            "list",
+            "retrieve",
+            "get_link",
+            "similar",
+            "similar_ingredients",
+        ]:
             permission_classes = [AllowAny]
+        elif self.action in ["import_recipes", "export_recipes"]:
+            permission_classes = [IsAdminUser]
         else:
             permission_classes = [IsAuthenticated, IsAuthorOrReadOnly]
 
         return [permission() for permission in permission_classes]
 
+    @property
+    def paginator(self):
+        """Keyset-пагинатор для сортировки по популярности."""
+        if not hasattr(self, "_paginator") and self._is_popular_ordering():
+            self._paginator = PopularRecipePagination()
+        return super().paginator
+
+    def _is_popular_ordering(self):
+        """Запрошен ли список рецептов по популярности."""
+        return (
+            self.action == "list"
+            and self.request.query_params.get("ordering") == "popular"
+        )
+
+    def get_queryset(self):
+        """Аннотировать рецепты флагами избранного и списка покупок."""
+        queryset = super().get_queryset()
+        if self._is_popular_ordering():
+            # Рецепты попадают в рейтинг после ближайшего пересчета
+            queryset = queryset.filter(
+                popularity__isnull=False
+            ).select_related("popularity")
+
+        user = self.request.user
+        if user.is_authenticated:
+            queryset = queryset.annotate(
+                is_favorited=Exists(
+                    Favorite.objects.filter(user=user, recipe=OuterRef("pk"))
+                ),
+                is_in_shopping_cart=Exists(
+                    ShoppingCart.objects.filter(
+                        user=user, recipe=OuterRef("pk")
+                    )
+                ),
+            )
+        return queryset
+
     def get_serializer_class(self):
         """Выбрать сериализатор в зависимости от действия."""
         if self.action in ["create", "update", "partial_update"]:
@@ -264,29 +456,28 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
     def _add_to_collection(self, model, user, recipe, error_message):
         """Общий метод для добавления в избранное/корзину."""
-        obj = model.objects.filter(user=user, recipe=recipe)
-
-        if obj.exists():
+        if not insert_ignore_conflicts(model, user=user, recipe=recipe):
             return Response(
                 {"errors": error_message},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        model.objects.create(user=user, recipe=recipe)
         serializer = RecipeMinifiedSerializer(recipe)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-    def _remove_from_collection(self, model, user, recipe, error_message):
+    def _remove_from_collection(self, model, user, recipe_id, error_message):
         """Общий метод для удаления из избранного/корзины."""
-        obj = model.objects.filter(user=user, recipe=recipe)
+        deleted, _ = model.objects.filter(
+            user=user, recipe_id=recipe_id
+        ).delete()
 
-        if not obj.exists():
+        if not deleted:
+            get_object_or_404(Recipe, pk=recipe_id)
             return Response(
                 {"errors": error_message},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        obj.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(
@@ -304,9 +495,8 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @favorite.mapping.delete
     def remove_favorite(self, request, pk=None):
         """Удалить рецепт из избранного."""
-        recipe = get_object_or_404(Recipe, pk=pk)
         return self._remove_from_collection(
-            Favorite, request.user, recipe, "Рецепта нет в избранном"
+            Favorite, request.user, pk, "Рецепта нет в избранном"
         )
 
     @action(
@@ -324,10 +514,36 @@ class RecipeViewSet(viewsets.ModelViewSet):
     @shopping_cart.mapping.delete
     def remove_shopping_cart(self, request, pk=None):
         """Удалить рецепт из списка покупок."""
-        recipe = get_object_or_404(Recipe, pk=pk)
         return self._remove_from_collection(
-            ShoppingCart, request.user, recipe, "Рецепта нет в списке покупок"
+            ShoppingCart, request.user, pk, "Рецепта нет в списке покупок"
+        )
+
+    @action(
+        detail=False, methods=["get"], permission_classes=[IsAuthenticated]
+    )
+    def feed(self, request):
+        """Лента рецептов авторов, на которых подписан пользователь."""
+        recipes = self.filter_queryset(self.get_queryset())
+        if settings.FEED_FANOUT_ENABLED:
+            recipes = timeline_queryset(request.user, recipes)
+        else:
+            recipes = recipes.filter(
+                author__in=Subscription.objects.filter(
+                    user=request.user
+                ).values("author")
+            )
+
+        paginator = RecipeCursorPagination()
+        page = paginator.paginate_queryset(recipes, request, view=self)
+        # Все авторы ленты - подписки пользователя, отдельная проверка
+        # is_subscribed для каждого рецепта не нужна
+        for recipe in page:
+            recipe.author.is_subscribed = True
+
+        serializer = RecipeSerializer(
+            page, many=True, context=self.get_serializer_context()
         )
+        return paginator.get_paginated_response(serializer.data)
 
     @action(
         detail=False, methods=["get"], permission_classes=[IsAuthenticated]
@@ -346,6 +562,94 @@ class RecipeViewSet(viewsets.ModelViewSet):
         ] = 'attachment; filename="shopping_list.txt"'
         return response
 
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        permission_classes=[IsAdminUser],
+        parser_classes=[MultiPartParser],
+    )
+    def import_recipes(self, request):
+        """Массовый импорт рецептов из файла JSON Lines."""
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"file": ["Загрузите файл в формате JSON Lines."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        report = RecipeImporter(request.user).run(upload)
+        return Response(report, status=status.HTTP_200_OK)
+
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="export",
+        permission_classes=[IsAdminUser],
+    )
+    def export_recipes(self, request):
+        """Потоковая выгрузка всех рецептов в JSON Lines."""
+        since = request.query_params.get("since")
+        if since:
+            try:
+                since = parse_since(since)
+            except ValueError:
+                return Response(
+                    {"since": ["Укажите дату в формате ISO 8601."]},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        compress = request.query_params.get("gzip") in ["1", "true"]
+        response = StreamingHttpResponse(
+            export_recipes(since=since or None, compress=compress),
+            content_type=(
+                "application/gzip" if compress else "application/x-ndjson"
+            ),
+        )
+        filename = "recipes.jsonl.gz" if compress else "recipes.jsonl"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    @action(
+        detail=True,
+        methods=["get"],
+        permission_classes=[AllowAny],
+    )
+    def similar(self, request, pk=None):
+        """Рецепты, которые часто добавляют в избранное вместе с этим."""
+        recipes = list(
+            Recipe.objects.filter(similar_for__recipe_id=pk).order_by(
+                "-similar_for__score"
+            )
+        )
+        if not recipes:
+            get_object_or_404(Recipe, pk=pk)
+
+        serializer = RecipeMinifiedSerializer(
+            recipes, many=True, context=self.get_serializer_context()
+        )
+        return Response(serializer.data)
+
+    @action(
+        detail=True,
+        methods=["get"],
+        url_path="similar-ingredients",
+        permission_classes=[AllowAny],
+    )
+    def similar_ingredients(self, request, pk=None):
+        """Рецепты с наиболее похожим набором ингредиентов."""
+        recipe = get_object_or_404(Recipe, pk=pk)
+        similar = similar_by_ingredients(recipe.pk)
+
+        data = []
+        for similar_recipe, score in similar:
+            item = RecipeMinifiedSerializer(
+                similar_recipe, context=self.get_serializer_context()
+            ).data
+            item["similarity"] = round(score, 3)
+            data.append(item)
+        return Response(data)
+
     @action(
         detail=True,
         methods=["get"],
@@ -360,6 +664,32 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return Response({"short-link": short_link})
 
 
+@api_view(["POST"])
+@permission_classes([AllowAny])
+def access_token_create(request):
+    """Вход по email и паролю: токен authtoken и токен доступа."""
+    serializer = djoser_settings.SERIALIZERS.token_create(
+        data=request.data, context={"request": request}
+    )
+    serializer.is_valid(raise_exception=True)
+    token = login_user(request, serializer.user)
+    return Response(
+        {"auth_token": token.key, **issue_access_token(serializer.user)}
+    )
+
+
+@api_view(["POST"])
+@permission_classes([AllowAny])
+def access_token_refresh(request):
+    """Новый токен доступа по токену authtoken."""
+    serializer = AccessTokenRefreshSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    user, _ = CachedTokenAuthentication().authenticate_credentials(
+        serializer.validated_data["auth_token"]
+    )
+    return Response(issue_access_token(user))
+
+
 @api_view(["GET"])
 @permission_classes([AllowAny])
 def short_link_redirect(request, recipe_id):
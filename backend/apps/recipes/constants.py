@@ -8,6 +8,7 @@ MAX_TAG_COLOR_LENGTH = 7  # Для HEX цвета (#RRGGBB)
 MAX_TAG_SLUG_LENGTH = 64
 MAX_INGREDIENT_NAME_LENGTH = 256
 MAX_INGREDIENT_UNIT_LENGTH = 64
+MAX_IMAGE_STATUS_LENGTH = 16
 
 # Ограничения для числовых полей
 MIN_COOKING_TIME = 1
@@ -0,0 +1,138 @@
+"""Потоковая выгрузка каталога рецептов в JSON Lines.
+
+Рецепты читаются через QuerySet.iterator(chunk_size=...) — в PostgreSQL
+это серверный курсор, поэтому в памяти находится только текущая пачка.
+Ингредиенты и теги подгружаются двумя запросами на пачку через
+prefetch_related_objects: iterator() сам prefetch_related не выполняет.
+"""
+import json
+import zlib
+from datetime import datetime, time
+from itertools import islice
+
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from foodgram.constants import EXPORT_CHUNK_SIZE
+
+from .models import IngredientInRecipe, Recipe
+
+
+def parse_since(value):
+    """
+    Разбирает начало инкрементальной выгрузки.
+
+    Args:
+        value: Дата или дата и время в формате ISO 8601
+
+    Returns:
+        Datetime с часовым поясом
+
+    Raises:
+        ValueError: Если строку не удалось разобрать
+    """
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Неверная дата: {value}")
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def iter_recipe_records(since=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Перебирает рецепты вместе с ингредиентами и тегами.
+
+    Args:
+        since: Выгружать только рецепты, созданные начиная с этого момента
+        chunk_size: Сколько рецептов читать из курсора за раз
+
+    Yields:
+        Словари с данными рецептов в порядке возрастания ID
+    """
+    recipes = Recipe.objects.select_related("author").order_by("pk")
+    if since is not None:
+        recipes = recipes.filter(created__gte=since)
+
+    iterator = recipes.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            break
+        prefetch_related_objects(
+            chunk,
+            Prefetch(
+                "recipe_ingredients",
+                queryset=IngredientInRecipe.objects.select_related(
+                    "ingredient"
+                ).order_by("pk"),
+            ),
+            "tags",
+        )
+        for recipe in chunk:
+            yield serialize_recipe(recipe)
+
+
+def serialize_recipe(recipe):
+    """Данные рецепта для выгрузки."""
+    return {
+        "id": recipe.pk,
+        "name": recipe.name,
+        "text": recipe.text,
+        "cooking_time": recipe.cooking_time,
+        "created": recipe.created.isoformat(),
+        "image": recipe.image.name or None,
+        "author": {
+            "id": recipe.author_id,
+            "username": recipe.author.username,
+        },
+        "tags": [
+            {"id": tag.pk, "name": tag.name, "slug": tag.slug}
+            for tag in recipe.tags.all()
+        ],
+        "ingredients": [
+            {
+                "id": item.ingredient_id,
+                "name": item.ingredient.name,
+                "measurement_unit": item.ingredient.measurement_unit,
+                "amount": item.amount,
+            }
+            for item in recipe.recipe_ingredients.all()
+        ],
+    }
+
+
+def iter_jsonl(records):
+    """Кодирует записи в строки JSON Lines (bytes)."""
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+def iter_gzip(chunks):
+    """Сжимает поток байтов в формат gzip на лету."""
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_recipes(since=None, compress=False, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Поток байтов JSON Lines со всеми рецептами.
+
+    Args:
+        since: Выгружать только рецепты, созданные начиная с этого момента
+        compress: Сжимать поток в gzip
+        chunk_size: Сколько рецептов читать из курсора за раз
+
+    Returns:
+        Итератор bytes
+    """
+    stream = iter_jsonl(iter_recipe_records(since, chunk_size))
+    return iter_gzip(stream) if compress else stream
@@ -0,0 +1,107 @@
+"""Материализованные ленты подписок (fan-out on write).
+
+Новый рецепт раскладывается по лентам подписчиков автора в виде записей
+FeedEntry. Рецепты авторов, у которых подписчиков больше
+FEED_FANOUT_MAX_FOLLOWERS, не раскладываются (fanned_out=False) и
+подмешиваются в ленту при чтении по индексу recipe_author_created_idx.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from apps.users.models import Subscription
+from foodgram.constants import FEED_FANOUT_BATCH_SIZE
+
+from .models import FeedEntry, Recipe
+
+
+def fanout_recipe(recipe_id):
+    """
+    Раскладывает рецепт по лентам подписчиков автора.
+
+    Args:
+        recipe_id: ID рецепта
+
+    Returns:
+        Количество подписчиков, получивших рецепт в ленту
+    """
+    recipe = Recipe.objects.filter(pk=recipe_id).only("author_id").first()
+    if recipe is None:
+        return 0
+
+    subscribers = Subscription.objects.filter(author_id=recipe.author_id)
+    if subscribers.count() > settings.FEED_FANOUT_MAX_FOLLOWERS:
+        return 0
+
+    delivered = 0
+    with transaction.atomic():
+        subscriber_ids = subscribers.values_list("user_id", flat=True)
+        batch = []
+        for user_id in subscriber_ids.iterator(
+            chunk_size=FEED_FANOUT_BATCH_SIZE
+        ):
+            batch.append(FeedEntry(user_id=user_id, recipe_id=recipe_id))
+            if len(batch) >= FEED_FANOUT_BATCH_SIZE:
+                FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+                delivered += len(batch)
+                batch = []
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        delivered += len(batch)
+
+        Recipe.objects.filter(pk=recipe_id).update(fanned_out=True)
+
+    return delivered
+
+
+def backfill_timeline(user_id, author_id):
+    """
+    Добавляет в ленту пользователя последние разосланные рецепты автора.
+
+    Args:
+        user_id: ID подписчика
+        author_id: ID автора
+    """
+    recipe_ids = Recipe.objects.filter(
+        author_id=author_id, fanned_out=True
+    ).values_list("pk", flat=True)[: settings.FEED_BACKFILL_LIMIT]
+
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(user_id=user_id, recipe_id=recipe_id)
+            for recipe_id in recipe_ids
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def trim_timeline(user_id, author_id):
+    """Удаляет рецепты автора из ленты пользователя после отписки."""
+    FeedEntry.objects.filter(
+        user_id=user_id, recipe__author_id=author_id
+    ).delete()
+
+
+def timeline_queryset(user, queryset=None):
+    """
+    Возвращает рецепты материализованной ленты пользователя.
+
+    Объединяет записи FeedEntry с нераспространенными рецептами авторов
+    из подписок пользователя.
+
+    Args:
+        user: Пользователь
+        queryset: Базовый queryset рецептов
+
+    Returns:
+        Queryset рецептов ленты
+    """
+    if queryset is None:
+        queryset = Recipe.objects.all()
+
+    return queryset.filter(
+        Q(pk__in=FeedEntry.objects.filter(user=user).values("recipe"))
+        | Q(
+            fanned_out=False,
+            author__in=Subscription.objects.filter(user=user).values("author"),
+        )
+    )
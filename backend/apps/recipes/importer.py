@@ -0,0 +1,356 @@
+"""Массовый импорт рецептов из JSON Lines.
+
+Каждая строка файла — отдельный рецепт::
+
+    {"name": "...", "text": "...", "cooking_time": 30,
+     "tags": ["Завтрак"],
+     "ingredients": [{"name": "Сахар", "measurement_unit": "г",
+                      "amount": 100}],
+     "image": "data:image/png;base64,..."}
+
+Теги и ингредиенты ищутся по названию в словарях, загруженных один раз
+на весь импорт. Строки обрабатываются пачками: изображения пачки
+декодируются и сохраняются в хранилище пулом потоков вместе с
+уменьшенными копиями и превью, как при обычном сохранении рецепта, затем
+рецепты, связи с ингредиентами и тегами вставляются bulk_create в
+отдельной транзакции (точке сохранения). Если пачка не вставилась
+целиком, строки повторяются по одной, чтобы ошибка одной строки не
+отменяла остальные.
+
+Уведомления подписчикам и рассылка по лентам для импортированных
+рецептов не запускаются: они попадают в ленты через pull-часть.
+"""
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import DatabaseError, connection, transaction
+
+from botocore.exceptions import ClientError
+from rest_framework import serializers
+
+from apps.api.fields import Base64ImageField
+from foodgram.constants import IMPORT_BATCH_SIZE, IMPORT_IMAGE_WORKERS
+from foodgram.images import build_variants
+
+from .constants import (
+    MAX_COOKING_TIME,
+    MAX_INGREDIENT_AMOUNT,
+    MAX_RECIPE_NAME_LENGTH,
+    MAX_RECIPE_TEXT_LENGTH,
+    MIN_COOKING_TIME,
+    MIN_INGREDIENT_AMOUNT,
+)
+from .minhash import index_new_recipes
+from .models import Ingredient, IngredientInRecipe, Recipe, Tag
+
+
+class ImportLineError(Exception):
+    """Ошибка в отдельной строке импортируемого файла."""
+
+
+class RecipeImporter:
+    """Импорт рецептов из строк JSON Lines от имени одного автора."""
+
+    def __init__(
+        self,
+        author,
+        batch_size=IMPORT_BATCH_SIZE,
+        image_workers=IMPORT_IMAGE_WORKERS,
+    ):
+        """Загружает словари тегов и ингредиентов."""
+        self.author = author
+        self.batch_size = batch_size
+        self.image_workers = image_workers
+        self.image_field = Recipe._meta.get_field("image")
+
+        self.tags = {}
+        for pk, name, slug in Tag.objects.values_list("pk", "name", "slug"):
+            self.tags[name.lower()] = pk
+            self.tags[slug.lower()] = pk
+
+        # Без единицы измерения ингредиент находится, только если
+        # название встречается с одной единицей
+        self.ingredients = {}
+        self.ingredients_by_name = {}
+        for pk, name, unit in Ingredient.objects.values_list(
+            "pk", "name", "measurement_unit"
+        ):
+            self.ingredients[(name.lower(), unit.lower())] = pk
+            key = name.lower()
+            self.ingredients_by_name[key] = (
+                None if key in self.ingredients_by_name else pk
+            )
+
+    def run(self, lines, progress=None):
+        """
+        Импортирует рецепты из итератора строк.
+
+        Args:
+            lines: Итератор строк (str или bytes) в формате JSON Lines
+            progress: Необязательная функция, вызываемая с отчетом
+                после каждой пачки
+
+        Returns:
+            Словарь с числом созданных рецептов, ошибками по строкам,
+            затраченным временем и скоростью импорта
+        """
+        report = {"created": 0, "errors": [], "elapsed": 0.0, "per_second": 0}
+        started = time.monotonic()
+        numbered = enumerate(lines, 1)
+
+        with ThreadPoolExecutor(max_workers=self.image_workers) as pool:
+            while True:
+                batch = list(islice(numbered, self.batch_size))
+                if not batch:
+                    break
+                self._import_batch(batch, pool, report)
+
+                report["elapsed"] = round(time.monotonic() - started, 3)
+                report["per_second"] = round(
+                    report["created"] / max(report["elapsed"], 1e-9)
+                )
+                if progress:
+                    progress(report)
+
+        return report
+
+    def _import_batch(self, batch, pool, report):
+        """Разбирает, сохраняет изображения и вставляет одну пачку."""
+        parsed = []
+        for line_number, line in batch:
+            if not line.strip():
+                continue
+            try:
+                parsed.append((line_number, self.parse_line(line)))
+            except ImportLineError as error:
+                report["errors"].append(
+                    {"line": line_number, "errors": error.args[0]}
+                )
+
+        stored = []
+        for (line_number, item), image in zip(
+            parsed, pool.map(self._store_image, [item for _, item in parsed])
+        ):
+            if isinstance(image, ImportLineError):
+                report["errors"].append(
+                    {"line": line_number, "errors": image.args[0]}
+                )
+            else:
+                item["image"], item["image_variants"] = image
+                stored.append((line_number, item))
+
+        try:
+            with transaction.atomic():
+                self._insert([item for _, item in stored])
+            report["created"] += len(stored)
+        except DatabaseError:
+            for line_number, item in stored:
+                try:
+                    with transaction.atomic():
+                        self._insert([item])
+                    report["created"] += 1
+                except DatabaseError as error:
+                    # Файл не удаляется: по ключу содержимого на него
+                    # могут ссылаться другие рецепты
+                    report["errors"].append(
+                        {"line": line_number, "errors": [str(error)]}
+                    )
+
+    def parse_line(self, line):
+        """
+        Проверяет строку и заменяет названия тегов и ингредиентов на ID.
+
+        Raises:
+            ImportLineError: Со списком ошибок строки
+        """
+        try:
+            data = json.loads(line)
+        except ValueError:
+            raise ImportLineError(["Строка не является корректным JSON."])
+        if not isinstance(data, dict):
+            raise ImportLineError(["Строка должна содержать JSON-объект."])
+
+        errors = []
+        name = data.get("name")
+        if not isinstance(name, str) or not name.strip():
+            errors.append("Название рецепта обязательно.")
+        elif len(name) > MAX_RECIPE_NAME_LENGTH:
+            errors.append(
+                "Название рецепта не может быть длиннее "
+                f"{MAX_RECIPE_NAME_LENGTH} символов."
+            )
+
+        text = data.get("text")
+        if not isinstance(text, str) or not text.strip():
+            errors.append("Описание рецепта обязательно.")
+        elif len(text) > MAX_RECIPE_TEXT_LENGTH:
+            errors.append(
+                "Описание рецепта не может быть длиннее "
+                f"{MAX_RECIPE_TEXT_LENGTH} символов."
+            )
+
+        cooking_time = data.get("cooking_time")
+        # bool - подкласс int, но true не должно превращаться в 1 минуту
+        if (
+            not isinstance(cooking_time, int)
+            or isinstance(cooking_time, bool)
+            or not MIN_COOKING_TIME <= cooking_time <= MAX_COOKING_TIME
+        ):
+            errors.append(
+                "Время приготовления должно быть целым числом от "
+                f"{MIN_COOKING_TIME} до {MAX_COOKING_TIME}."
+            )
+
+        tag_ids = self._resolve_tags(data.get("tags"), errors)
+        ingredients = self._resolve_ingredients(
+            data.get("ingredients"), errors
+        )
+
+        image = data.get("image")
+        if image is not None and not isinstance(image, str):
+            errors.append("Изображение должно быть строкой base64.")
+
+        if errors:
+            raise ImportLineError(errors)
+
+        return {
+            "name": name,
+            "text": text,
+            "cooking_time": cooking_time,
+            "tags": tag_ids,
+            "ingredients": ingredients,
+            "image": image,
+        }
+
+    def _resolve_tags(self, tags, errors):
+        """Находит ID тегов по названиям или slug."""
+        if not isinstance(tags, list) or not tags:
+            errors.append("Необходимо выбрать хотя бы один тег.")
+            return []
+
+        tag_ids = []
+        for tag in tags:
+            tag_id = self.tags.get(str(tag).lower())
+            if tag_id is None:
+                errors.append(f"Тег «{tag}» не существует.")
+            elif tag_id in tag_ids:
+                errors.append("Теги не должны повторяться.")
+            else:
+                tag_ids.append(tag_id)
+        return tag_ids
+
+    def _resolve_ingredients(self, ingredients, errors):
+        """Находит ID ингредиентов по названию и единице измерения."""
+        if not isinstance(ingredients, list) or not ingredients:
+            errors.append("Необходимо добавить хотя бы один ингредиент.")
+            return {}
+
+        resolved = {}
+        for item in ingredients:
+            if not isinstance(item, dict):
+                errors.append("Ингредиент должен быть JSON-объектом.")
+                continue
+            name = str(item.get("name", "")).lower()
+            unit = item.get("measurement_unit")
+            if unit is None:
+                ingredient_id = self.ingredients_by_name.get(name)
+            else:
+                ingredient_id = self.ingredients.get((name, str(unit).lower()))
+
+            amount = item.get("amount")
+            if ingredient_id is None:
+                errors.append(
+                    f"Ингредиент «{item.get('name')}» не найден"
+                    + ("." if unit else " или требует единицу измерения.")
+                )
+            elif ingredient_id in resolved:
+                errors.append("Ингредиенты не должны повторяться.")
+            elif (
+                not isinstance(amount, int)
+                or isinstance(amount, bool)
+                or not MIN_INGREDIENT_AMOUNT <= amount <= MAX_INGREDIENT_AMOUNT
+            ):
+                errors.append(
+                    f"Количество ингредиента «{item.get('name')}» должно "
+                    f"быть целым числом от {MIN_INGREDIENT_AMOUNT} до "
+                    f"{MAX_INGREDIENT_AMOUNT}."
+                )
+            else:
+                resolved[ingredient_id] = amount
+        return resolved
+
+    def _store_image(self, item):
+        """
+        Декодирует изображение и сохраняет его в хранилище.
+
+        Выполняется в пуле потоков, к базе данных не обращается. Варианты
+        и превью создаются здесь же, а не в Recipe.save(), который
+        bulk_create не вызывает.
+
+        Returns:
+            Кортеж из имени сохраненного файла и значения image_variants
+            (пустые, если изображения нет) или ImportLineError, если
+            изображение некорректно или хранилище недоступно
+        """
+        if not item["image"]:
+            return "", {}
+        try:
+            image = Base64ImageField().run_validation(item["image"])
+        except (DjangoValidationError, serializers.ValidationError) as error:
+            messages = getattr(error, "messages", None) or error.detail
+            return ImportLineError(
+                [f"Изображение: {message}" for message in messages]
+            )
+        name = self.image_field.generate_filename(None, image.name)
+        try:
+            name = self.image_field.storage.save(name, image)
+            field_file = self.image_field.attr_class(
+                None, self.image_field, name
+            )
+            return name, build_variants(field_file)
+        except (OSError, ClientError) as error:
+            return ImportLineError(
+                [f"Изображение: не удалось сохранить файл ({error})."]
+            )
+
+    def _insert(self, items):
+        """Вставляет рецепты пачки и их связи."""
+        recipes = [
+            Recipe(
+                author=self.author,
+                name=item["name"],
+                text=item["text"],
+                cooking_time=item["cooking_time"],
+                image=item["image"],
+                image_variants=item["image_variants"],
+            )
+            for item in items
+        ]
+        if connection.features.can_return_rows_from_bulk_insert:
+            Recipe.objects.bulk_create(recipes)
+        else:
+            # Без RETURNING bulk_create не заполняет pk рецептов
+            for recipe in recipes:
+                recipe.save(force_insert=True)
+
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(
+                recipe=recipe, ingredient_id=ingredient_id, amount=amount
+            )
+            for recipe, item in zip(recipes, items)
+            for ingredient_id, amount in item["ingredients"].items()
+        )
+        Recipe.tags.through.objects.bulk_create(
+            Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag_id)
+            for recipe, item in zip(recipes, items)
+            for tag_id in item["tags"]
+        )
+        index_new_recipes(
+            {
+                recipe.pk: list(item["ingredients"])
+                for recipe, item in zip(recipes, items)
+            }
+        )
@@ -0,0 +1,33 @@
+"""Management команда для создания превью изображений рецептов."""
+from django.core.management.base import BaseCommand
+
+from apps.recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    """Команда для создания превью изображений, загруженных ранее."""
+
+    help = (
+        "Создает встроенные превью для изображений рецептов, "
+        "обработанных до появления превью"
+    )
+
+    def handle(self, *args, **options):
+        """Основная логика команды."""
+        recipes = (
+            Recipe.objects.exclude(image="")
+            .exclude(image_variants__has_key="preview")
+            .order_by("pk")
+        )
+        created = failed = 0
+        for recipe in recipes.iterator():
+            if recipe.refresh_image_preview():
+                created += 1
+            else:
+                failed += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Создано превью: {created}, с ошибками: {failed}"
+            )
+        )
@@ -0,0 +1,35 @@
+"""Management команда для построения индекса MinHash LSH."""
+from itertools import groupby
+
+from django.core.management.base import BaseCommand
+
+from apps.recipes.minhash import index_recipe
+from apps.recipes.models import IngredientInRecipe
+
+
+class Command(BaseCommand):
+    """Команда для пересчета сигнатур ингредиентов всех рецептов."""
+
+    help = (
+        "Считает MinHash-сигнатуры и корзины LSH по ингредиентам "
+        "для всех рецептов"
+    )
+
+    def handle(self, *args, **options):
+        """Основная логика команды."""
+        rows = (
+            IngredientInRecipe.objects.order_by("recipe_id")
+            .values_list("recipe_id", "ingredient_id")
+            .iterator()
+        )
+
+        indexed = 0
+        for recipe_id, group in groupby(rows, key=lambda row: row[0]):
+            index_recipe(
+                recipe_id, [ingredient_id for _, ingredient_id in group]
+            )
+            indexed += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Проиндексировано рецептов: {indexed}")
+        )
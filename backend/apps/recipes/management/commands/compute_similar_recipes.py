@@ -0,0 +1,41 @@
+"""Management команда для расчета похожих рецептов по избранному."""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.recipes.recommendations import rebuild_similarities
+from foodgram.constants import SIMILARITY_CHUNK_SIZE, SIMILAR_RECIPES_TOP_K
+
+
+class Command(BaseCommand):
+    """Команда для пересчета таблицы похожих рецептов."""
+
+    help = (
+        "Считает косинусное сходство рецептов по совместному добавлению "
+        "в избранное и сохраняет top-K похожих для каждого рецепта"
+    )
+
+    def add_arguments(self, parser):
+        """Добавляет аргументы командной строки."""
+        parser.add_argument(
+            "--top-k",
+            type=int,
+            default=SIMILAR_RECIPES_TOP_K,
+            help="Сколько похожих рецептов хранить для каждого",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=SIMILARITY_CHUNK_SIZE,
+            help="Сколько рецептов обрабатывать за одно умножение матриц",
+        )
+
+    def handle(self, *args, **options):
+        """Основная логика команды."""
+        if options["top_k"] < 1 or options["chunk_size"] < 1:
+            raise CommandError("--top-k и --chunk-size должны быть больше 0")
+
+        saved = rebuild_similarities(
+            top_k=options["top_k"], chunk_size=options["chunk_size"]
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Сохранено пар похожих рецептов: {saved}")
+        )
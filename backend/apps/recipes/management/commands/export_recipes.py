@@ -0,0 +1,78 @@
+"""Management команда для потоковой выгрузки рецептов в JSON Lines."""
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.recipes.exporter import export_recipes, parse_since
+from foodgram.constants import EXPORT_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    """Команда для выгрузки всего каталога рецептов."""
+
+    help = (
+        "Выгружает рецепты с ингредиентами и тегами в JSON Lines, "
+        "читая базу серверным курсором"
+    )
+
+    def add_arguments(self, parser):
+        """Добавляет аргументы командной строки."""
+        parser.add_argument(
+            "--output",
+            type=str,
+            default="-",
+            help="Путь к файлу или - для вывода в stdout",
+        )
+        parser.add_argument(
+            "--since",
+            type=str,
+            help="Выгрузить только рецепты, созданные начиная с даты",
+        )
+        parser.add_argument(
+            "--gzip",
+            action="store_true",
+            help="Сжимать вывод в gzip",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help="Сколько рецептов читать из курсора за раз",
+        )
+
+    def handle(self, *args, **options):
+        """Основная логика команды."""
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size должен быть больше 0")
+
+        since = None
+        if options["since"]:
+            try:
+                since = parse_since(options["since"])
+            except ValueError as error:
+                raise CommandError(str(error))
+
+        stream = export_recipes(
+            since=since,
+            compress=options["gzip"],
+            chunk_size=options["chunk_size"],
+        )
+        if options["output"] == "-":
+            self.write_stream(stream, sys.stdout.buffer)
+            return
+
+        with open(options["output"], "wb") as output:
+            written = self.write_stream(stream, output)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Выгружено в {options['output']}: {written} байт"
+            )
+        )
+
+    def write_stream(self, stream, output):
+        """Записывает поток байтов и возвращает его размер."""
+        written = 0
+        for chunk in stream:
+            output.write(chunk)
+            written += len(chunk)
+        return written
@@ -0,0 +1,68 @@
+"""Management команда для удаления неиспользуемых медиа-файлов."""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.recipes.media_gc import collect_garbage, supports_media_gc
+from foodgram.constants import MEDIA_GC_CHUNK_SIZE, MEDIA_GC_GRACE_HOURS
+from foodgram.s3 import s3_metrics
+
+
+class Command(BaseCommand):
+    """Команда для удаления файлов, на которые не ссылается база."""
+
+    help = (
+        "Удаляет из MinIO изображения рецептов и аватары, на которые "
+        "не ссылается ни одна запись"
+    )
+
+    def add_arguments(self, parser):
+        """Добавляет аргументы командной строки."""
+        parser.add_argument(
+            "--grace-hours",
+            type=int,
+            default=MEDIA_GC_GRACE_HOURS,
+            help="Не удалять файлы моложе указанного числа часов",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=MEDIA_GC_CHUNK_SIZE,
+            help="Размер пачки чтения ссылок и удаления файлов",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только вывести найденные файлы, ничего не удаляя",
+        )
+
+    def handle(self, *args, **options):
+        """Основная логика команды."""
+        if not supports_media_gc():
+            raise CommandError("Хранилище не поддерживает сборку мусора")
+
+        result = collect_garbage(
+            grace=timedelta(hours=options["grace_hours"]),
+            dry_run=options["dry_run"],
+            chunk_size=options["chunk_size"],
+        )
+
+        if options["verbosity"] >= 2:
+            for line in s3_metrics.report():
+                self.stdout.write(line)
+        if options["dry_run"]:
+            for name in result["orphans"]:
+                self.stdout.write(name)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Просмотрено файлов: {result['scanned']}, "
+                    f"к удалению: {result['found']}"
+                )
+            )
+            return
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Просмотрено файлов: {result['scanned']}, "
+                f"удалено: {result['deleted']}"
+            )
+        )
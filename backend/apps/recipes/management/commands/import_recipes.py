@@ -0,0 +1,88 @@
+"""Management команда для массового импорта рецептов из JSON Lines."""
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.recipes.importer import RecipeImporter
+from foodgram.constants import IMPORT_BATCH_SIZE, IMPORT_IMAGE_WORKERS
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """Команда для импорта каталога рецептов партнера."""
+
+    help = (
+        "Импортирует рецепты из файла JSON Lines пачками через "
+        "bulk_create и выводит скорость импорта и ошибки по строкам"
+    )
+
+    def add_arguments(self, parser):
+        """Добавляет аргументы командной строки."""
+        parser.add_argument(
+            "file",
+            type=str,
+            help="Путь к файлу JSON Lines или - для чтения из stdin",
+        )
+        parser.add_argument(
+            "--author",
+            type=str,
+            required=True,
+            help="Username автора импортируемых рецептов",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help="Сколько рецептов вставлять за одну транзакцию",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=IMPORT_IMAGE_WORKERS,
+            help="Сколько потоков обрабатывают изображения",
+        )
+
+    def handle(self, *args, **options):
+        """Основная логика команды."""
+        if options["batch_size"] < 1 or options["workers"] < 1:
+            raise CommandError("--batch-size и --workers должны быть больше 0")
+
+        try:
+            author = User.objects.get(username=options["author"])
+        except User.DoesNotExist:
+            raise CommandError(f"Пользователь не найден: {options['author']}")
+
+        importer = RecipeImporter(
+            author,
+            batch_size=options["batch_size"],
+            image_workers=options["workers"],
+        )
+        if options["file"] == "-":
+            report = importer.run(sys.stdin, progress=self.report_progress)
+        else:
+            try:
+                with open(options["file"], "rb") as lines:
+                    report = importer.run(lines, progress=self.report_progress)
+            except FileNotFoundError:
+                raise CommandError(f"Файл не найден: {options['file']}")
+
+        for error in report["errors"]:
+            self.stderr.write(
+                f"Строка {error['line']}: {'; '.join(error['errors'])}"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Импортировано рецептов: {report['created']} за "
+                f"{report['elapsed']} с ({report['per_second']} в секунду), "
+                f"строк с ошибками: {len(report['errors'])}"
+            )
+        )
+
+    def report_progress(self, report):
+        """Выводит прогресс после каждой пачки."""
+        self.stdout.write(
+            f"Импортировано {report['created']} рецептов, "
+            f"{report['per_second']} в секунду..."
+        )
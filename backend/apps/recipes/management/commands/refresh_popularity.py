@@ -0,0 +1,28 @@
+"""Management команда для пересчета популярности рецептов."""
+from django.core.management.base import BaseCommand
+
+from apps.recipes.popularity import refresh_popularity
+
+
+class Command(BaseCommand):
+    """Команда для обновления таблицы популярности рецептов."""
+
+    help = (
+        "Учитывает избранное и списки покупок, добавленные с прошлого "
+        "запуска, в популярности рецептов"
+    )
+
+    def add_arguments(self, parser):
+        """Добавляет аргументы командной строки."""
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Пересчитать популярность с нуля",
+        )
+
+    def handle(self, *args, **options):
+        """Основная логика команды."""
+        updated = refresh_popularity(rebuild=options["rebuild"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Обновлена популярность рецептов: {updated}")
+        )
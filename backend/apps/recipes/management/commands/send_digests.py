@@ -0,0 +1,18 @@
+"""Management команда для рассылки ежедневных сводок уведомлений."""
+from django.core.management.base import BaseCommand
+
+from apps.recipes.tasks import send_digests_task
+
+
+class Command(BaseCommand):
+    """Команда для рассылки сводок новых рецептов."""
+
+    help = (
+        "Отправляет пользователям с режимом сводки одно письмо "
+        "со всеми накопленными уведомлениями"
+    )
+
+    def handle(self, *args, **options):
+        """Основная логика команды."""
+        sent = send_digests_task()
+        self.stdout.write(self.style.SUCCESS(f"Отправлено сводок: {sent}"))
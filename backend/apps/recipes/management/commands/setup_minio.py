@@ -6,9 +6,10 @@ import json
 from django.conf import settings
 from django.core.management.base import BaseCommand
 
-import boto3
 from botocore.exceptions import ClientError
 
+from foodgram.s3 import get_s3_client
+
 
 class Command(BaseCommand):
     """Команда для настройки MinIO и создания bucket."""
@@ -19,14 +20,8 @@ class Command(BaseCommand):
         """Основная логика команды."""
         self.stdout.write("🔧 Настройка MinIO...")
 
-        # Создаем S3 клиент для MinIO
-        s3_client = boto3.client(
-            "s3",
-            endpoint_url=settings.AWS_S3_ENDPOINT_URL,
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name="us-east-1",  # MinIO требует region
-        )
+        # Общий с хранилищем S3 клиент для MinIO
+        s3_client = get_s3_client()
 
         bucket_name = settings.AWS_STORAGE_BUCKET_NAME
 
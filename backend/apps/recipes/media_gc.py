@@ -0,0 +1,156 @@
+"""Удаление файлов медиа-хранилища, на которые не ссылается ни одна запись.
+
+Изображения рецептов и аватары хранятся под ключами содержимого и могут
+быть общими, поэтому при замене или удалении записи файл не удаляется.
+Сборщик мусора перебирает листинг бакета постранично и удаляет файлы,
+которых нет среди ссылок из базы: оригиналов, вариантов и ожидающих
+обработки прямых загрузок. Ссылки читаются курсором пачками и хранятся
+в памяти множеством строк. Файлы моложе льготного периода не трогаются:
+они могут принадлежать записи, транзакция которой еще не завершена.
+
+Новая запись может сослаться на старый файл без загрузки: при совпадении
+содержимого хранилище только обновляет время изменения файла (touch).
+Если это случилось после снимка ссылок и листинга, время из листинга уже
+устарело, поэтому перед удалением каждой пачки время изменения файлов
+перечитывается, и обновленные файлы пропускаются. Листинг идет в порядке
+ключей, поэтому пачка перечитывается повторным листингом от ее первого
+до последнего файла: запросов не больше, чем страниц по 1000 ключей в
+этом диапазоне, а не по запросу HEAD на каждый файл.
+"""
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from foodgram.constants import MEDIA_GC_CHUNK_SIZE, MEDIA_GC_GRACE_HOURS
+
+from .models import Recipe, StagedRecipeImage
+
+User = get_user_model()
+
+
+def supports_media_gc(storage=default_storage):
+    """Умеет ли хранилище перечислять и пакетно удалять файлы."""
+    return all(
+        hasattr(storage, method) for method in ("list_objects", "delete_many")
+    )
+
+
+def iter_variant_names(image_variants):
+    """Имена файлов вариантов изображения."""
+    for size in image_variants.get("sizes", []):
+        yield size["file"]
+        yield size["webp"]
+
+
+def collect_referenced_names(chunk_size=MEDIA_GC_CHUNK_SIZE):
+    """
+    Собирает имена всех файлов, на которые ссылается база.
+
+    Args:
+        chunk_size: Сколько строк читать из курсора за раз
+
+    Returns:
+        Множество имен файлов в хранилище
+    """
+    referenced = set()
+    for model, field in ((Recipe, "image"), (User, "avatar")):
+        rows = (
+            model.objects.exclude(**{field: ""})
+            .values_list(field, "image_variants")
+            .iterator(chunk_size=chunk_size)
+        )
+        for name, image_variants in rows:
+            referenced.add(name)
+            referenced.update(iter_variant_names(image_variants))
+
+    referenced.update(
+        StagedRecipeImage.objects.exclude(key="")
+        .values_list("key", flat=True)
+        .iterator(chunk_size=chunk_size)
+    )
+    return referenced
+
+
+def expired(storage, names, cutoff, start_after=""):
+    """
+    Файлы пачки, которые не обновлялись после cutoff, по свежему листингу.
+
+    Args:
+        storage: Хранилище с методом list_objects
+        names: Имена файлов пачки в порядке листинга
+        cutoff: Граница времени изменения
+        start_after: Имя, после которого в листинге идет первый файл пачки
+
+    Returns:
+        Список имен; файлы, удаленные с момента листинга, пропускаются
+    """
+    pending = set(names)
+    last = names[-1]
+    result = []
+    for name, modified in storage.list_objects(start_after=start_after):
+        if name > last:
+            break
+        if name in pending and modified <= cutoff:
+            result.append(name)
+    return result
+
+
+def collect_garbage(
+    grace=timedelta(hours=MEDIA_GC_GRACE_HOURS),
+    dry_run=False,
+    chunk_size=MEDIA_GC_CHUNK_SIZE,
+    storage=default_storage,
+):
+    """
+    Удаляет файлы, на которые не ссылается ни одна запись.
+
+    Args:
+        grace: Файлы, измененные позже now - grace, не удаляются
+        dry_run: Только найти файлы, ничего не удаляя
+        chunk_size: Размер пачки чтения ссылок и удаления файлов
+        storage: Хранилище с методами list_objects и delete_many
+
+    Returns:
+        Словарь с количеством просмотренных scanned, найденных found и
+        удаленных deleted файлов и списком найденных orphans (только
+        при dry_run, чтобы не держать в памяти весь мусор)
+    """
+    # Ссылки читаются до листинга: файл, загруженный или обновленный
+    # после этого момента, моложе льготного периода и не будет удален
+    referenced = collect_referenced_names(chunk_size)
+    cutoff = timezone.now() - grace
+
+    orphans, batch = [], []
+    scanned = found = deleted = 0
+    previous = start_after = ""
+    for name, modified in storage.list_objects():
+        scanned += 1
+        if name in referenced or modified > cutoff:
+            previous = name
+            continue
+        found += 1
+        if dry_run:
+            orphans.append(name)
+        else:
+            if not batch:
+                start_after = previous
+            batch.append(name)
+        previous = name
+        if len(batch) >= chunk_size:
+            deleted += storage.delete_many(
+                expired(storage, batch, cutoff, start_after)
+            )
+            batch = []
+    if batch:
+        deleted += storage.delete_many(
+            expired(storage, batch, cutoff, start_after)
+        )
+
+    return {
+        "scanned": scanned,
+        "found": found,
+        "deleted": deleted,
+        "orphans": orphans,
+    }
@@ -0,0 +1,22 @@
+# Generated by Django 3.2.16 on 2026-10-19 10:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0005_auto_20250630_0709"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["author", "-created"], name="recipe_author_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(fields=["-created"], name="recipe_created_idx"),
+        ),
+    ]
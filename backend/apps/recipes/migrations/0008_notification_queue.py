@@ -0,0 +1,67 @@
+# Generated by Django 3.2.16 on 2026-10-19 10:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("recipes", "0007_feed_entry"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NotificationQueue",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="Дата создания записи",
+                        verbose_name="Дата создания",
+                    ),
+                ),
+                (
+                    "recipe",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="notification_queue",
+                        to="recipes.recipe",
+                        verbose_name="Рецепт",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="notification_queue",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Получатель",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Уведомление в очереди",
+                "verbose_name_plural": "Очередь уведомлений",
+                "ordering": ["created"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="notificationqueue",
+            constraint=models.UniqueConstraint(
+                fields=("user", "recipe"),
+                name="unique_user_notification_recipe",
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.16 on 2026-10-19 10:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0008_notification_queue"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="favorite",
+            index=models.Index(
+                fields=["user", "-created", "-id"],
+                name="favorite_user_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="shoppingcart",
+            index=models.Index(
+                fields=["user", "-created", "-id"],
+                name="shoppingcart_user_created_idx",
+            ),
+        ),
+    ]
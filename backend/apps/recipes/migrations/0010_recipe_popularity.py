@@ -0,0 +1,54 @@
+# Generated by Django 3.2.16 on 2026-10-19 10:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0009_user_action_created_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecipePopularity",
+            fields=[
+                (
+                    "recipe",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="popularity",
+                        serialize=False,
+                        to="recipes.recipe",
+                        verbose_name="Рецепт",
+                    ),
+                ),
+                (
+                    "score",
+                    models.FloatField(
+                        default=0,
+                        help_text="Сумма весов действий с экспоненциальным затуханием",
+                        verbose_name="Популярность",
+                    ),
+                ),
+                (
+                    "refreshed_at",
+                    models.DateTimeField(
+                        help_text="Действия до этого момента учтены в score",
+                        verbose_name="Пересчитано по",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Популярность рецепта",
+                "verbose_name_plural": "Популярность рецептов",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="recipepopularity",
+            index=models.Index(
+                fields=["-score", "-recipe"], name="recipe_popularity_idx"
+            ),
+        ),
+    ]
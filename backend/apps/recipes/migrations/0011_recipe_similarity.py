@@ -0,0 +1,69 @@
+# Generated by Django 3.2.16 on 2026-10-19 10:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0010_recipe_popularity"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecipeSimilarity",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "score",
+                    models.FloatField(
+                        help_text="Косинусное сходство по избранному",
+                        verbose_name="Сходство",
+                    ),
+                ),
+                (
+                    "recipe",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="similarities",
+                        to="recipes.recipe",
+                        verbose_name="Рецепт",
+                    ),
+                ),
+                (
+                    "similar_recipe",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="similar_for",
+                        to="recipes.recipe",
+                        verbose_name="Похожий рецепт",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Похожий рецепт",
+                "verbose_name_plural": "Похожие рецепты",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="recipesimilarity",
+            index=models.Index(
+                fields=["recipe", "-score"], name="recipe_similarity_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="recipesimilarity",
+            constraint=models.UniqueConstraint(
+                fields=("recipe", "similar_recipe"),
+                name="unique_recipe_similarity",
+            ),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 3.2.16 on 2026-10-19 10:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0011_recipe_similarity"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RecipeMinHash",
+            fields=[
+                (
+                    "recipe",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="minhash",
+                        serialize=False,
+                        to="recipes.recipe",
+                        verbose_name="Рецепт",
+                    ),
+                ),
+                (
+                    "signature",
+                    models.BinaryField(
+                        help_text="Минимальные хеши ингредиентов (uint32)",
+                        verbose_name="Сигнатура",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "MinHash рецепта",
+                "verbose_name_plural": "MinHash рецептов",
+            },
+        ),
+        migrations.CreateModel(
+            name="RecipeLSHBucket",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "key",
+                    models.BigIntegerField(
+                        db_index=True,
+                        help_text="Хеш номера и полосы",
+                        verbose_name="Ключ корзины",
+                    ),
+                ),
+                (
+                    "recipe",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="lsh_buckets",
+                        to="recipes.recipe",
+                        verbose_name="Рецепт",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Корзина LSH",
+                "verbose_name_plural": "Корзины LSH",
+            },
+        ),
+    ]
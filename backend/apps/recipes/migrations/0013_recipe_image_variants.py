@@ -0,0 +1,23 @@
+# Generated by Django 3.2.16 on 2026-10-19 10:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0012_recipe_minhash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="image_variants",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                editable=False,
+                help_text="Уменьшенные копии и WebP-версии изображения",
+                verbose_name="Варианты изображения",
+            ),
+        ),
+    ]
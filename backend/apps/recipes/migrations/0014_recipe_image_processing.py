@@ -0,0 +1,70 @@
+# Generated by Django 3.2.16 on 2026-10-19 10:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0013_recipe_image_variants"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StagedRecipeImage",
+            fields=[
+                (
+                    "created",
+                    models.DateTimeField(
+                        auto_now_add=True,
+                        help_text="Дата создания записи",
+                        verbose_name="Дата создания",
+                    ),
+                ),
+                (
+                    "recipe",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="staged_image",
+                        serialize=False,
+                        to="recipes.recipe",
+                        verbose_name="Рецепт",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(max_length=256, verbose_name="Имя файла"),
+                ),
+                (
+                    "key",
+                    models.CharField(
+                        help_text=(
+                            "Файл в хранилище, ожидающий проверки и переноса"
+                        ),
+                        max_length=256,
+                        verbose_name="Ключ загрузки",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Изображение в обработке",
+                "verbose_name_plural": "Изображения в обработке",
+            },
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="image_status",
+            field=models.CharField(
+                choices=[
+                    ("processing", "Обрабатывается"),
+                    ("ready", "Готово"),
+                    ("failed", "Ошибка"),
+                ],
+                default="ready",
+                help_text="Состояние фоновой обработки изображения",
+                max_length=16,
+                verbose_name="Состояние изображения",
+            ),
+        ),
+    ]
@@ -0,0 +1,137 @@
+"""Поиск рецептов с похожим набором ингредиентов через MinHash LSH.
+
+Для каждого рецепта хранится MinHash-сигнатура множества ID его
+ингредиентов. Сигнатура делится на MINHASH_BANDS полос, хеш каждой
+полосы — ключ корзины LSH. Кандидаты в похожие — рецепты, у которых
+совпала хотя бы одна корзина, поэтому поиск идет по индексу ключа и
+сравнивает сигнатуры только рецептов с заметно пересекающимися
+ингредиентами, а не всего каталога.
+"""
+import hashlib
+
+from django.db import transaction
+
+import numpy as np
+
+from foodgram.constants import (
+    MINHASH_BANDS,
+    MINHASH_NUM_PERM,
+    MINHASH_SEED,
+    SIMILAR_INGREDIENTS_LIMIT,
+)
+
+from .models import Recipe, RecipeLSHBucket, RecipeMinHash
+
+# Хеш-функции вида (a * x + b) mod p, p - простое число Мерсенна 2^31 - 1
+PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(MINHASH_SEED)
+_A = _rng.integers(1, PRIME, size=MINHASH_NUM_PERM, dtype=np.int64)
+_B = _rng.integers(0, PRIME, size=MINHASH_NUM_PERM, dtype=np.int64)
+ROWS_PER_BAND = MINHASH_NUM_PERM // MINHASH_BANDS
+
+
+def compute_signature(ingredient_ids):
+    """
+    Считает MinHash-сигнатуру множества ID ингредиентов.
+
+    Args:
+        ingredient_ids: ID ингредиентов рецепта
+
+    Returns:
+        Массив uint32 длины MINHASH_NUM_PERM
+    """
+    ids = np.fromiter(set(ingredient_ids), dtype=np.int64) % PRIME
+    if not len(ids):
+        return np.full(MINHASH_NUM_PERM, PRIME, dtype=np.uint32)
+    hashes = (np.outer(_A, ids) + _B[:, None]) % PRIME
+    return hashes.min(axis=1).astype(np.uint32)
+
+
+def band_keys(signature):
+    """Ключи корзин LSH для каждой полосы сигнатуры."""
+    keys = []
+    for band in range(MINHASH_BANDS):
+        rows = signature[band * ROWS_PER_BAND : (band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(
+            band.to_bytes(2, "big") + rows.tobytes(), digest_size=8
+        ).digest()
+        keys.append(int.from_bytes(digest, "big", signed=True))
+    return keys
+
+
+def index_recipe(recipe_id, ingredient_ids):
+    """
+    Обновляет сигнатуру и корзины LSH рецепта.
+
+    Args:
+        recipe_id: ID рецепта
+        ingredient_ids: ID ингредиентов рецепта
+    """
+    signature = compute_signature(ingredient_ids)
+    with transaction.atomic():
+        RecipeMinHash.objects.update_or_create(
+            recipe_id=recipe_id,
+            defaults={"signature": signature.tobytes()},
+        )
+        RecipeLSHBucket.objects.filter(recipe_id=recipe_id).delete()
+        RecipeLSHBucket.objects.bulk_create(
+            RecipeLSHBucket(recipe_id=recipe_id, key=key)
+            for key in set(band_keys(signature))
+        )
+
+
+def index_new_recipes(ingredients_by_recipe):
+    """
+    Индексирует пачку новых рецептов двумя bulk-вставками.
+
+    Args:
+        ingredients_by_recipe: Словарь {ID рецепта: ID ингредиентов}
+    """
+    signatures = {
+        recipe_id: compute_signature(ingredient_ids)
+        for recipe_id, ingredient_ids in ingredients_by_recipe.items()
+    }
+    RecipeMinHash.objects.bulk_create(
+        RecipeMinHash(recipe_id=recipe_id, signature=signature.tobytes())
+        for recipe_id, signature in signatures.items()
+    )
+    RecipeLSHBucket.objects.bulk_create(
+        RecipeLSHBucket(recipe_id=recipe_id, key=key)
+        for recipe_id, signature in signatures.items()
+        for key in set(band_keys(signature))
+    )
+
+
+def similar_by_ingredients(recipe_id, limit=SIMILAR_INGREDIENTS_LIMIT):
+    """
+    Находит рецепты с наибольшим оценочным сходством Жаккара.
+
+    Args:
+        recipe_id: ID рецепта
+        limit: Сколько рецептов вернуть
+
+    Returns:
+        Список пар (рецепт, оценка сходства) по убыванию сходства
+    """
+    own = RecipeMinHash.objects.filter(recipe_id=recipe_id).first()
+    if own is None:
+        return []
+    signature = np.frombuffer(own.signature, dtype=np.uint32)
+
+    candidates = (
+        RecipeMinHash.objects.filter(
+            recipe__lsh_buckets__key__in=RecipeLSHBucket.objects.filter(
+                recipe_id=recipe_id
+            ).values("key")
+        )
+        .exclude(recipe_id=recipe_id)
+        .distinct()
+    )
+    scored = []
+    for item in candidates:
+        other = np.frombuffer(item.signature, dtype=np.uint32)
+        scored.append((float(np.mean(other == signature)), item.recipe_id))
+    scored = sorted(scored, reverse=True)[:limit]
+
+    recipes = Recipe.objects.in_bulk([pk for _, pk in scored])
+    return [(recipes[pk], score) for score, pk in scored if pk in recipes]
@@ -3,8 +3,11 @@ from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
+from foodgram.images import ImageVariantsModel
+
 from .constants import (
     MAX_COOKING_TIME,
+    MAX_IMAGE_STATUS_LENGTH,
     MAX_INGREDIENT_AMOUNT,
     MAX_INGREDIENT_NAME_LENGTH,
     MAX_INGREDIENT_UNIT_LENGTH,
@@ -136,9 +139,16 @@ class Ingredient(models.Model):
         return f"{self.name} ({self.measurement_unit})"
 
 
-class Recipe(models.Model):
+class Recipe(ImageVariantsModel):
     """Модель рецепта."""
 
+    class ImageStatus(models.TextChoices):
+        """Состояния обработки загруженного изображения."""
+
+        PROCESSING = "processing", "Обрабатывается"
+        READY = "ready", "Готово"
+        FAILED = "failed", "Ошибка"
+
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -194,6 +204,18 @@ class Recipe(models.Model):
     created = models.DateTimeField(
         "Дата создания", auto_now_add=True, help_text="Дата создания рецепта"
     )
+    image_status = models.CharField(
+        "Состояние изображения",
+        max_length=MAX_IMAGE_STATUS_LENGTH,
+        choices=ImageStatus.choices,
+        default=ImageStatus.READY,
+        help_text="Состояние фоновой обработки изображения",
+    )
+    fanned_out = models.BooleanField(
+        "Разослан по лентам",
+        default=False,
+        help_text="Рецепт добавлен в материализованные ленты подписчиков",
+    )
 
     class Meta:
         """Метаданные модели Recipe."""
@@ -201,6 +223,13 @@ class Recipe(models.Model):
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
         ordering = ["-created"]
+        indexes = [
+            models.Index(
+                fields=["author", "-created"],
+                name="recipe_author_created_idx",
+            ),
+            models.Index(fields=["-created"], name="recipe_created_idx"),
+        ]
 
     def __str__(self):
         """Строковое представление рецепта."""
@@ -278,6 +307,12 @@ class RecipeUserActionModel(UserActionModel):
                 name="unique_user_%(class)s_recipe",
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["user", "-created", "-id"],
+                name="%(class)s_user_created_idx",
+            )
+        ]
 
 
 class Favorite(RecipeUserActionModel):
@@ -306,3 +341,224 @@ class ShoppingCart(RecipeUserActionModel):
     def __str__(self):
         """Строковое представление корзины."""
         return f"{self.user.username} добавил {self.recipe.name} в корзину"
+
+
+class FeedEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+        verbose_name="Пользователь",
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+        verbose_name="Рецепт",
+    )
+
+    class Meta:
+        """Метаданные модели FeedEntry."""
+
+        verbose_name = "Запись ленты"
+        verbose_name_plural = "Записи лент"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "recipe"],
+                name="unique_user_feed_recipe",
+            )
+        ]
+
+    def __str__(self):
+        """Строковое представление записи ленты."""
+        return f"{self.recipe_id} в ленте {self.user_id}"
+
+
+class StagedRecipeImage(TimeStampedModel):
+    """Загруженное изображение рецепта, ожидающее фоновой обработки."""
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="staged_image",
+        verbose_name="Рецепт",
+    )
+    name = models.CharField("Имя файла", max_length=MAX_NAME_LENGTH)
+    key = models.CharField(
+        "Ключ загрузки",
+        max_length=MAX_NAME_LENGTH,
+        help_text="Файл в хранилище, ожидающий проверки и переноса",
+    )
+
+    class Meta:
+        """Метаданные модели StagedRecipeImage."""
+
+        verbose_name = "Изображение в обработке"
+        verbose_name_plural = "Изображения в обработке"
+
+    def __str__(self):
+        """Строковое представление изображения в обработке."""
+        return f"{self.name} для {self.recipe_id}"
+
+
+class NotificationQueue(TimeStampedModel):
+    """Отложенное уведомление о новом рецепте для ежедневной сводки."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="notification_queue",
+        verbose_name="Получатель",
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="notification_queue",
+        verbose_name="Рецепт",
+    )
+
+    class Meta:
+        """Метаданные модели NotificationQueue."""
+
+        verbose_name = "Уведомление в очереди"
+        verbose_name_plural = "Очередь уведомлений"
+        ordering = ["created"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "recipe"],
+                name="unique_user_notification_recipe",
+            )
+        ]
+
+    def __str__(self):
+        """Строковое представление уведомления."""
+        return f"{self.recipe_id} для {self.user_id}"
+
+
+class RecipePopularity(models.Model):
+    """Предрассчитанная популярность рецепта с затуханием по времени."""
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="popularity",
+        verbose_name="Рецепт",
+    )
+    score = models.FloatField(
+        "Популярность",
+        default=0,
+        help_text="Сумма весов действий с экспоненциальным затуханием",
+    )
+    refreshed_at = models.DateTimeField(
+        "Пересчитано по",
+        help_text="Действия до этого момента учтены в score",
+    )
+
+    class Meta:
+        """Метаданные модели RecipePopularity."""
+
+        verbose_name = "Популярность рецепта"
+        verbose_name_plural = "Популярность рецептов"
+        indexes = [
+            models.Index(
+                fields=["-score", "-recipe"], name="recipe_popularity_idx"
+            ),
+        ]
+
+    def __str__(self):
+        """Строковое представление популярности."""
+        return f"{self.recipe_id}: {self.score:.3f}"
+
+
+class RecipeSimilarity(models.Model):
+    """Похожий рецепт по совместному добавлению в избранное."""
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="similarities",
+        verbose_name="Рецепт",
+    )
+    similar_recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="similar_for",
+        verbose_name="Похожий рецепт",
+    )
+    score = models.FloatField(
+        "Сходство", help_text="Косинусное сходство по избранному"
+    )
+
+    class Meta:
+        """Метаданные модели RecipeSimilarity."""
+
+        verbose_name = "Похожий рецепт"
+        verbose_name_plural = "Похожие рецепты"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["recipe", "similar_recipe"],
+                name="unique_recipe_similarity",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["recipe", "-score"], name="recipe_similarity_idx"
+            ),
+        ]
+
+    def __str__(self):
+        """Строковое представление сходства."""
+        return f"{self.recipe_id} ~ {self.similar_recipe_id}: {self.score:.3f}"
+
+
+class RecipeMinHash(models.Model):
+    """MinHash-сигнатура набора ингредиентов рецепта."""
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="minhash",
+        verbose_name="Рецепт",
+    )
+    signature = models.BinaryField(
+        "Сигнатура", help_text="Минимальные хеши ингредиентов (uint32)"
+    )
+
+    class Meta:
+        """Метаданные модели RecipeMinHash."""
+
+        verbose_name = "MinHash рецепта"
+        verbose_name_plural = "MinHash рецептов"
+
+    def __str__(self):
+        """Строковое представление сигнатуры."""
+        return f"MinHash {self.recipe_id}"
+
+
+class RecipeLSHBucket(models.Model):
+    """Корзина LSH: рецепты с совпадающей полосой MinHash-сигнатуры."""
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="lsh_buckets",
+        verbose_name="Рецепт",
+    )
+    key = models.BigIntegerField(
+        "Ключ корзины", db_index=True, help_text="Хеш номера и полосы"
+    )
+
+    class Meta:
+        """Метаданные модели RecipeLSHBucket."""
+
+        verbose_name = "Корзина LSH"
+        verbose_name_plural = "Корзины LSH"
+
+    def __str__(self):
+        """Строковое представление корзины."""
+        return f"{self.recipe_id} в {self.key}"
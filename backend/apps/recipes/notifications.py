@@ -0,0 +1,55 @@
+"""Почтовые уведомления подписчиков о новых рецептах."""
+from django.conf import settings
+from django.core.mail import EmailMessage, send_mass_mail
+
+
+def send_recipe_notification(user_emails, recipe_title, connection=None):
+    """
+    Отправляет уведомление о новом рецепте подписанным пользователям.
+
+    Все письма отправляются через одно SMTP-соединение.
+
+    Args:
+        user_emails: Email получателей
+        recipe_title: Название рецепта
+        connection: Открытое соединение почтового бэкенда
+
+    Returns:
+        Количество отправленных писем
+    """
+    subject = "Новый рецепт от автора, на которого вы подписаны!"
+    message = f"Был добавлен новый рецепт: {recipe_title}"
+
+    return send_mass_mail(
+        (
+            (subject, message, settings.DEFAULT_FROM_EMAIL, [user_email])
+            for user_email in user_emails
+        ),
+        fail_silently=False,
+        connection=connection,
+    )
+
+
+def send_recipe_digest(user_email, recipe_titles, connection=None):
+    """
+    Отправляет ежедневную сводку новых рецептов одним письмом.
+
+    Args:
+        user_email: Email получателя
+        recipe_titles: Названия новых рецептов
+        connection: Открытое соединение почтового бэкенда
+
+    Returns:
+        Количество отправленных писем
+    """
+    subject = "Новые рецепты от авторов, на которых вы подписаны"
+    lines = ["За последние сутки были добавлены новые рецепты:", ""]
+    lines.extend(f"• {recipe_title}" for recipe_title in recipe_titles)
+
+    return EmailMessage(
+        subject,
+        "\n".join(lines),
+        settings.DEFAULT_FROM_EMAIL,
+        [user_email],
+        connection=connection,
+    ).send()
@@ -0,0 +1,146 @@
+"""Популярность рецептов с экспоненциальным затуханием по времени.
+
+Используется прямое затухание (forward decay): вклад действия в момент t
+равен weight * 2 ** ((t - landmark) / HALF_LIFE). Относительный порядок
+таких сумм совпадает с порядком классических затухающих сумм на любой
+момент времени, поэтому уже накопленные score не нужно пересчитывать — при
+обновлении к ним только прибавляются вклады новых действий.
+
+Вклад удваивается каждые HALF_LIFE и при постоянном опорном моменте
+переполнил бы float через sys.float_info.max_exp периодов полураспада
+(около 20 лет при периоде в неделю). Поэтому опорный момент landmark
+сдвигается от EPOCH шагами REBASE_INTERVAL: когда пересчет переходит в
+новый интервал, все score умножаются на 2 ** (-сдвиг / HALF_LIFE) одним
+UPDATE. Опорный момент не хранится отдельно, а вычисляется по времени
+последнего пересчета — максимальному refreshed_at, который при сдвиге
+обновляется у всех строк.
+
+Удаление из избранного или корзины не уменьшает score: вклад такого
+действия просто затухает со временем. Точный пересчет — rebuild=True.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from foodgram.constants import (
+    POPULARITY_BATCH_SIZE,
+    POPULARITY_EPOCH,
+    POPULARITY_FAVORITE_WEIGHT,
+    POPULARITY_HALF_LIFE_DAYS,
+    POPULARITY_REBASE_INTERVAL_DAYS,
+    POPULARITY_SHOPPING_CART_WEIGHT,
+)
+
+from .models import Favorite, Recipe, RecipePopularity, ShoppingCart
+
+EPOCH = datetime.fromisoformat(POPULARITY_EPOCH)
+HALF_LIFE = timedelta(days=POPULARITY_HALF_LIFE_DAYS)
+REBASE_INTERVAL = timedelta(days=POPULARITY_REBASE_INTERVAL_DAYS)
+
+SOURCES = (
+    (Favorite, POPULARITY_FAVORITE_WEIGHT),
+    (ShoppingCart, POPULARITY_SHOPPING_CART_WEIGHT),
+)
+
+
+def landmark_for(moment):
+    """Опорный момент, к которому приведены score на момент moment."""
+    return EPOCH + (moment - EPOCH) // REBASE_INTERVAL * REBASE_INTERVAL
+
+
+def decayed_weight(weight, moment, landmark=EPOCH):
+    """Вклад действия с весом weight, совершенного в момент moment."""
+    return weight * 2 ** ((moment - landmark) / HALF_LIFE)
+
+
+def refresh_popularity(rebuild=False, now=None):
+    """
+    Прибавляет к популярности вклады действий с прошлого пересчета.
+
+    Args:
+        rebuild: Пересчитать популярность с нуля по всем действиям
+        now: Верхняя граница учитываемых действий
+
+    Returns:
+        Количество рецептов, чья популярность изменилась
+    """
+    now = now or timezone.now()
+    landmark = landmark_for(now)
+
+    with transaction.atomic():
+        if rebuild:
+            RecipePopularity.objects.all().delete()
+            since = None
+        else:
+            since = RecipePopularity.objects.aggregate(
+                last=Max("refreshed_at")
+            )["last"]
+            if since is not None:
+                _rebase(landmark_for(since), landmark, now)
+
+        deltas = defaultdict(float)
+        for model, weight in SOURCES:
+            actions = model.objects.filter(created__lte=now)
+            if since is not None:
+                actions = actions.filter(created__gt=since)
+            for recipe_id, created in actions.values_list(
+                "recipe_id", "created"
+            ).iterator(chunk_size=POPULARITY_BATCH_SIZE):
+                deltas[recipe_id] += decayed_weight(weight, created, landmark)
+
+        _apply_deltas(deltas, now)
+        _create_missing(now)
+
+    return len(deltas)
+
+
+def _rebase(previous, landmark, now):
+    """Приводит накопленные score к новому опорному моменту."""
+    if previous == landmark:
+        return
+    factor = 2 ** ((previous - landmark) / HALF_LIFE)
+    RecipePopularity.objects.update(
+        score=F("score") * factor, refreshed_at=now
+    )
+
+
+def _apply_deltas(deltas, now):
+    """Прибавляет вклады к существующим строкам и создает новые."""
+    recipe_ids = list(deltas)
+    for start in range(0, len(recipe_ids), POPULARITY_BATCH_SIZE):
+        batch = recipe_ids[start : start + POPULARITY_BATCH_SIZE]
+        existing = RecipePopularity.objects.in_bulk(batch)
+
+        for recipe_id, popularity in existing.items():
+            popularity.score += deltas[recipe_id]
+            popularity.refreshed_at = now
+        RecipePopularity.objects.bulk_update(
+            existing.values(), ["score", "refreshed_at"]
+        )
+
+        RecipePopularity.objects.bulk_create(
+            RecipePopularity(
+                recipe_id=recipe_id,
+                score=deltas[recipe_id],
+                refreshed_at=now,
+            )
+            for recipe_id in batch
+            if recipe_id not in existing
+        )
+
+
+def _create_missing(now):
+    """Создает нулевую популярность для рецептов без нее."""
+    recipe_ids = Recipe.objects.filter(popularity__isnull=True).values_list(
+        "pk", flat=True
+    )
+    batch = []
+    for recipe_id in recipe_ids.iterator(chunk_size=POPULARITY_BATCH_SIZE):
+        batch.append(RecipePopularity(recipe_id=recipe_id, refreshed_at=now))
+        if len(batch) >= POPULARITY_BATCH_SIZE:
+            RecipePopularity.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    RecipePopularity.objects.bulk_create(batch, ignore_conflicts=True)
@@ -0,0 +1,116 @@
+"""Офлайн-рекомендации «с этим рецептом также добавляют в избранное».
+
+Избранное выгружается в разреженную матрицу пользователи × рецепты,
+столбцы нормируются, и косинусное сходство рецептов считается
+произведением матриц блоками по chunk_size рецептов. В памяти
+одновременно находятся только матрица избранного и один блок сходств.
+"""
+from itertools import chain
+
+from django.db import transaction
+
+import numpy as np
+from scipy import sparse
+
+from foodgram.constants import SIMILARITY_CHUNK_SIZE, SIMILAR_RECIPES_TOP_K
+
+from .models import Favorite, RecipeSimilarity
+
+
+def load_favorites_matrix():
+    """
+    Выгружает избранное в разреженную матрицу пользователи × рецепты.
+
+    Returns:
+        Кортеж (матрица CSR, массив ID рецептов по номерам столбцов)
+    """
+    rows = Favorite.objects.values_list("user_id", "recipe_id").iterator(
+        chunk_size=SIMILARITY_CHUNK_SIZE
+    )
+    pairs = np.fromiter(chain.from_iterable(rows), dtype=np.int64)
+    pairs = pairs.reshape(-1, 2)
+
+    user_ids, user_index = np.unique(pairs[:, 0], return_inverse=True)
+    recipe_ids, recipe_index = np.unique(pairs[:, 1], return_inverse=True)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=np.float32), (user_index, recipe_index)),
+        shape=(len(user_ids), len(recipe_ids)),
+    )
+    return matrix, recipe_ids
+
+
+def iter_top_similar(matrix, top_k, chunk_size):
+    """
+    Перебирает top_k ближайших по косинусу столбцов для каждого столбца.
+
+    Args:
+        matrix: Матрица CSR пользователи × рецепты
+        top_k: Сколько похожих рецептов оставлять
+        chunk_size: Сколько рецептов обрабатывать за одно умножение
+
+    Yields:
+        Кортежи (номер рецепта, номера похожих, значения сходства)
+    """
+    norms = np.sqrt(np.asarray(matrix.sum(axis=0)).ravel())
+    normalized = (matrix @ sparse.diags(1 / norms)).tocsr()
+    items = normalized.T.tocsr()
+
+    for start in range(0, items.shape[0], chunk_size):
+        block = (items[start : start + chunk_size] @ normalized).tocsr()
+        for offset in range(block.shape[0]):
+            row = slice(block.indptr[offset], block.indptr[offset + 1])
+            columns = block.indices[row]
+            scores = block.data[row]
+
+            keep = columns != start + offset
+            columns, scores = columns[keep], scores[keep]
+            if len(scores) > top_k:
+                top = np.argpartition(-scores, top_k)[:top_k]
+                columns, scores = columns[top], scores[top]
+
+            order = np.argsort(-scores, kind="stable")
+            yield start + offset, columns[order], scores[order]
+
+
+def rebuild_similarities(
+    top_k=SIMILAR_RECIPES_TOP_K, chunk_size=SIMILARITY_CHUNK_SIZE
+):
+    """
+    Пересчитывает таблицу похожих рецептов по избранному.
+
+    Args:
+        top_k: Сколько похожих рецептов хранить для каждого
+        chunk_size: Размер блока рецептов при умножении матриц
+
+    Returns:
+        Количество сохраненных пар
+    """
+    matrix, recipe_ids = load_favorites_matrix()
+
+    saved = 0
+    with transaction.atomic():
+        RecipeSimilarity.objects.all().delete()
+        if not len(recipe_ids):
+            return saved
+
+        batch = []
+        for index, columns, scores in iter_top_similar(
+            matrix, top_k, chunk_size
+        ):
+            recipe_id = int(recipe_ids[index])
+            batch.extend(
+                RecipeSimilarity(
+                    recipe_id=recipe_id,
+                    similar_recipe_id=int(similar_id),
+                    score=float(score),
+                )
+                for similar_id, score in zip(recipe_ids[columns], scores)
+            )
+            if len(batch) >= chunk_size:
+                RecipeSimilarity.objects.bulk_create(batch)
+                saved += len(batch)
+                batch = []
+        RecipeSimilarity.objects.bulk_create(batch)
+        saved += len(batch)
+
+    return saved
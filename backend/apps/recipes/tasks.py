@@ -0,0 +1,207 @@
+"""Celery задачи приложения recipes."""
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.core.mail import get_connection
+
+from celery import shared_task
+from celery.utils.time import get_exponential_backoff_interval
+
+from apps.users.models import Subscription
+from foodgram.constants import (
+    DIGEST_USERS_CHUNK_SIZE,
+    IMAGE_PROCESSING_MAX_RETRIES,
+    NOTIFICATION_BATCH_SIZE,
+    NOTIFICATION_MAX_RETRIES,
+    NOTIFICATION_RETRY_BACKOFF_MAX,
+)
+
+from . import feed, media_gc, popularity, uploads
+from .models import NotificationQueue, Recipe
+from .notifications import send_recipe_digest, send_recipe_notification
+
+User = get_user_model()
+
+
+@shared_task
+def fanout_recipe_task(recipe_id):
+    """Раскладывает новый рецепт по лентам подписчиков."""
+    return feed.fanout_recipe(recipe_id)
+
+
+@shared_task
+def backfill_timeline_task(user_id, author_id):
+    """Заполняет ленту рецептами автора после подписки."""
+    feed.backfill_timeline(user_id, author_id)
+
+
+@shared_task(
+    autoretry_for=(OSError,),
+    retry_backoff=True,
+    retry_jitter=True,
+    max_retries=IMAGE_PROCESSING_MAX_RETRIES,
+)
+def process_recipe_image_task(recipe_id):
+    """Загружает изображение рецепта в хранилище и создает варианты."""
+    return uploads.process_staged_image(recipe_id)
+
+
+@shared_task
+def refresh_popularity_task():
+    """Учитывает новые действия пользователей в популярности рецептов."""
+    return popularity.refresh_popularity()
+
+
+@shared_task
+def gc_media_task():
+    """Удаляет из хранилища файлы, на которые не ссылается база."""
+    if not media_gc.supports_media_gc():
+        return 0
+    return media_gc.collect_garbage()["deleted"]
+
+
+@shared_task
+def notify_subscribers_task(recipe_id):
+    """
+    Рассылает подписчикам автора уведомление о новом рецепте.
+
+    Подписчики разбиваются на пачки по NOTIFICATION_BATCH_SIZE адресов,
+    каждая пачка отправляется отдельной задачей.
+
+    Returns:
+        Количество поставленных в очередь пачек
+    """
+    recipe = (
+        Recipe.objects.filter(pk=recipe_id).only("name", "author_id").first()
+    )
+    if recipe is None:
+        return 0
+
+    subscriptions = Subscription.objects.filter(author_id=recipe.author_id)
+    _queue_digest_notifications(
+        subscriptions.filter(
+            user__notification_mode=User.NotificationMode.DIGEST
+        ),
+        recipe_id,
+    )
+
+    emails = subscriptions.filter(
+        user__notification_mode=User.NotificationMode.IMMEDIATE
+    ).values_list("user__email", flat=True)
+
+    batches = 0
+    for batch in _chunked(emails, NOTIFICATION_BATCH_SIZE):
+        send_notification_batch_task.delay(batch, recipe.name)
+        batches += 1
+
+    return batches
+
+
+@shared_task(bind=True, max_retries=NOTIFICATION_MAX_RETRIES)
+def send_notification_batch_task(self, user_emails, recipe_title):
+    """
+    Отправляет пачку уведомлений через одно SMTP-соединение.
+
+    Письма отправляются по одному. При ошибке соединения задача
+    повторяется только для адресов, которым письмо еще не ушло, поэтому
+    получатели из начала пачки не получают его повторно.
+
+    Returns:
+        Количество отправленных писем
+    """
+    sent = 0
+    try:
+        with get_connection() as connection:
+            for user_email in user_emails:
+                send_recipe_notification(
+                    [user_email], recipe_title, connection=connection
+                )
+                sent += 1
+    except OSError as error:
+        remaining = user_emails[sent:]
+        if not remaining:
+            return sent
+        raise self.retry(
+            args=(remaining, recipe_title),
+            exc=error,
+            countdown=get_exponential_backoff_interval(
+                factor=1,
+                retries=self.request.retries,
+                maximum=NOTIFICATION_RETRY_BACKOFF_MAX,
+                full_jitter=True,
+            ),
+        )
+    return sent
+
+
+@shared_task
+def send_digests_task():
+    """
+    Рассылает ежедневные сводки накопленных уведомлений.
+
+    Пользователи с непустой очередью читаются пачками через iterator(),
+    каждый получает одно письмо; все письма идут через одно соединение.
+    Записи очереди пользователя удаляются сразу после отправки его сводки.
+
+    Returns:
+        Количество отправленных сводок
+    """
+    users = (
+        User.objects.filter(notification_queue__isnull=False)
+        .distinct()
+        .order_by("pk")
+        .only("pk", "email")
+    )
+
+    sent = 0
+    with get_connection() as connection:
+        for chunk in _chunked(users, DIGEST_USERS_CHUNK_SIZE):
+            pending = defaultdict(list)
+            queue = NotificationQueue.objects.filter(
+                user__in=chunk
+            ).values_list("pk", "user_id", "recipe__name")
+            for pk, user_id, recipe_name in queue:
+                pending[user_id].append((pk, recipe_name))
+
+            for user in chunk:
+                items = pending.get(user.pk)
+                if not items:
+                    continue
+                sent += send_recipe_digest(
+                    user.email,
+                    [recipe_name for _, recipe_name in items],
+                    connection=connection,
+                )
+                # Очередь очищается сразу после письма: при сбое на
+                # следующем пользователе повторный запуск не продублирует
+                # уже отправленные сводки
+                NotificationQueue.objects.filter(
+                    pk__in=[pk for pk, _ in items]
+                ).delete()
+
+    return sent
+
+
+def _queue_digest_notifications(subscriptions, recipe_id):
+    """Ставит рецепт в очередь сводок подписчиков."""
+    user_ids = subscriptions.values_list("user_id", flat=True)
+    for batch in _chunked(user_ids, NOTIFICATION_BATCH_SIZE):
+        NotificationQueue.objects.bulk_create(
+            [
+                NotificationQueue(user_id=user_id, recipe_id=recipe_id)
+                for user_id in batch
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def _chunked(queryset, size):
+    """Читает queryset через iterator() и отдает его пачками."""
+    batch = []
+    for item in queryset.iterator(chunk_size=size):
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,195 @@
+"""Фоновая обработка и прямая загрузка изображений.
+
+Изображение из base64 декодируется в запросе во временный файл и
+потоково записывается в хранилище под служебным ключом uploads/staged/...
+без хеширования содержимого; в таблице StagedRecipeImage вместе с
+рецептом сохраняется только этот ключ. Эта запись остается в запросе:
+воркер gunicorn по-прежнему передает байты изображения в хранилище.
+Проверка Pillow, перенос под ключ содержимого и создание вариантов
+выполняются задачей Celery после фиксации транзакции.
+
+Чтобы не передавать байты через Django, клиент получает подписанный URL
+(presigned_upload), загружает файл в MinIO под ключом
+uploads/<вид>/<ID пользователя>/..., а затем передает этот ключ вместо
+base64. Проверка и перенос в постоянное хранилище выполняются так же,
+как для base64.
+"""
+import posixpath
+import uuid
+
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from botocore.exceptions import ClientError
+from PIL import Image
+
+from foodgram.constants import (
+    PRESIGNED_UPLOAD_EXPIRES,
+    UPLOAD_CONTENT_TYPES,
+    UPLOAD_KEY_PREFIX,
+)
+from foodgram.storage import is_missing_object
+
+from .models import Recipe, StagedRecipeImage
+
+
+def supports_direct_upload(storage=default_storage):
+    """Поддерживает ли хранилище подписанные URL загрузки."""
+    return hasattr(storage, "presigned_put_url") and hasattr(storage, "head")
+
+
+def upload_prefix(kind, user):
+    """Каталог прямых загрузок пользователя для вида изображения."""
+    return f"{UPLOAD_KEY_PREFIX}/{kind}/{user.pk}/"
+
+
+def presigned_upload(user, kind, content_type, size):
+    """
+    Выдает ключ и подписанный URL для прямой загрузки в хранилище.
+
+    Args:
+        user: Пользователь, загружающий файл
+        kind: Вид изображения (recipe или avatar)
+        content_type: MIME-тип файла из UPLOAD_CONTENT_TYPES
+        size: Размер файла в байтах
+
+    Returns:
+        Словарь с ключом, URL, методом и обязательными заголовками
+    """
+    key = (
+        f"{upload_prefix(kind, user)}{uuid.uuid4().hex}"
+        f"{UPLOAD_CONTENT_TYPES[content_type]}"
+    )
+    url = default_storage.presigned_put_url(
+        key, content_type, size, PRESIGNED_UPLOAD_EXPIRES
+    )
+    return {
+        "key": key,
+        "url": url,
+        "method": "PUT",
+        "headers": {"Content-Type": content_type, "Content-Length": size},
+        "expires_in": PRESIGNED_UPLOAD_EXPIRES,
+    }
+
+
+def read_uploaded_image(key):
+    """
+    Читает загруженный напрямую файл и проверяет, что это изображение.
+
+    Raises:
+        ValueError: Если файл не является изображением
+    """
+    with default_storage.open(key, "rb") as uploaded:
+        verify_image(uploaded)
+        data = uploaded.read()
+    return ContentFile(data, name=posixpath.basename(key))
+
+
+def verify_image(file):
+    """
+    Проверяет изображение с помощью Pillow и возвращает файл в начало.
+
+    Raises:
+        ValueError: Если файл не является изображением
+    """
+    try:
+        with Image.open(file) as image:
+            image.verify()
+    except Exception as error:
+        raise ValueError("Файл не является изображением.") from error
+    file.seek(0)
+
+
+def staged_upload_name(name):
+    """Служебный ключ изображения, ожидающего обработки."""
+    return f"{UPLOAD_KEY_PREFIX}/staged/{uuid.uuid4().hex}/{name}"
+
+
+def stage_recipe_image(recipe, image=None, key=""):
+    """
+    Сохраняет загруженное изображение до фоновой обработки.
+
+    Изображение из base64 записывается в хранилище частями, в базе
+    остается только ключ. Отдельный каталог на каждую загрузку не дает
+    двум рецептам с одинаковым изображением получить общий ключ.
+
+    Args:
+        recipe: Рецепт
+        image: Файл изображения из Base64ImageField
+        key: Ключ файла, загруженного напрямую в хранилище
+    """
+    if image is not None:
+        key = default_storage.save(staged_upload_name(image.name), image)
+        image.close()
+    StagedRecipeImage.objects.update_or_create(
+        recipe=recipe,
+        defaults={"name": posixpath.basename(key), "key": key},
+    )
+
+
+def open_staged_image(key):
+    """
+    Открывает изображение, ожидающее обработки.
+
+    Returns:
+        Файл или None, если объекта в хранилище уже нет
+    """
+    try:
+        return default_storage.open(key, "rb")
+    except FileNotFoundError:
+        return None
+    except ClientError as error:
+        if is_missing_object(error):
+            return None
+        raise
+
+
+def process_staged_image(recipe_id):
+    """
+    Проверяет изображение, загружает его в хранилище и создает варианты.
+
+    Если служебного файла в хранилище нет, повторять обработку бесполезно:
+    изображение помечается ошибкой.
+
+    Args:
+        recipe_id: ID рецепта
+
+    Returns:
+        True, если изображение сохранено
+    """
+    staged = (
+        StagedRecipeImage.objects.filter(recipe_id=recipe_id)
+        .select_related("recipe")
+        .first()
+    )
+    if staged is None:
+        return False
+
+    recipe = staged.recipe
+    uploaded = open_staged_image(staged.key)
+    if uploaded is None:
+        recipe.image_status = Recipe.ImageStatus.FAILED
+        recipe.save(update_fields=["image_status"])
+    else:
+        with uploaded:
+            try:
+                verify_image(uploaded)
+            except ValueError:
+                recipe.image_status = Recipe.ImageStatus.FAILED
+                recipe.save(update_fields=["image_status"])
+            else:
+                recipe.image.save(staged.name, File(uploaded), save=False)
+                recipe.image_status = Recipe.ImageStatus.READY
+                recipe.save(update_fields=["image", "image_status"])
+
+    # Строка удаляется по ключу: изображение, загруженное заново за время
+    # обработки, получает новый ключ и обрабатывается своей задачей.
+    # Служебный файл удаляется после строки, при сбое его удалит сборщик
+    # мусора
+    StagedRecipeImage.objects.filter(
+        recipe_id=recipe_id, key=staged.key
+    ).delete()
+    if uploaded is not None:
+        default_storage.delete(staged.key)
+    return recipe.image_status == Recipe.ImageStatus.READY
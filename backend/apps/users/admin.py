@@ -43,6 +43,7 @@ class CustomUserAdmin(BaseUserAdmin):
                     "email",
                     "avatar",
                     "avatar_preview",
+                    "notification_mode",
                 )
             },
         ),
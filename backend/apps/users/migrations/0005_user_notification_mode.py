@@ -0,0 +1,26 @@
+# Generated by Django 3.2.16 on 2026-10-19 10:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0004_alter_user_email"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="notification_mode",
+            field=models.CharField(
+                choices=[
+                    ("immediate", "Сразу"),
+                    ("digest", "Ежедневная сводка"),
+                ],
+                default="immediate",
+                help_text="Как доставлять уведомления о новых рецептах подписок",
+                max_length=16,
+                verbose_name="Режим уведомлений",
+            ),
+        ),
+    ]
@@ -3,14 +3,16 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
-from django.db import models
+from django.db import models, transaction
 
 from foodgram.constants import (
     MAX_EMAIL_LENGTH,
     MAX_FIRST_NAME_LENGTH,
     MAX_LAST_NAME_LENGTH,
+    MAX_NOTIFICATION_MODE_LENGTH,
     MAX_USERNAME_LENGTH,
 )
+from foodgram.images import ImageVariantsModel
 
 
 def validate_not_me(value):
@@ -33,11 +35,18 @@ class TimeStampedModel(models.Model):
         abstract = True
 
 
-class User(AbstractUser):
+class User(ImageVariantsModel, AbstractUser):
     """Кастомная модель пользователя."""
 
+    class NotificationMode(models.TextChoices):
+        """Режимы доставки уведомлений о новых рецептах."""
+
+        IMMEDIATE = "immediate", "Сразу"
+        DIGEST = "digest", "Ежедневная сводка"
+
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["username", "first_name", "last_name"]
+    variants_source = "avatar"
 
     email = models.EmailField(
         "Электронная почта",
@@ -85,6 +94,13 @@ class User(AbstractUser):
         default="",
         help_text="Загрузите аватар пользователя",
     )
+    notification_mode = models.CharField(
+        "Режим уведомлений",
+        max_length=MAX_NOTIFICATION_MODE_LENGTH,
+        choices=NotificationMode.choices,
+        default=NotificationMode.IMMEDIATE,
+        help_text="Как доставлять уведомления о новых рецептах подписок",
+    )
 
     class Meta:
         """Метаданные модели User."""
@@ -97,6 +113,37 @@ class User(AbstractUser):
         """Строковое представление пользователя."""
         return self.username
 
+    def refresh_from_db(self, using=None, fields=None):
+        """
+        Перечитывает поля пользователя из базы.
+
+        Обращение к отложенному полю загружает сразу все отложенные поля
+        одним запросом, а не по запросу на поле: у пользователя из кеша
+        аутентификации загружены только ID и активность.
+        """
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred.issuperset(fields):
+            fields = deferred
+        super().refresh_from_db(using=using, fields=fields)
+
+    def schedule_image_variants(self):
+        """
+        Создает варианты нового аватара в задаче Celery.
+
+        Задача ставится после фиксации транзакции, поэтому запрос на
+        смену аватара не ждет Pillow. Удаление аватара только очищает
+        варианты и выполняется сразу.
+        """
+        if not self.avatar:
+            self.refresh_image_variants()
+            return
+
+        from .tasks import refresh_avatar_variants_task
+
+        transaction.on_commit(
+            lambda: refresh_avatar_variants_task.delay(self.pk)
+        )
+
     def validate_username(self):
         """Проверяет, что username не равен 'me' или 'ME'."""
         if self.username.lower() == "me":
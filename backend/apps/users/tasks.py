@@ -0,0 +1,16 @@
+"""Celery задачи приложения users."""
+from django.contrib.auth import get_user_model
+
+from celery import shared_task
+
+User = get_user_model()
+
+
+@shared_task
+def refresh_avatar_variants_task(user_id):
+    """Создает уменьшенные копии и превью аватара пользователя."""
+    user = User.objects.filter(pk=user_id).first()
+    if user is None:
+        return False
+    user.refresh_image_variants()
+    return bool(user.image_variants.get("sizes"))
@@ -0,0 +1,4 @@
+"""Foodgram project package."""
+from .celery import app as celery_app
+
+__all__ = ("celery_app",)
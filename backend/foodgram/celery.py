@@ -0,0 +1,14 @@
+"""Celery application for Foodgram project."""
+import os
+
+from celery import Celery
+
+os.environ.setdefault(
+    "DJANGO_SETTINGS_MODULE", "foodgram.settings.development"
+)
+
+app = Celery("foodgram")
+
+# Все настройки Celery берутся из Django settings с префиксом CELERY_
+app.config_from_object("django.conf:settings", namespace="CELERY")
+app.autodiscover_tasks()
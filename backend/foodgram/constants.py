@@ -5,6 +5,7 @@ MAX_USERNAME_LENGTH = 150
 MAX_EMAIL_LENGTH = 254
 MAX_FIRST_NAME_LENGTH = 150
 MAX_LAST_NAME_LENGTH = 150
+MAX_NOTIFICATION_MODE_LENGTH = 16
 
 # Recipe related constants
 MAX_RECIPE_NAME_LENGTH = 200
@@ -34,6 +35,47 @@ SAFE_HTTP_METHODS = ("GET", "HEAD", "OPTIONS")
 # File upload
 MAX_IMAGE_SIZE = 10 * 1024 * 1024  # 10MB in bytes
 ALLOWED_IMAGE_EXTENSIONS = [".jpg", ".jpeg", ".png", ".gif"]
+# Длина части base64 строки, декодируемой за раз (кратна 4)
+BASE64_DECODE_CHUNK_SIZE = 64 * 1024
+# Варианты изображений: название -> максимальная сторона в пикселях
+IMAGE_VARIANT_SIZES = {"thumb": 320, "medium": 800}
+IMAGE_VARIANT_QUALITY = 80
+IMAGE_PROCESSING_MAX_RETRIES = 3
+# Размытое превью, встраиваемое в ответ API как data URL
+INLINE_PREVIEW_SIZE = 16
+INLINE_PREVIEW_QUALITY = 40
+
+# Кеш аутентификации по токену
+TOKEN_CACHE_TTL = 300  # секунд в Redis
+TOKEN_LOCAL_CACHE_TTL = 5  # секунд в памяти процесса
+TOKEN_LOCAL_CACHE_SIZE = 1024
+# Время жизни подписанного токена доступа
+ACCESS_TOKEN_LIFETIME = 300  # секунд
+
+# Общий клиент S3 (MinIO)
+S3_REGION_NAME = "us-east-1"  # MinIO требует region
+S3_MAX_POOL_CONNECTIONS = 20
+S3_CONNECT_TIMEOUT = 5  # секунд
+S3_READ_TIMEOUT = 30  # секунд
+S3_MAX_ATTEMPTS = 3
+# SigV2 не подписывает Content-Length подписанных URL загрузки
+S3_SIGNATURE_VERSION = "s3v4"
+# Сколько подписанных URL медиа-файлов хранить в кеше процесса
+SIGNED_URL_CACHE_SIZE = 10000
+
+# Сборка мусора в медиа-хранилище
+MEDIA_GC_GRACE_HOURS = 24
+MEDIA_GC_CHUNK_SIZE = 2000
+
+# Прямая загрузка изображений в MinIO по подписанному URL
+UPLOAD_KEY_PREFIX = "uploads"
+PRESIGNED_UPLOAD_EXPIRES = 600  # секунд
+UPLOAD_CONTENT_TYPES = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+}
 
 # Cart and favorites
 CART_LIMIT = 100
@@ -42,6 +84,43 @@ FAVORITES_LIMIT = 100
 # Subscriptions
 SUBSCRIPTIONS_LIMIT = 100
 
+# Feed
+FEED_FANOUT_BATCH_SIZE = 1000
+
+# Notifications
+NOTIFICATION_BATCH_SIZE = 100
+NOTIFICATION_MAX_RETRIES = 5
+NOTIFICATION_RETRY_BACKOFF_MAX = 600
+DIGEST_USERS_CHUNK_SIZE = 500
+
+# Popularity
+POPULARITY_FAVORITE_WEIGHT = 1.0
+POPULARITY_SHOPPING_CART_WEIGHT = 0.5
+POPULARITY_HALF_LIFE_DAYS = 7
+POPULARITY_EPOCH = "2025-01-01T00:00:00+00:00"
+# Шаг сдвига опорного момента: score растут не более чем в
+# 2 ** (POPULARITY_REBASE_INTERVAL_DAYS / POPULARITY_HALF_LIFE_DAYS) раз
+POPULARITY_REBASE_INTERVAL_DAYS = 70
+POPULARITY_BATCH_SIZE = 1000
+
+# Recommendations
+SIMILAR_RECIPES_TOP_K = 10
+SIMILARITY_CHUNK_SIZE = 1000
+
+# MinHash LSH по ингредиентам: 16 полос по 4 хеша,
+# порог сходства кандидатов около (1 / 16) ** (1 / 4) = 0.5
+MINHASH_NUM_PERM = 64
+MINHASH_BANDS = 16
+MINHASH_SEED = 42
+SIMILAR_INGREDIENTS_LIMIT = 10
+
+# Import
+IMPORT_BATCH_SIZE = 500
+IMPORT_IMAGE_WORKERS = 4
+
+# Export
+EXPORT_CHUNK_SIZE = 1000
+
 # Admin
 ADMIN_LIST_PER_PAGE = 25
 ADMIN_LIST_PER_PAGE_LARGE = 50
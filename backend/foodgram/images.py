@@ -0,0 +1,197 @@
+"""Уменьшенные копии и WebP-варианты загруженных изображений.
+
+Для каждого размера из IMAGE_VARIANT_SIZES рядом с оригиналом
+сохраняется копия в исходном формате (JPEG или PNG) и копия в WebP.
+Имена вариантов хранятся в JSON-поле image_variants вместе с именем
+оригинала, поэтому повторное сохранение модели с тем же изображением
+варианты не пересчитывает. Там же хранится превью - JPEG размером
+несколько сотен байт в виде data URL, который клиент показывает, пока
+не загрузилось изображение.
+"""
+import base64
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.db import models
+
+from PIL import Image, ImageOps
+
+from foodgram.constants import (
+    IMAGE_VARIANT_QUALITY,
+    IMAGE_VARIANT_SIZES,
+    INLINE_PREVIEW_QUALITY,
+    INLINE_PREVIEW_SIZE,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def open_image(field_file):
+    """Читает изображение с учетом поворота из EXIF."""
+    field_file.open("rb")
+    try:
+        with Image.open(field_file) as original:
+            original = ImageOps.exif_transpose(original)
+            has_alpha = original.mode in ("RGBA", "LA", "P")
+            return original.convert("RGBA" if has_alpha else "RGB")
+    finally:
+        field_file.close()
+
+
+def make_preview(image):
+    """
+    Превью изображения в виде data URL.
+
+    Прозрачные области заливаются белым, так как JPEG без альфа-канала.
+    """
+    preview = image.copy()
+    preview.thumbnail((INLINE_PREVIEW_SIZE, INLINE_PREVIEW_SIZE), Image.BOX)
+    if preview.mode == "RGBA":
+        background = Image.new("RGB", preview.size, "white")
+        background.paste(preview, mask=preview.getchannel("A"))
+        preview = background
+    buffer = BytesIO()
+    preview.save(
+        buffer, format="JPEG", quality=INLINE_PREVIEW_QUALITY, optimize=True
+    )
+    encoded = base64.b64encode(buffer.getvalue()).decode("ascii")
+    return f"data:image/jpeg;base64,{encoded}"
+
+
+def generate_variants(field_file):
+    """
+    Создает и сохраняет варианты и превью изображения.
+
+    Args:
+        field_file: FieldFile с оригиналом изображения
+
+    Returns:
+        Словарь с ключами sizes (список словарей {"name", "width",
+        "file", "webp"} по размерам) и preview (data URL превью)
+    """
+    image = open_image(field_file)
+    has_alpha = image.mode == "RGBA"
+
+    image_format, ext = ("PNG", ".png") if has_alpha else ("JPEG", ".jpg")
+    root = os.path.splitext(field_file.name)[0]
+    storage = field_file.storage
+
+    variants = []
+    for name, size in IMAGE_VARIANT_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+        variant = {"name": name, "width": resized.width}
+        for key, save_format, save_ext in (
+            ("file", image_format, ext),
+            ("webp", "WEBP", ".webp"),
+        ):
+            buffer = BytesIO()
+            resized.save(
+                buffer, format=save_format, quality=IMAGE_VARIANT_QUALITY
+            )
+            variant[key] = storage.save(
+                f"{root}_{name}{save_ext}", ContentFile(buffer.getvalue())
+            )
+        variants.append(variant)
+    return {"sizes": variants, "preview": make_preview(image)}
+
+
+def build_variants(field_file):
+    """
+    Значение поля image_variants для изображения.
+
+    При ошибке обработки оригинал все равно запоминается, чтобы не
+    повторять ее при каждом сохранении модели.
+    """
+    variants = {"source": field_file.name, "sizes": [], "preview": ""}
+    try:
+        variants.update(generate_variants(field_file))
+    except (OSError, Image.DecompressionBombError):
+        logger.exception(
+            "Не удалось создать варианты изображения %s", field_file.name
+        )
+    return variants
+
+
+class ImageVariantsModel(models.Model):
+    """Абстрактная модель с вариантами изображения из поля variants_source."""
+
+    variants_source = "image"
+
+    image_variants = models.JSONField(
+        "Варианты изображения",
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Уменьшенные копии и WebP-версии изображения",
+    )
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        """Сохраняет модель и создает варианты нового изображения."""
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and (
+            self.variants_source not in update_fields
+        ):
+            return
+        if self.image_variants_outdated():
+            self.schedule_image_variants()
+
+    def image_variants_outdated(self):
+        """Созданы ли варианты не для текущего изображения."""
+        source = getattr(self, self.variants_source)
+        if source:
+            return self.image_variants.get("source") != source.name
+        return bool(self.image_variants)
+
+    def schedule_image_variants(self):
+        """
+        Создает варианты изображения после сохранения модели.
+
+        Модели, изображение которых меняется в запросе, переопределяют
+        метод и создают варианты в задаче Celery.
+        """
+        self.refresh_image_variants()
+
+    def refresh_image_variants(self):
+        """Пересчитывает варианты, если изображение изменилось."""
+        if not self.image_variants_outdated():
+            return
+        source = getattr(self, self.variants_source)
+        self.store_image_variants(build_variants(source) if source else {})
+
+    def refresh_image_preview(self):
+        """
+        Создает превью уже обработанного изображения.
+
+        Нужно для изображений, варианты которых созданы до появления
+        превью: сами варианты при этом не пересоздаются.
+
+        Returns:
+            True, если превью сохранено
+        """
+        source = getattr(self, self.variants_source)
+        if not source:
+            return False
+        if self.image_variants.get("source") != source.name:
+            self.refresh_image_variants()
+            return bool(self.image_variants.get("preview"))
+        try:
+            preview = make_preview(open_image(source))
+        except (OSError, Image.DecompressionBombError):
+            logger.exception(
+                "Не удалось создать превью изображения %s", source.name
+            )
+            return False
+        self.store_image_variants({**self.image_variants, "preview": preview})
+        return True
+
+    def store_image_variants(self, variants):
+        """Сохраняет варианты без вызова save() и сигналов."""
+        self.image_variants = variants
+        type(self).objects.filter(pk=self.pk).update(image_variants=variants)
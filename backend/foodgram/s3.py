@@ -0,0 +1,201 @@
+"""Общий для процесса клиент S3 (MinIO) с пулом соединений и метриками.
+
+Клиент создается лениво при первом обращении и дальше используется
+хранилищем MinIOMediaStorage и management-командами, поэтому сессия,
+поиск учетных данных и пул HTTP-соединений создаются один раз на процесс.
+Клиенты boto3 потокобезопасны, а ресурсы нет: каждому потоку выдается
+свой легкий объект ресурса поверх общего клиента.
+
+Размер пула, таймауты и число повторов задаются настройками
+AWS_S3_MAX_POOL_CONNECTIONS, AWS_S3_CONNECT_TIMEOUT, AWS_S3_READ_TIMEOUT
+и AWS_S3_MAX_ATTEMPTS, версия подписи - AWS_S3_SIGNATURE_VERSION (по
+умолчанию SigV4, в подпись которой входят заголовки загрузки).
+Количество и время запросов по операциям собираются в s3_metrics через
+события botocore.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+
+import boto3
+from botocore.config import Config
+
+from foodgram.constants import (
+    S3_CONNECT_TIMEOUT,
+    S3_MAX_ATTEMPTS,
+    S3_MAX_POOL_CONNECTIONS,
+    S3_READ_TIMEOUT,
+    S3_REGION_NAME,
+    S3_SIGNATURE_VERSION,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class S3Metrics:
+    """Счетчики запросов к S3 и их длительности по операциям."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._operations = defaultdict(self._empty)
+
+    @staticmethod
+    def _empty():
+        return {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0}
+
+    def register(self, client):
+        """Подписывается на события botocore клиента."""
+        events = client.meta.events
+        events.register("before-call.s3", self._before_call)
+        events.register("after-call.s3", self._after_call)
+        events.register("after-call-error.s3", self._after_call_error)
+
+    def record(self, operation, elapsed_ms, error=False):
+        """Учитывает один запрос."""
+        with self._lock:
+            stats = self._operations[operation]
+            stats["count"] += 1
+            stats["errors"] += int(error)
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        logger.debug("S3 %s: %.1f мс", operation, elapsed_ms)
+
+    def snapshot(self):
+        """
+        Копия накопленных метрик.
+
+        Returns:
+            Словарь операция -> {"count", "errors", "total_ms", "max_ms",
+            "avg_ms"}
+        """
+        with self._lock:
+            return {
+                operation: {
+                    **stats,
+                    "avg_ms": stats["total_ms"] / stats["count"],
+                }
+                for operation, stats in self._operations.items()
+            }
+
+    def report(self):
+        """Строки со сводкой метрик для вывода в консоль."""
+        return [
+            f"S3 {operation}: {stats['count']} запр., "
+            f"ошибок {stats['errors']}, среднее {stats['avg_ms']:.1f} мс, "
+            f"макс. {stats['max_ms']:.1f} мс"
+            for operation, stats in sorted(self.snapshot().items())
+        ]
+
+    def reset(self):
+        """Обнуляет метрики."""
+        with self._lock:
+            self._operations.clear()
+
+    def _before_call(self, context, **kwargs):
+        context["s3_metrics_started"] = time.perf_counter()
+
+    def _after_call(self, context, model, http_response, **kwargs):
+        self._finish(context, model, http_response.status_code >= 400)
+
+    def _after_call_error(self, context, model, **kwargs):
+        self._finish(context, model, True)
+
+    def _finish(self, context, model, error):
+        started = context.pop("s3_metrics_started", None)
+        if started is not None:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.record(model.name, elapsed_ms, error)
+
+
+s3_metrics = S3Metrics()
+
+_lock = threading.Lock()
+_resources = {}
+_local = threading.local()
+
+
+def get_s3_config():
+    """Настройки пула соединений, таймаутов, повторов и подписи клиента."""
+    return Config(
+        signature_version=getattr(
+            settings, "AWS_S3_SIGNATURE_VERSION", S3_SIGNATURE_VERSION
+        ),
+        max_pool_connections=getattr(
+            settings, "AWS_S3_MAX_POOL_CONNECTIONS", S3_MAX_POOL_CONNECTIONS
+        ),
+        connect_timeout=getattr(
+            settings, "AWS_S3_CONNECT_TIMEOUT", S3_CONNECT_TIMEOUT
+        ),
+        read_timeout=getattr(settings, "AWS_S3_READ_TIMEOUT", S3_READ_TIMEOUT),
+        retries={
+            "max_attempts": getattr(
+                settings, "AWS_S3_MAX_ATTEMPTS", S3_MAX_ATTEMPTS
+            ),
+            "mode": "standard",
+        },
+        tcp_keepalive=True,
+    )
+
+
+def _connection_key(endpoint_url):
+    """Параметры, от которых зависит клиент."""
+    return (
+        endpoint_url,
+        getattr(settings, "AWS_ACCESS_KEY_ID", None),
+        getattr(settings, "AWS_SECRET_ACCESS_KEY", None),
+        getattr(settings, "AWS_S3_REGION_NAME", None) or S3_REGION_NAME,
+        getattr(settings, "AWS_S3_USE_SSL", True),
+    )
+
+
+def _shared_resource(key):
+    """Ресурс S3, создаваемый один раз для набора параметров."""
+    resource = _resources.get(key)
+    if resource is None:
+        with _lock:
+            resource = _resources.get(key)
+            if resource is None:
+                endpoint_url, access_key, secret_key, region, use_ssl = key
+                session = boto3.session.Session(
+                    aws_access_key_id=access_key,
+                    aws_secret_access_key=secret_key,
+                )
+                resource = session.resource(
+                    "s3",
+                    endpoint_url=endpoint_url,
+                    region_name=region,
+                    use_ssl=use_ssl,
+                    config=get_s3_config(),
+                )
+                s3_metrics.register(resource.meta.client)
+                _resources[key] = resource
+    return resource
+
+
+def get_s3_client(endpoint_url=None):
+    """
+    Общий для процесса клиент S3.
+
+    Args:
+        endpoint_url: Адрес MinIO, по умолчанию AWS_S3_ENDPOINT_URL
+    """
+    if endpoint_url is None:
+        endpoint_url = getattr(settings, "AWS_S3_ENDPOINT_URL", None)
+    return _shared_resource(_connection_key(endpoint_url)).meta.client
+
+
+def get_s3_resource(endpoint_url=None):
+    """Ресурс S3 текущего потока поверх общего клиента."""
+    if endpoint_url is None:
+        endpoint_url = getattr(settings, "AWS_S3_ENDPOINT_URL", None)
+    key = _connection_key(endpoint_url)
+    resources = getattr(_local, "resources", None)
+    if resources is None:
+        resources = _local.resources = {}
+    if key not in resources:
+        shared = _shared_resource(key)
+        resources[key] = type(shared)(client=shared.meta.client)
+    return resources[key]
@@ -1,6 +1,8 @@
 """Base settings for Foodgram project."""
+import os
 from pathlib import Path
 
+from celery.schedules import crontab
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -117,11 +119,13 @@ AUTH_USER_MODEL = "users.User"
 # Django REST Framework settings
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "apps.api.authentication.CachedTokenAuthentication",
+        "apps.api.authentication.SignedAccessTokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
+    "EXCEPTION_HANDLER": "apps.api.exceptions.exception_handler",
     "DEFAULT_PAGINATION_CLASS": (
         "apps.api.pagination.CustomPageNumberPagination"
     ),
@@ -179,3 +183,41 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
 ]
+
+# Лента подписок: материализованные ленты (fan-out on write).
+# Если выключено, лента строится JOIN-запросом по подпискам.
+FEED_FANOUT_ENABLED = os.environ.get("FEED_FANOUT_ENABLED", "False") == "True"
+# Рецепты авторов с большим числом подписчиков не рассылаются по лентам,
+# а подмешиваются при чтении
+FEED_FANOUT_MAX_FOLLOWERS = int(
+    os.environ.get("FEED_FANOUT_MAX_FOLLOWERS", "1000")
+)
+# Сколько последних рецептов автора добавляется в ленту при подписке
+FEED_BACKFILL_LIMIT = int(os.environ.get("FEED_BACKFILL_LIMIT", "100"))
+
+# Заглушка, которую API отдает вместо изображения рецепта,
+# пока оно обрабатывается в фоне
+RECIPE_IMAGE_PLACEHOLDER = f"{STATIC_URL}recipes/placeholder.svg"
+
+# Периодические задачи Celery beat
+CELERY_BEAT_SCHEDULE = {
+    "send-recipe-digests": {
+        "task": "apps.recipes.tasks.send_digests_task",
+        "schedule": crontab(hour=9, minute=0),
+    },
+    "refresh-recipe-popularity": {
+        "task": "apps.recipes.tasks.refresh_popularity_task",
+        "schedule": crontab(minute=0),
+    },
+}
+
+# Ежедневное удаление файлов без ссылок из бакета MinIO. Выключено по
+# умолчанию: сначала стоит проверить вывод manage.py gc_media --dry-run
+MEDIA_GC_SCHEDULE_ENABLED = (
+    os.environ.get("MEDIA_GC_SCHEDULE_ENABLED", "False") == "True"
+)
+if MEDIA_GC_SCHEDULE_ENABLED:
+    CELERY_BEAT_SCHEDULE["gc-media"] = {
+        "task": "apps.recipes.tasks.gc_media_task",
+        "schedule": crontab(hour=4, minute=30),
+    }
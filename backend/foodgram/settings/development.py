@@ -118,10 +118,14 @@ if USE_MINIO:
     AWS_SECRET_ACCESS_KEY = MINIO_SECRET_KEY
     AWS_STORAGE_BUCKET_NAME = MINIO_BUCKET_NAME
     AWS_S3_ENDPOINT_URL = f"http://{MINIO_ENDPOINT}"
+    # Endpoint MinIO, доступный браузеру, для подписанных URL загрузки
+    AWS_S3_PUBLIC_ENDPOINT_URL = os.environ.get(
+        "MINIO_PUBLIC_ENDPOINT_URL", AWS_S3_ENDPOINT_URL
+    )
     AWS_S3_USE_SSL = MINIO_USE_HTTPS
     AWS_DEFAULT_ACL = None
     AWS_S3_OBJECT_PARAMETERS = {
-        "CacheControl": "max-age=86400",
+        "CacheControl": "public, max-age=31536000, immutable",
     }
     AWS_LOCATION = "media"
     AWS_S3_FILE_OVERWRITE = False
@@ -134,5 +138,12 @@ if USE_MINIO:
     MEDIA_URL = f"http://{MINIO_ENDPOINT}/foodgram/media/"
 else:
     # Стандартное файловое хранилище для разработки
-    DEFAULT_FILE_STORAGE = "django.core.files.storage.FileSystemStorage"
+    DEFAULT_FILE_STORAGE = "foodgram.storage.ContentAddressedFileSystemStorage"
     MEDIA_URL = "/media/"
+
+# Celery: без брокера задачи выполняются синхронно
+CELERY_BROKER_URL = os.environ.get("CELERY_BROKER_URL", "memory://")
+CELERY_TASK_ALWAYS_EAGER = (
+    os.environ.get("CELERY_TASK_ALWAYS_EAGER", "True") == "True"
+)
+CELERY_TASK_EAGER_PROPAGATES = True
@@ -59,13 +59,25 @@ AWS_SECRET_ACCESS_KEY = MINIO_SECRET_KEY
 AWS_STORAGE_BUCKET_NAME = MINIO_BUCKET_NAME
 # Возвращаем endpoint для загрузки файлов (внутренний адрес)
 AWS_S3_ENDPOINT_URL = f"http://{MINIO_ENDPOINT}"
+# Endpoint MinIO, доступный браузеру, для подписанных URL загрузки
+AWS_S3_PUBLIC_ENDPOINT_URL = os.environ.get(
+    "MINIO_PUBLIC_ENDPOINT_URL",
+    f"https://{os.environ.get('DOMAIN_NAME', 'foodgram.freedynamicdns.net')}",
+)
 AWS_S3_USE_SSL = False  # Внутри контейнера используем HTTP
 AWS_DEFAULT_ACL = None
 AWS_S3_OBJECT_PARAMETERS = {
-    "CacheControl": "max-age=86400",
+    "CacheControl": "public, max-age=31536000, immutable",
 }
 AWS_LOCATION = "media"
 AWS_S3_FILE_OVERWRITE = False
+# Пул соединений общего клиента S3 на процесс: не меньше числа потоков
+AWS_S3_MAX_POOL_CONNECTIONS = int(
+    os.environ.get("MINIO_MAX_POOL_CONNECTIONS", 20)
+)
+AWS_S3_CONNECT_TIMEOUT = int(os.environ.get("MINIO_CONNECT_TIMEOUT", 5))
+AWS_S3_READ_TIMEOUT = int(os.environ.get("MINIO_READ_TIMEOUT", 30))
+AWS_S3_MAX_ATTEMPTS = int(os.environ.get("MINIO_MAX_ATTEMPTS", 3))
 
 # Настройка кастомного домена для публичного доступа к файлам
 # Это заставит Django формировать URL через публичный домен
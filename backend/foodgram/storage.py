@@ -1,44 +1,299 @@
 """Custom storage backends for Django."""
+import hashlib
 import os
+import posixpath
+import threading
+import time
+from collections import OrderedDict
 
 from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
 
+from botocore.exceptions import ClientError
 from storages.backends.s3boto3 import S3Boto3Storage
+from storages.utils import clean_name
 
+from foodgram.constants import SIGNED_URL_CACHE_SIZE, UPLOAD_KEY_PREFIX
+from foodgram.s3 import get_s3_client, get_s3_resource
 
-class MinIOMediaStorage(S3Boto3Storage):
-    """Кастомное хранилище для медиа файлов в MinIO."""
+# Ограничение S3 на число ключей в одном запросе DeleteObjects
+MAX_DELETE_OBJECTS = 1000
+
+
+def is_missing_object(error):
+    """Означает ли ошибка S3, что объекта с таким ключом нет."""
+    return error.response["Error"]["Code"] in ("404", "NoSuchKey")
+
+
+class ContentAddressedStorageMixin:
+    """
+    Хранение файлов под ключом из SHA-256 содержимого.
+
+    Файл сохраняется как <каталог>/<sha256><расширение>, каталог берется
+    из upload_to. Одинаковое содержимое дает один и тот же ключ, поэтому
+    повторная загрузка пропускается, а содержимое по ключу никогда не
+    меняется и его можно кешировать бессрочно. Из-за общего ключа файлы
+    нельзя удалять при удалении одной ссылающейся на них записи.
+
+    Вместо повторной загрузки вызывается touch(): хранилища со сборщиком
+    мусора обновляют в нем время изменения файла, чтобы сборщик не удалил
+    старый файл, на который снова ссылается новая запись.
+
+    Временные загрузки под UPLOAD_KEY_PREFIX уже имеют уникальный ключ и
+    сохраняются как есть, без хеширования и проверки существования.
+    """
+
+    def save(self, name, content, max_length=None):
+        """Сохраняет файл под ключом содержимого, если его еще нет."""
+        if name is None:
+            name = content.name
+        if name.startswith(f"{UPLOAD_KEY_PREFIX}/"):
+            return super().save(name, content, max_length=max_length)
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+
+        name = self.get_content_name(name, content)
+        if self.touch(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+    def touch(self, name):
+        """
+        Отмечает уже сохраненный файл как загруженный заново.
+
+        Returns:
+            True, если файл существует
+        """
+        return self.exists(name)
+
+    def get_content_name(self, name, content):
+        """Ключ файла по SHA-256 его содержимого."""
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        content.seek(0)
 
-    bucket_name = settings.AWS_STORAGE_BUCKET_NAME
-    location = settings.AWS_LOCATION
-    file_overwrite = settings.AWS_S3_FILE_OVERWRITE
-    default_acl = settings.AWS_DEFAULT_ACL
-    querystring_auth = settings.AWS_QUERYSTRING_AUTH
+        directory = posixpath.dirname(name.replace("\\", "/"))
+        ext = os.path.splitext(name)[1].lower()
+        return posixpath.join(directory, f"{digest.hexdigest()}{ext}")
+
+
+class ContentAddressedFileSystemStorage(
+    ContentAddressedStorageMixin, FileSystemStorage
+):
+    """Локальное хранилище с адресацией по содержимому для разработки."""
+
+
+class MinIOMediaStorage(ContentAddressedStorageMixin, S3Boto3Storage):
+    """Кастомное хранилище для медиа файлов в MinIO."""
 
     def __init__(self, *args, **kwargs):
+        # Настройки читаются при создании хранилища, а не при импорте
+        # модуля: без MinIO в настройках нет AWS_* параметров
+        self.bucket_name = settings.AWS_STORAGE_BUCKET_NAME
+        self.location = settings.AWS_LOCATION
+        self.file_overwrite = settings.AWS_S3_FILE_OVERWRITE
+        self.default_acl = settings.AWS_DEFAULT_ACL
+        self.querystring_auth = settings.AWS_QUERYSTRING_AUTH
         # Для загрузки файлов используем внутренний endpoint
         self.endpoint_url = settings.AWS_S3_ENDPOINT_URL
+        # Публичные URL строятся от MEDIA_URL без обращений к окружению
+        self.public_base_url = settings.MEDIA_URL
+        self._signed_urls = OrderedDict()
+        self._signed_urls_lock = threading.Lock()
         super().__init__(*args, **kwargs)
 
+    def __getstate__(self):
+        """Кеш подписанных URL и блокировка не сериализуются."""
+        state = super().__getstate__()
+        state.pop("_signed_urls", None)
+        state.pop("_signed_urls_lock", None)
+        return state
+
+    def __setstate__(self, state):
+        state["_signed_urls"] = OrderedDict()
+        state["_signed_urls_lock"] = threading.Lock()
+        super().__setstate__(state)
+
+    @property
+    def connection(self):
+        """Ресурс S3 поверх общего для процесса клиента с пулом."""
+        return get_s3_resource(self.endpoint_url)
+
+    @property
+    def public_client(self):
+        """
+        Клиент S3 для подписи URL, по которым обращается браузер.
+
+        Подпись включает хост, поэтому используется публичный endpoint
+        MinIO, а не внутренний адрес в сети контейнеров.
+        """
+        return get_s3_client(
+            getattr(settings, "AWS_S3_PUBLIC_ENDPOINT_URL", None)
+            or self.endpoint_url
+        )
+
+    def presigned_put_url(self, name, content_type, content_length, expires):
+        """
+        Подписанный URL для загрузки файла напрямую в MinIO.
+
+        Content-Type и Content-Length входят в подпись SigV4
+        (X-Amz-SignedHeaders), поэтому MinIO отклонит загрузку с другим
+        типом или размером.
+        """
+        return self.public_client.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": self.bucket_name,
+                "Key": self._normalize_name(clean_name(name)),
+                "ContentType": content_type,
+                "ContentLength": content_length,
+            },
+            ExpiresIn=expires,
+            HttpMethod="PUT",
+        )
+
+    def touch(self, name):
+        """
+        Обновляет время изменения объекта копированием в самого себя.
+
+        Одним запросом и проверяет существование объекта, и продлевает
+        его льготный период в сборщике мусора. Метаданные при копировании
+        заменяются, поэтому задаются заново, как при загрузке.
+
+        Returns:
+            True, если объект существует
+        """
+        key = self._normalize_name(clean_name(name))
+        try:
+            self.connection.meta.client.copy_object(
+                Bucket=self.bucket_name,
+                Key=key,
+                CopySource={"Bucket": self.bucket_name, "Key": key},
+                MetadataDirective="REPLACE",
+                **self._get_write_parameters(name),
+            )
+        except ClientError as error:
+            if is_missing_object(error):
+                return False
+            raise
+        return True
+
+    def head(self, name):
+        """
+        Метаданные объекта одним запросом HEAD.
+
+        Returns:
+            Словарь с размером, типом содержимого и временем изменения
+            или None
+        """
+        try:
+            response = self.connection.meta.client.head_object(
+                Bucket=self.bucket_name,
+                Key=self._normalize_name(clean_name(name)),
+            )
+        except ClientError as error:
+            if is_missing_object(error):
+                return None
+            raise
+        return {
+            "size": response["ContentLength"],
+            "content_type": response.get("ContentType", ""),
+            "modified": response["LastModified"],
+        }
+
+    def list_objects(self, prefix="", start_after=""):
+        """
+        Перебирает объекты хранилища постранично в порядке ключей.
+
+        Args:
+            prefix: Каталог, объекты которого перечисляются
+            start_after: Имя, после которого начинается листинг
+
+        Yields:
+            Пары (имя файла, время изменения)
+        """
+        root = self._normalize_name(clean_name(prefix))
+        location = self._normalize_name("")
+        params = {"Bucket": self.bucket_name, "Prefix": root}
+        if start_after:
+            params["StartAfter"] = self._normalize_name(
+                clean_name(start_after)
+            )
+        paginator = self.connection.meta.client.get_paginator(
+            "list_objects_v2"
+        )
+        for page in paginator.paginate(**params):
+            for obj in page.get("Contents", []):
+                name = obj["Key"][len(location) :].lstrip("/")
+                yield name, obj["LastModified"]
+
+    def delete_many(self, names):
+        """
+        Удаляет файлы пачками одним запросом DeleteObjects на пачку.
+
+        Returns:
+            Количество удаленных файлов
+        """
+        names = list(names)
+        client = self.connection.meta.client
+        deleted = 0
+        for start in range(0, len(names), MAX_DELETE_OBJECTS):
+            batch = names[start : start + MAX_DELETE_OBJECTS]
+            response = client.delete_objects(
+                Bucket=self.bucket_name,
+                Delete={
+                    "Objects": [
+                        {"Key": self._normalize_name(clean_name(name))}
+                        for name in batch
+                    ],
+                    "Quiet": True,
+                },
+            )
+            deleted += len(batch) - len(response.get("Errors", []))
+        return deleted
+
     def url(self, name):
         """
         Возвращает публичный URL для файла.
-        Автоматически определяет окружение (development/production).
+
+        Базовый URL берется из MEDIA_URL один раз при создании
+        хранилища. С AWS_QUERYSTRING_AUTH отдается подписанный URL.
         """
         # Убираем префикс 'media/' если он есть в имени
         if name.startswith("media/"):
             name = name[6:]
+        if self.querystring_auth:
+            return self.signed_url(name)
+        return f"{self.public_base_url}{name}"
 
-        # Определяем окружение
-        is_development = getattr(settings, "DEBUG", False)
-
-        if is_development:
-            # Development: прямой доступ к MinIO
-            minio_host = os.environ.get("MINIO_HOST", "localhost")
-            return f"http://{minio_host}:9000/foodgram/media/{name}"
-        else:
-            # Production: через nginx proxy с публичным доменом
-            domain = os.environ.get(
-                "DOMAIN_NAME", "foodgram.freedynamicdns.net"
-            )
-            return f"https://{domain}/media/{name}"
+    def signed_url(self, name):
+        """
+        Подписанный URL файла с кешированием подписи.
+
+        Подпись переиспользуется, пока не истекла половина срока ее
+        действия, поэтому клиент всегда получает URL, действующий не
+        меньше половины AWS_QUERYSTRING_EXPIRE.
+        """
+        now = time.monotonic()
+        with self._signed_urls_lock:
+            cached = self._signed_urls.get(name)
+            if cached is not None and cached[1] > now:
+                self._signed_urls.move_to_end(name)
+                return cached[0]
+
+        url = self.public_client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket_name,
+                "Key": self._normalize_name(clean_name(name)),
+            },
+            ExpiresIn=self.querystring_expire,
+        )
+        with self._signed_urls_lock:
+            self._signed_urls[name] = (url, now + self.querystring_expire / 2)
+            self._signed_urls.move_to_end(name)
+            if len(self._signed_urls) > SIGNED_URL_CACHE_SIZE:
+                self._signed_urls.popitem(last=False)
+        return url
@@ -3,13 +3,17 @@ import base64
 import os
 import tempfile
 
+import boto3
 import django
 import pytest
+from apps.api.authentication import local_cache
 from apps.recipes.models import Ingredient, Recipe, Tag
 from apps.users.models import Subscription
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
+from moto import mock_s3
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
 
@@ -36,6 +40,14 @@ def enable_db_access(db):
     pass
 
 
+@pytest.fixture(autouse=True)
+def clear_auth_cache():
+    """Кеш аутентификации по токену не переживает тест."""
+    yield
+    local_cache.clear()
+    cache.clear()
+
+
 @pytest.fixture
 def api_client():
     """API клиент для тестов."""
@@ -228,3 +240,26 @@ def media_tmp(settings, tmp_path):
     media_root.mkdir()
     settings.MEDIA_ROOT = media_root
     return media_root
+
+
+S3_BUCKET = "foodgram"
+
+
+@pytest.fixture
+def s3(settings):
+    """Хранилище MinIO, подмененное moto; возвращает клиент boto3."""
+    settings.AWS_ACCESS_KEY_ID = "testing"
+    settings.AWS_SECRET_ACCESS_KEY = "testing"
+    settings.AWS_STORAGE_BUCKET_NAME = S3_BUCKET
+    settings.AWS_S3_REGION_NAME = "us-east-1"
+    settings.AWS_S3_ENDPOINT_URL = None
+    settings.AWS_S3_PUBLIC_ENDPOINT_URL = None
+    settings.AWS_LOCATION = "media"
+    settings.AWS_S3_FILE_OVERWRITE = False
+    settings.AWS_DEFAULT_ACL = None
+    settings.AWS_QUERYSTRING_AUTH = False
+    with mock_s3():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=S3_BUCKET)
+        settings.DEFAULT_FILE_STORAGE = "foodgram.storage.MinIOMediaStorage"
+        yield client
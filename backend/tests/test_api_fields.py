@@ -0,0 +1,107 @@
+"""Тесты поля Base64ImageField."""
+import base64
+from io import BytesIO
+
+import pytest
+from apps.api import fields
+from apps.api.fields import Base64ImageField, sniff_image_format
+from PIL import Image
+from rest_framework import serializers
+
+from .conftest import short_base64
+
+PNG_BYTES = base64.b64decode(short_base64.split(",")[1])
+
+
+def make_ico_base64():
+    """ICO-изображение в base64: его формат не определяется по сигнатуре."""
+    buffer = BytesIO()
+    Image.new("RGB", (16, 16), "red").save(buffer, format="ICO")
+    return base64.b64encode(buffer.getvalue()).decode()
+
+
+ICO_BASE64 = make_ico_base64()
+
+
+class TestBase64ImageField:
+    """Тесты декодирования изображений из base64."""
+
+    def test_decodes_in_chunks(self, monkeypatch):
+        """Данные декодируются частями без искажений."""
+        monkeypatch.setattr(fields, "BASE64_DECODE_CHUNK_SIZE", 8)
+
+        image = Base64ImageField().to_internal_value(short_base64)
+
+        assert image.read() == PNG_BYTES
+        assert image.name.endswith(".png")
+
+    def test_format_sniffed_from_content(self):
+        """Расширение определяется по содержимому, а не по data URL."""
+        data = short_base64.replace("image/png", "image/jpeg")
+
+        image = Base64ImageField().to_internal_value(data)
+
+        assert image.name.endswith(".png")
+
+    def test_line_breaks_allowed(self, monkeypatch):
+        """Base64 с переносами строк декодируется, как и раньше."""
+        monkeypatch.setattr(fields, "BASE64_DECODE_CHUNK_SIZE", 8)
+        header, encoded = short_base64.split(",")
+        wrapped = "\n".join(
+            encoded[index : index + 10] for index in range(0, len(encoded), 10)
+        )
+
+        image = Base64ImageField().to_internal_value(f"{header},{wrapped}\r\n")
+
+        assert image.read() == PNG_BYTES
+
+    def test_extension_from_header(self):
+        """Без сигнатуры расширение берется из data URL."""
+        image = Base64ImageField().to_internal_value(
+            f"data:image/x-icon;base64,{ICO_BASE64}"
+        )
+
+        assert image.name.endswith(".x-icon")
+
+    def test_oversized_rejected_before_decoding(self, monkeypatch):
+        """Слишком большое изображение отклоняется по длине base64."""
+        monkeypatch.setattr(fields, "MAX_IMAGE_SIZE", len(PNG_BYTES) - 1)
+
+        def fail_decode(*args, **kwargs):
+            raise AssertionError("base64 не должен декодироваться")
+
+        monkeypatch.setattr(fields.base64, "b64decode", fail_decode)
+
+        with pytest.raises(serializers.ValidationError) as error:
+            Base64ImageField().to_internal_value(short_base64)
+        assert error.value.detail[0].code == "too_large"
+
+    @pytest.mark.parametrize(
+        "data, code",
+        [
+            ("data:image/png;base64,!!!!", "invalid_base64"),
+            ("data:image/png,iVBORw0KGgo=", "invalid_base64"),
+            ("data:image/png;base64,bm90IGFuIGltYWdl", "invalid_image"),
+            (f"data:image/x/../y;base64,{ICO_BASE64}", "invalid_image"),
+            (f"data:image/ico\\..;base64,{ICO_BASE64}", "invalid_image"),
+        ],
+    )
+    def test_invalid_data(self, data, code):
+        """Некорректные данные дают ошибку валидации."""
+        with pytest.raises(serializers.ValidationError) as error:
+            Base64ImageField().to_internal_value(data)
+        assert error.value.detail[0].code == code
+
+    @pytest.mark.parametrize(
+        "header, image_format",
+        [
+            (PNG_BYTES[:16], "png"),
+            (b"\xff\xd8\xff\xe0" + b"\x00" * 12, "jpeg"),
+            (b"GIF89a" + b"\x00" * 10, "gif"),
+            (b"RIFF\x00\x00\x00\x00WEBPVP8 ", "webp"),
+            (b"not an image", None),
+        ],
+    )
+    def test_sniff_image_format(self, header, image_format):
+        """Формат определяется по сигнатуре."""
+        assert sniff_image_format(header) == image_format
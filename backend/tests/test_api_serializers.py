@@ -8,8 +8,10 @@ from apps.api.serializers import (
     TagSerializer,
     UserSerializer,
 )
-from apps.recipes.models import Recipe
+from apps.recipes.models import Ingredient, IngredientInRecipe, Recipe, Tag
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 User = get_user_model()
 
@@ -161,7 +163,9 @@ class TestRecipeCreateUpdateSerializer:
         serializer = RecipeCreateUpdateSerializer(data=data)
         assert not serializer.is_valid()
         assert "ingredients" in serializer.errors
-        assert "не существует" in str(serializer.errors["ingredients"])
+        assert serializer.errors["ingredients"] == [
+            {"id": ["Ингредиент с указанным ID не существует."]}
+        ]
 
     def test_recipe_creation_invalid_ingredient_amount(self, tag, ingredient):
         """Тест создания рецепта с невалидным количеством ингредиента."""
@@ -244,7 +248,65 @@ class TestRecipeCreateUpdateSerializer:
         serializer = RecipeCreateUpdateSerializer(instance=recipe, data=data)
         assert not serializer.is_valid()
         assert "ingredients" in serializer.errors
-        assert "не существует" in str(serializer.errors["ingredients"])
+        assert serializer.errors["ingredients"] == [
+            {"id": ["Ингредиент с указанным ID не существует."]}
+        ]
+
+    def test_recipe_validation_resolves_ids_in_one_query(
+        self, django_assert_num_queries
+    ):
+        """Ингредиенты и теги загружаются одним запросом каждый."""
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f"Ингредиент {index}", measurement_unit="г")
+            for index in range(30)
+        )
+        Tag.objects.bulk_create(
+            Tag(
+                name=f"Тег {index}",
+                slug=f"tag-{index}",
+                color=f"#00000{index}",
+            )
+            for index in range(3)
+        )
+        data = {
+            "name": "Большой рецепт",
+            "text": "Описание",
+            "cooking_time": 30,
+            "image": short_base64,
+            "tags": list(Tag.objects.values_list("id", flat=True)),
+            "ingredients": [
+                {"id": ingredient_id, "amount": 10}
+                for ingredient_id in Ingredient.objects.values_list(
+                    "id", flat=True
+                )
+            ],
+        }
+
+        serializer = RecipeCreateUpdateSerializer(data=data)
+        with django_assert_num_queries(2):
+            assert serializer.is_valid(), serializer.errors
+
+        validated = serializer.validated_data
+        assert all(isinstance(tag, Tag) for tag in validated["tags"])
+        assert all(
+            isinstance(item["id"], Ingredient)
+            for item in validated["ingredients"]
+        )
+
+    def test_recipe_creation_nonexistent_tag(self, ingredient):
+        """Тест создания рецепта с несуществующим тегом."""
+        data = {
+            "name": "Тестовый рецепт",
+            "text": "Описание рецепта",
+            "cooking_time": 30,
+            "image": short_base64,
+            "tags": [99999],
+            "ingredients": [{"id": ingredient.id, "amount": 100}],
+        }
+
+        serializer = RecipeCreateUpdateSerializer(data=data)
+        assert not serializer.is_valid()
+        assert "99999" in str(serializer.errors["tags"])
 
     def test_recipe_creation_valid_data(self, tag, ingredient, user):
         """Тест создания рецепта с валидными данными."""
@@ -285,6 +347,95 @@ class TestRecipeCreateUpdateSerializer:
         assert updated_recipe.cooking_time == 45
 
 
+@pytest.mark.django_db
+class TestRecipeDiffUpdate:
+    """Тесты обновления рецепта по разнице ингредиентов и тегов."""
+
+    @pytest.fixture
+    def second_ingredient(self):
+        """Создает второй ингредиент."""
+        return Ingredient.objects.create(name="Сахар", measurement_unit="г")
+
+    @pytest.fixture
+    def second_tag(self):
+        """Создает второй тег."""
+        return Tag.objects.create(name="Ужин", slug="dinner")
+
+    def update(self, recipe, tags, ingredients):
+        """Обновляет рецепт и возвращает выполненные запросы на запись."""
+        data = {
+            "name": recipe.name,
+            "text": recipe.text,
+            "cooking_time": recipe.cooking_time,
+            "tags": tags,
+            "ingredients": ingredients,
+        }
+        serializer = RecipeCreateUpdateSerializer(instance=recipe, data=data)
+        assert serializer.is_valid(), serializer.errors
+        with CaptureQueriesContext(connection) as queries:
+            serializer.save()
+        return [
+            query["sql"]
+            for query in queries.captured_queries
+            if query["sql"].startswith(("INSERT", "UPDATE", "DELETE"))
+        ]
+
+    def test_unchanged_reordered_submission_without_writes(
+        self, recipe, tag, second_tag, ingredient, second_ingredient
+    ):
+        """Повторная отправка в другом порядке не пишет в базу."""
+        recipe.tags.add(second_tag)
+        IngredientInRecipe.objects.create(
+            recipe=recipe, ingredient=second_ingredient, amount=5
+        )
+        row_ids = set(recipe.recipe_ingredients.values_list("pk", flat=True))
+
+        writes = self.update(
+            recipe,
+            [second_tag.id, tag.id],
+            [
+                {"id": second_ingredient.id, "amount": 5},
+                {"id": ingredient.id, "amount": 100},
+            ],
+        )
+
+        assert writes == []
+        assert (
+            set(recipe.recipe_ingredients.values_list("pk", flat=True))
+            == row_ids
+        )
+
+    def test_changed_amount_updates_row_in_place(
+        self, recipe, tag, ingredient
+    ):
+        """Изменение количества обновляет существующую строку."""
+        row = recipe.recipe_ingredients.get()
+
+        writes = self.update(
+            recipe, [tag.id], [{"id": ingredient.id, "amount": 150}]
+        )
+
+        assert len(writes) == 1
+        assert writes[0].startswith("UPDATE")
+        row.refresh_from_db()
+        assert row.amount == 150
+
+    def test_added_and_removed_items(
+        self, recipe, tag, second_tag, ingredient, second_ingredient
+    ):
+        """Добавляются и удаляются только отличающиеся элементы."""
+        self.update(
+            recipe,
+            [second_tag.id],
+            [{"id": second_ingredient.id, "amount": 7}],
+        )
+
+        assert list(recipe.tags.all()) == [second_tag]
+        assert list(
+            recipe.recipe_ingredients.values_list("ingredient_id", "amount")
+        ) == [(second_ingredient.id, 7)]
+
+
 @pytest.mark.django_db
 class TestRecipeMinifiedSerializer:
     """Тесты минифицированного сериализатора рецептов."""
@@ -1,4 +1,7 @@
 """Тесты API для Foodgram."""
+import base64
+import json
+
 import pytest
 from apps.recipes.models import Favorite, Recipe, ShoppingCart
 from django.contrib.auth import get_user_model
@@ -9,6 +12,11 @@ from rest_framework import status
 User = get_user_model()
 
 
+def encode_cursor(values):
+    """Кодирует значения курсора так же, как KeysetPagination."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
 @pytest.mark.django_db
 class TestHealthCheck:
     """Тесты health check endpoint."""
@@ -351,6 +359,176 @@ class TestShoppingCartAPI:
         assert "200" in content  # количество
 
 
+@pytest.mark.django_db
+class TestRecipeFeedAPI:
+    """Тесты ленты рецептов подписок."""
+
+    @pytest.fixture
+    def feed_recipes(self, recipe, another_user, user):
+        """Создает рецепты автора, на которого подписан another_user."""
+        from apps.users.models import Subscription
+
+        Subscription.objects.create(user=another_user, author=user)
+        recipes = [recipe]
+        for index in range(7):
+            recipes.append(
+                Recipe.objects.create(
+                    author=user,
+                    name=f"Рецепт ленты {index}",
+                    text="Описание рецепта",
+                    cooking_time=10,
+                )
+            )
+        return recipes
+
+    def test_feed_requires_authentication(self, api_client):
+        """Лента доступна только аутентифицированным пользователям."""
+        response = api_client.get(reverse("api:v1:recipes-feed"))
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_feed_contains_only_subscriptions(
+        self, api_client, another_user, feed_recipes
+    ):
+        """Лента содержит рецепты авторов из подписок."""
+        Recipe.objects.create(
+            author=another_user,
+            name="Свой рецепт",
+            text="Описание",
+            cooking_time=5,
+        )
+        api_client.force_authenticate(user=another_user)
+
+        response = api_client.get(
+            reverse("api:v1:recipes-feed"), {"limit": 100}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        ids = [item["id"] for item in response.data["results"]]
+        assert sorted(ids) == sorted(recipe.id for recipe in feed_recipes)
+        assert all(
+            item["author"]["is_subscribed"]
+            for item in response.data["results"]
+        )
+
+    def test_feed_cursor_pagination(
+        self, api_client, another_user, feed_recipes
+    ):
+        """Страницы ленты идут по курсору в порядке -created."""
+        api_client.force_authenticate(user=another_user)
+
+        first = api_client.get(reverse("api:v1:recipes-feed"), {"limit": 5})
+        second = api_client.get(first.data["next"])
+
+        assert first.status_code == status.HTTP_200_OK
+        assert second.data["next"] is None
+        ids = [item["id"] for item in first.data["results"]] + [
+            item["id"] for item in second.data["results"]
+        ]
+        expected = Recipe.objects.filter(author=feed_recipes[0].author)
+        assert ids == list(expected.values_list("id", flat=True))
+
+
+@pytest.mark.django_db
+class TestUserCollectionsAPI:
+    """Тесты списков избранного и корзины пользователя."""
+
+    @pytest.fixture
+    def favorites(self, user, recipe):
+        """Добавляет в избранное пять рецептов с одинаковым временем."""
+        recipes = [recipe] + [
+            Recipe.objects.create(
+                author=user,
+                name=f"Избранный рецепт {index}",
+                text="Описание рецепта",
+                cooking_time=10,
+            )
+            for index in range(4)
+        ]
+        for item in reversed(recipes):
+            Favorite.objects.create(user=user, recipe=item)
+        Favorite.objects.filter(recipe__in=recipes[2:]).update(
+            created=Favorite.objects.get(recipe=recipes[2]).created
+        )
+        return recipes
+
+    def test_favorites_ordered_by_added(
+        self, api_client, user, favorites, django_assert_num_queries
+    ):
+        """Рецепты идут от последнего добавленного, одним запросом."""
+        api_client.force_authenticate(user=user)
+        url = reverse("api:v1:users-favorites")
+
+        with django_assert_num_queries(1):
+            response = api_client.get(url, {"limit": 100})
+
+        assert response.status_code == status.HTTP_200_OK
+        expected = Favorite.objects.filter(user=user).order_by(
+            "-created", "-id"
+        )
+        assert [item["id"] for item in response.data["results"]] == [
+            favorite.recipe_id for favorite in expected
+        ]
+        assert set(response.data["results"][0]) == {
+            "id",
+            "name",
+            "image",
+            "image_thumb",
+            "image_srcset",
+            "image_preview",
+            "cooking_time",
+        }
+
+    def test_favorites_keyset_pages(self, api_client, user, favorites):
+        """Курсор (created, id) не теряет и не повторяет записи."""
+        api_client.force_authenticate(user=user)
+        url = reverse("api:v1:users-favorites")
+
+        ids = []
+        response = api_client.get(url, {"limit": 2})
+        while True:
+            ids.extend(item["id"] for item in response.data["results"])
+            if response.data["next"] is None:
+                break
+            response = api_client.get(response.data["next"])
+
+        assert sorted(ids) == sorted(recipe.id for recipe in favorites)
+        assert len(ids) == len(set(ids))
+
+    @pytest.mark.parametrize(
+        "cursor",
+        [
+            "broken",
+            encode_cursor({"created": "1"}),
+            encode_cursor(["garbage", "1"]),
+            encode_cursor(["2026-01-01T00:00:00", "x"]),
+            encode_cursor([None, None]),
+            encode_cursor(["2026-01-01T00:00:00"]),
+        ],
+    )
+    @pytest.mark.parametrize(
+        "url_name", ["api:v1:users-shopping-cart", "api:v1:users-favorites"]
+    )
+    def test_invalid_cursor(self, authenticated_client, url_name, cursor):
+        """Неверный курсор возвращает 404."""
+        response = authenticated_client.get(
+            reverse(url_name), {"cursor": cursor}
+        )
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_shopping_cart_list(self, authenticated_client, user, recipe):
+        """Список покупок пользователя."""
+        ShoppingCart.objects.create(user=user, recipe=recipe)
+
+        response = authenticated_client.get(
+            reverse("api:v1:users-shopping-cart")
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [item["id"] for item in response.data["results"]] == [recipe.id]
+
+
 @pytest.mark.django_db
 class TestAPIVersioning:
     """Тесты версионирования API."""
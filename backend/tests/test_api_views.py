@@ -171,3 +171,133 @@ class TestAuthenticationEdgeCases:
         api_client.credentials(HTTP_AUTHORIZATION="Token invalid_token_here")
         response = api_client.get("/api/v1/users/me/")
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+class TestCollectionSingleStatement:
+    """Тесты идемпотентного добавления/удаления одним запросом."""
+
+    def test_insert_ignore_conflicts(self, user, recipe):
+        """Повторная вставка не создает дубликат и не падает."""
+        from apps.api.utils import insert_ignore_conflicts
+        from apps.recipes.models import Favorite
+
+        assert insert_ignore_conflicts(Favorite, user=user, recipe=recipe)
+        assert not insert_ignore_conflicts(Favorite, user=user, recipe=recipe)
+        assert Favorite.objects.filter(user=user, recipe=recipe).count() == 1
+
+    def test_remove_favorite_single_query(
+        self, api_client, user, recipe, django_assert_num_queries
+    ):
+        """Удаление из избранного выполняется одним DELETE."""
+        from apps.recipes.models import Favorite
+
+        Favorite.objects.create(user=user, recipe=recipe)
+        api_client.force_authenticate(user=user)
+        with django_assert_num_queries(1):
+            response = api_client.delete(
+                f"/api/v1/recipes/{recipe.id}/favorite/"
+            )
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    def test_remove_favorite_missing_recipe(self, authenticated_client):
+        """Удаление несуществующего рецепта возвращает 404."""
+        response = authenticated_client.delete(
+            "/api/v1/recipes/999999/favorite/"
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_unsubscribe_missing_author(self, authenticated_client):
+        """Отписка от несуществующего автора возвращает 404."""
+        response = authenticated_client.delete(
+            "/api/v1/users/999999/subscribe/"
+        )
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_subscribe_error_message_kept(
+        self, authenticated_client, subscription, another_user
+    ):
+        """Повторная подписка сохраняет прежнее сообщение об ошибке."""
+        response = authenticated_client.post(
+            f"/api/v1/users/{another_user.id}/subscribe/"
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert (
+            response.data["errors"] == "Вы уже подписаны на этого пользователя"
+        )
+
+
+@pytest.mark.django_db
+class TestSubscriptionsRecipesLimit:
+    """Тесты ограничения рецептов в списке подписок."""
+
+    @pytest.fixture
+    def authors(self, user, recipe):
+        """Создает авторов с рецептами, на которых подписан user."""
+        from apps.recipes.models import Recipe
+        from apps.users.models import Subscription
+
+        authors = []
+        for index in range(3):
+            author = User.objects.create_user(
+                username=f"author{index}",
+                email=f"author{index}@example.com",
+                first_name="Author",
+                last_name="User",
+                password="authorpass123",
+            )
+            for number in range(4):
+                Recipe.objects.create(
+                    author=author,
+                    name=f"Рецепт {index}-{number}",
+                    image=recipe.image.name,
+                    text="Описание",
+                    cooking_time=10,
+                )
+            Subscription.objects.create(user=user, author=author)
+            authors.append(author)
+        return authors
+
+    def test_recipes_limit_applied(self, authenticated_client, authors):
+        """В ответе не больше recipes_limit рецептов на автора."""
+        response = authenticated_client.get(
+            "/api/v1/users/subscriptions/?recipes_limit=2"
+        )
+        assert response.status_code == status.HTTP_200_OK
+        for author in response.data["results"]:
+            assert len(author["recipes"]) == 2
+            assert author["recipes_count"] == 4
+            assert author["is_subscribed"] is True
+
+    def test_recipes_limit_keeps_latest(self, authenticated_client, authors):
+        """Отбираются самые свежие рецепты автора."""
+        response = authenticated_client.get(
+            "/api/v1/users/subscriptions/?recipes_limit=1"
+        )
+        latest = authors[0].recipes.first()
+        result = next(
+            item
+            for item in response.data["results"]
+            if item["id"] == authors[0].id
+        )
+        assert [item["id"] for item in result["recipes"]] == [latest.id]
+
+    def test_constant_number_of_queries(
+        self, authenticated_client, authors, user
+    ):
+        """Количество запросов не зависит от числа авторов и лимита."""
+        from apps.users.models import Subscription
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        url = "/api/v1/users/subscriptions/?recipes_limit={}"
+        # Первый запрос кеширует токен, дальше аутентификация без SQL
+        authenticated_client.get(url.format(3))
+        with CaptureQueriesContext(connection) as many:
+            authenticated_client.get(url.format(3))
+
+        Subscription.objects.filter(user=user, author__in=authors[1:]).delete()
+        with CaptureQueriesContext(connection) as single:
+            authenticated_client.get(url.format(1))
+
+        assert len(many.captured_queries) == len(single.captured_queries)
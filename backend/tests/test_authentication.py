@@ -0,0 +1,407 @@
+"""Тесты аутентификации по токену с кешированием."""
+import pytest
+from apps.api import authentication
+from apps.api.authentication import local_cache, token_cache_key
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from foodgram.constants import ACCESS_TOKEN_LIFETIME
+from rest_framework import status
+
+User = get_user_model()
+
+# Сообщение TokenAuthentication в переводе LANGUAGE_CODE = "ru"
+INACTIVE_MESSAGE = "Пользователь неактивен или удален."
+
+
+def user_queries(queries):
+    """Запросы к таблице пользователей."""
+    return [
+        query
+        for query in queries.captured_queries
+        if 'FROM "users_user"' in query["sql"]
+    ]
+
+
+def token_queries(queries):
+    """Запросы к таблице токенов."""
+    return [
+        query
+        for query in queries.captured_queries
+        if "authtoken_token" in query["sql"]
+    ]
+
+
+@pytest.fixture
+def me_url():
+    """URL текущего пользователя."""
+    return reverse("api:v1:users-me")
+
+
+@pytest.mark.django_db
+class TestCachedTokenAuthentication:
+    """Тесты двухуровневого кеша токенов."""
+
+    def test_token_cached_after_first_request(
+        self, authenticated_client, me_url, user
+    ):
+        """Повторные запросы не читают токен из базы."""
+        authenticated_client.get(me_url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.get(me_url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["id"] == user.id
+        assert token_queries(queries) == []
+
+    def test_shared_cache_used_by_other_processes(
+        self, authenticated_client, me_url, user_token
+    ):
+        """Без локального кеша снимок берется из общего кеша."""
+        authenticated_client.get(me_url)
+        local_cache.clear()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.get(me_url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert token_queries(queries) == []
+        assert cache.get(token_cache_key(user_token.key)) is not None
+
+    def test_snapshot_has_no_password(self, authenticated_client, me_url):
+        """Хеш пароля и сам токен не попадают в общий кеш."""
+        authenticated_client.get(me_url)
+
+        token = authenticated_client._credentials["HTTP_AUTHORIZATION"]
+        snapshot = cache.get(token_cache_key(token.split()[1]))
+        assert "password" not in snapshot["user"]
+        assert token.split()[1] not in token_cache_key(token.split()[1])
+
+    def test_invalid_token_not_cached(self, api_client, me_url):
+        """Неизвестный токен отклоняется и не кешируется."""
+        api_client.credentials(HTTP_AUTHORIZATION="Token " + "0" * 40)
+
+        response = api_client.get(me_url)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert cache.get(token_cache_key("0" * 40)) is None
+
+    def test_logout_invalidates_cache(self, authenticated_client, me_url):
+        """После выхода токен сразу перестает действовать."""
+        authenticated_client.get(me_url)
+
+        response = authenticated_client.post(
+            reverse("api:v1:logout"), format="json"
+        )
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+        response = authenticated_client.get(me_url)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_set_password_with_cached_user(
+        self, authenticated_client, me_url, user
+    ):
+        """Смена пароля работает с пользователем из кеша."""
+        url = reverse("api:v1:users-set-password")
+        authenticated_client.get(me_url)
+
+        response = authenticated_client.post(
+            url,
+            {"current_password": "testpass123", "new_password": "Newpass123"},
+            format="json",
+        )
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+
+        authenticated_client.get(me_url)
+        response = authenticated_client.post(
+            url,
+            {"current_password": "Newpass123", "new_password": "Other12345"},
+            format="json",
+        )
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        user.refresh_from_db()
+        assert user.check_password("Other12345")
+
+    def test_deactivated_user_rejected(
+        self, authenticated_client, me_url, user
+    ):
+        """Деактивация пользователя сбрасывает кеш."""
+        authenticated_client.get(me_url)
+
+        user.is_active = False
+        user.save()
+        response = authenticated_client.get(me_url)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.data["detail"] == INACTIVE_MESSAGE
+
+    def test_inactive_snapshot_rejected(
+        self, authenticated_client, me_url, user_token
+    ):
+        """Неактивный пользователь из кеша отклоняется так же, как из базы."""
+        authenticated_client.get(me_url)
+        key = token_cache_key(user_token.key)
+        snapshot = cache.get(key)
+        snapshot["user"]["is_active"] = False
+        cache.set(key, snapshot)
+        local_cache.clear()
+
+        response = authenticated_client.get(me_url)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.data["detail"] == INACTIVE_MESSAGE
+
+    def test_cached_user_fields_loaded_once(
+        self, authenticated_client, me_url, user
+    ):
+        """Поля пользователя из кеша читаются одним запросом."""
+        authenticated_client.get(me_url)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.get(me_url)
+
+        assert response.data["email"] == user.email
+        assert len(user_queries(queries)) == 1
+
+    def test_stale_snapshot_not_saved(
+        self, authenticated_client, me_url, user
+    ):
+        """Сохранение пользователя из кеша не затирает новые данные."""
+        authenticated_client.get(me_url)
+        User.objects.filter(pk=user.pk).update(
+            first_name="Обновлено", last_name="Через update"
+        )
+
+        response = authenticated_client.put(
+            reverse("api:v1:users-notifications"),
+            {"notification_mode": "digest"},
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        user.refresh_from_db()
+        assert user.first_name == "Обновлено"
+        assert user.last_name == "Через update"
+        assert user.notification_mode == User.NotificationMode.DIGEST
+
+    def test_login_keeps_cache(self, authenticated_client, me_url, user_token):
+        """Обновление last_login при входе не сбрасывает кеш."""
+        authenticated_client.get(me_url)
+
+        response = authenticated_client.post(
+            reverse("api:v1:login"),
+            {"email": "test@example.com", "password": "testpass123"},
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert cache.get(token_cache_key(user_token.key)) is not None
+
+    def test_local_cache_expires(
+        self, authenticated_client, me_url, user_token, monkeypatch
+    ):
+        """Локальный кеш живет не дольше TOKEN_LOCAL_CACHE_TTL."""
+        authenticated_client.get(me_url)
+        cache.delete(token_cache_key(user_token.key))
+
+        later = authentication.time.monotonic() + local_cache.ttl + 1
+        monkeypatch.setattr(authentication.time, "monotonic", lambda: later)
+        with CaptureQueriesContext(connection) as queries:
+            authenticated_client.get(me_url)
+
+        assert len(token_queries(queries)) == 1
+
+
+def bearer(client, access_token):
+    """Клиент с токеном доступа в заголовке."""
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+    return client
+
+
+@pytest.mark.django_db
+class TestSignedAccessTokens:
+    """Тесты подписанных токенов доступа."""
+
+    def login(self, client, email="test@example.com", password="testpass123"):
+        """Вход через эндпоинт токенов доступа."""
+        return client.post(
+            reverse("api:v1:access-token"),
+            {"email": email, "password": password},
+            format="json",
+        )
+
+    def test_login_issues_both_tokens(self, api_client, user, user_token):
+        """Вход возвращает токен authtoken и токен доступа."""
+        response = self.login(api_client)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["auth_token"] == user_token.key
+        assert response.data["expires_in"] == 300
+        assert response.data["access_token"]
+
+    def test_wrong_password_rejected(self, api_client, user):
+        """С неверным паролем токены не выдаются."""
+        response = self.login(api_client, password="wrong")
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_access_token_authenticates(self, api_client, me_url, user):
+        """Токен доступа аутентифицирует пользователя."""
+        access = self.login(api_client).data["access_token"]
+
+        response = bearer(api_client, access).get(me_url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["id"] == user.id
+
+    def test_read_endpoint_without_auth_queries(
+        self, api_client, authenticated_client, user, recipe
+    ):
+        """Список рецептов не читает ни токен, ни пользователя."""
+        url = reverse("api:v1:recipes-list")
+        authenticated_client.get(url)
+        with CaptureQueriesContext(connection) as cached:
+            authenticated_client.get(url)
+
+        access = self.login(api_client).data["access_token"]
+        with CaptureQueriesContext(connection) as signed:
+            response = bearer(api_client, access).get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert token_queries(signed) == []
+        assert user_queries(signed) == []
+        assert len(signed.captured_queries) == len(cached.captured_queries)
+
+    def test_me_in_one_user_query(self, api_client, me_url, user):
+        """Профиль по токену доступа загружает поля одним запросом."""
+        access = self.login(api_client).data["access_token"]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = bearer(api_client, access).get(me_url)
+
+        assert response.data["email"] == user.email
+        assert len(user_queries(queries)) == 1
+
+    def test_deleted_user_rejected(self, api_client, me_url, user):
+        """Токен удаленного пользователя отклоняется."""
+        access = self.login(api_client).data["access_token"]
+        user.delete()
+
+        response = bearer(api_client, access).get(me_url)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.data["detail"] == INACTIVE_MESSAGE
+
+    def test_deactivated_user_until_expiry(
+        self, api_client, me_url, user, user_token, monkeypatch
+    ):
+        """Деактивация действует на токен доступа с его истечением."""
+        access = self.login(api_client).data["access_token"]
+        user.is_active = False
+        user.save()
+
+        response = bearer(api_client, access).get(me_url)
+        assert response.status_code == status.HTTP_200_OK
+
+        api_client.credentials()
+        response = api_client.post(
+            reverse("api:v1:access-token-refresh"),
+            {"auth_token": user_token.key},
+            format="json",
+        )
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        later = signing.time.time() + ACCESS_TOKEN_LIFETIME + 1
+        monkeypatch.setattr(signing.time, "time", lambda: later)
+        response = bearer(api_client, access).get(me_url)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_save_after_demotion_keeps_flags(self, api_client, admin_user):
+        """Сохранение пользователя не возвращает снятые права."""
+        access = self.login(
+            api_client, email="admin@example.com", password="adminpass123"
+        ).data["access_token"]
+        User.objects.filter(pk=admin_user.pk).update(
+            is_staff=False, is_superuser=False
+        )
+
+        response = bearer(api_client, access).put(
+            reverse("api:v1:users-notifications"),
+            {"notification_mode": "digest"},
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        admin_user.refresh_from_db()
+        assert not admin_user.is_staff
+        assert not admin_user.is_superuser
+
+    def test_staff_flags_from_database(self, api_client, admin_user):
+        """Права администратора берутся из базы."""
+        access = self.login(
+            api_client, email="admin@example.com", password="adminpass123"
+        ).data["access_token"]
+
+        response = bearer(api_client, access).get(
+            reverse("api:v1:recipes-export-recipes")
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_tampered_token_rejected(self, api_client, me_url, user):
+        """Токен с измененной подписью отклоняется."""
+        access = self.login(api_client).data["access_token"]
+
+        response = bearer(api_client, access[:-1] + "x").get(me_url)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response["WWW-Authenticate"] == "Token"
+
+    def test_expired_token_rejected(
+        self, api_client, me_url, user, monkeypatch
+    ):
+        """Токен доступа действует ACCESS_TOKEN_LIFETIME секунд."""
+        access = self.login(api_client).data["access_token"]
+
+        later = signing.time.time() + 301
+        monkeypatch.setattr(signing.time, "time", lambda: later)
+        response = bearer(api_client, access).get(me_url)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.data["detail"] == (
+            "Срок действия токена доступа истек."
+        )
+
+    def test_refresh(self, api_client, me_url, user_token):
+        """Новый токен доступа выдается по токену authtoken."""
+        response = api_client.post(
+            reverse("api:v1:access-token-refresh"),
+            {"auth_token": user_token.key},
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        response = bearer(api_client, response.data["access_token"]).get(
+            me_url
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_refresh_after_logout_rejected(
+        self, authenticated_client, api_client, user_token
+    ):
+        """После выхода токен доступа не обновляется."""
+        key = user_token.key
+        authenticated_client.post(reverse("api:v1:logout"), format="json")
+        api_client.credentials()
+
+        response = api_client.post(
+            reverse("api:v1:access-token-refresh"),
+            {"auth_token": key},
+            format="json",
+        )
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -0,0 +1,177 @@
+"""Тесты прямой загрузки изображений в хранилище по подписанному URL."""
+from io import BytesIO
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from apps.recipes.models import Recipe, StagedRecipeImage
+from django.urls import reverse
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from .conftest import S3_BUCKET as BUCKET
+
+
+def make_png():
+    """Байты PNG-изображения."""
+    buffer = BytesIO()
+    Image.new("RGB", (40, 30), "green").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def presign(client, kind="recipe", content_type="image/png", size=100):
+    """Запрашивает подписанный URL загрузки."""
+    return client.post(
+        reverse("api:v1:users-uploads"),
+        {"kind": kind, "content_type": content_type, "size": size},
+        format="json",
+    )
+
+
+def upload(s3, client, kind="recipe"):
+    """Загружает PNG в хранилище так, как это сделал бы браузер."""
+    data = make_png()
+    key = presign(client, kind=kind, size=len(data)).data["key"]
+    s3.put_object(
+        Bucket=BUCKET, Key=f"media/{key}", Body=data, ContentType="image/png"
+    )
+    return key
+
+
+@pytest.mark.django_db
+class TestDirectUpload:
+    """Тесты выдачи подписанных URL и приема ключей загрузки."""
+
+    def test_presigned_url_issued(self, authenticated_client, user, s3):
+        """Ключ лежит в каталоге пользователя, URL подписан на PUT."""
+        response = presign(authenticated_client)
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data["key"].startswith(f"uploads/recipe/{user.pk}/")
+        assert response.data["key"].endswith(".png")
+        assert response.data["method"] == "PUT"
+        query = parse_qs(urlparse(response.data["url"]).query)
+        assert query["X-Amz-Algorithm"] == ["AWS4-HMAC-SHA256"]
+        assert set(query["X-Amz-SignedHeaders"][0].split(";")) >= {
+            "content-length",
+            "content-type",
+        }
+        assert response.data["headers"] == {
+            "Content-Type": "image/png",
+            "Content-Length": 100,
+        }
+
+    def test_presign_rejects_non_images(self, authenticated_client, s3):
+        """Подписать можно только изображения допустимого размера."""
+        response = presign(authenticated_client, content_type="text/html")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = presign(authenticated_client, size=100 * 1024 * 1024)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_presign_requires_s3_storage(self, authenticated_client):
+        """Без MinIO прямая загрузка недоступна."""
+        response = presign(authenticated_client)
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_recipe_created_from_key(
+        self,
+        authenticated_client,
+        recipe_data,
+        s3,
+        django_capture_on_commit_callbacks,
+    ):
+        """Рецепт с ключом загрузки получает изображение в фоне."""
+        key = upload(s3, authenticated_client)
+        del recipe_data["image"]
+        recipe_data["image_key"] = key
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = authenticated_client.post(
+                reverse("api:v1:recipes-list"), recipe_data, format="json"
+            )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        recipe = Recipe.objects.get(pk=response.data["id"])
+        assert recipe.image_status == Recipe.ImageStatus.READY
+        assert recipe.image.name.startswith("recipes/")
+        s3.head_object(Bucket=BUCKET, Key=f"media/{recipe.image.name}")
+        listed = s3.list_objects_v2(Bucket=BUCKET, Prefix="media/uploads/")
+        assert listed["KeyCount"] == 0
+
+    def test_object_deleted_before_processing(
+        self,
+        authenticated_client,
+        recipe_data,
+        s3,
+        django_capture_on_commit_callbacks,
+    ):
+        """Если объект удален до обработки, изображение помечается ошибкой."""
+        key = upload(s3, authenticated_client)
+        del recipe_data["image"]
+        recipe_data["image_key"] = key
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            response = authenticated_client.post(
+                reverse("api:v1:recipes-list"), recipe_data, format="json"
+            )
+        s3.delete_object(Bucket=BUCKET, Key=f"media/{key}")
+        for callback in callbacks:
+            callback()
+
+        recipe = Recipe.objects.get(pk=response.data["id"])
+        assert recipe.image_status == Recipe.ImageStatus.FAILED
+        assert not StagedRecipeImage.objects.exists()
+
+    def test_missing_key_rejected(self, authenticated_client, recipe_data, s3):
+        """Ключ без загруженного объекта отклоняется."""
+        key = presign(authenticated_client).data["key"]
+        del recipe_data["image"]
+        recipe_data["image_key"] = key
+
+        response = authenticated_client.post(
+            reverse("api:v1:recipes-list"), recipe_data, format="json"
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data["image_key"] == ["Загруженный файл не найден."]
+
+    def test_foreign_key_rejected(
+        self, authenticated_client, another_user, recipe_data, s3
+    ):
+        """Нельзя использовать ключ из загрузок другого пользователя."""
+        other_client = APIClient()
+        other_client.force_authenticate(another_user)
+        key = upload(s3, other_client)
+        del recipe_data["image"]
+        recipe_data["image_key"] = key
+
+        response = authenticated_client.post(
+            reverse("api:v1:recipes-list"), recipe_data, format="json"
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "image_key" in response.data
+
+    def test_avatar_set_from_key(self, authenticated_client, user, s3):
+        """Аватар переносится из загрузок в постоянное хранилище."""
+        key = upload(s3, authenticated_client, kind="avatar")
+
+        response = authenticated_client.put(
+            reverse("api:v1:users-avatar"), {"avatar_key": key}, format="json"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        user.refresh_from_db()
+        assert user.avatar.name.startswith("avatars/")
+        listed = s3.list_objects_v2(Bucket=BUCKET, Prefix="media/uploads/")
+        assert listed["KeyCount"] == 0
+
+    def test_avatar_requires_single_source(self, authenticated_client, s3):
+        """Без изображения и ключа аватар не устанавливается."""
+        response = authenticated_client.put(
+            reverse("api:v1:users-avatar"), {}, format="json"
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
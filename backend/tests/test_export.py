@@ -0,0 +1,117 @@
+"""Тесты потоковой выгрузки рецептов."""
+import gzip
+import json
+from datetime import timedelta
+
+import pytest
+from apps.recipes.exporter import export_recipes
+from apps.recipes.models import IngredientInRecipe, Recipe
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def recipes(user, tag, ingredient):
+    """Создает пять рецептов с ингредиентом и тегом."""
+    recipes = []
+    for index in range(5):
+        recipe = Recipe.objects.create(
+            author=user,
+            name=f"Рецепт {index}",
+            text="Описание",
+            cooking_time=10 + index,
+        )
+        recipe.tags.add(tag)
+        IngredientInRecipe.objects.create(
+            recipe=recipe, ingredient=ingredient, amount=index + 1
+        )
+        recipes.append(recipe)
+    return recipes
+
+
+def read_lines(stream):
+    """Разбирает поток JSON Lines."""
+    return [json.loads(line) for line in b"".join(stream).splitlines()]
+
+
+@pytest.mark.django_db
+class TestRecipeExport:
+    """Тесты выгрузки рецептов."""
+
+    def test_records_with_ingredients_and_tags(self, recipes, tag, ingredient):
+        """Каждая строка содержит рецепт с ингредиентами и тегами."""
+        records = read_lines(export_recipes())
+
+        assert [record["id"] for record in records] == [
+            recipe.id for recipe in recipes
+        ]
+        assert records[2]["tags"] == [
+            {"id": tag.id, "name": tag.name, "slug": tag.slug}
+        ]
+        assert records[2]["ingredients"] == [
+            {
+                "id": ingredient.id,
+                "name": ingredient.name,
+                "measurement_unit": ingredient.measurement_unit,
+                "amount": 3,
+            }
+        ]
+
+    def test_queries_grouped_per_chunk(
+        self, recipes, django_assert_num_queries
+    ):
+        """Ингредиенты и теги загружаются двумя запросами на пачку."""
+        with django_assert_num_queries(1 + 2 * 3):
+            records = read_lines(export_recipes(chunk_size=2))
+
+        assert len(records) == 5
+
+    def test_since_and_gzip(self, recipes):
+        """Инкрементальная выгрузка сжимается в gzip."""
+        Recipe.objects.filter(
+            pk__in=[recipe.pk for recipe in recipes[:3]]
+        ).update(created=timezone.now() - timedelta(days=10))
+
+        compressed = b"".join(
+            export_recipes(
+                since=timezone.now() - timedelta(days=1), compress=True
+            )
+        )
+        records = read_lines([gzip.decompress(compressed)])
+
+        assert [record["id"] for record in records] == [
+            recipes[3].id,
+            recipes[4].id,
+        ]
+
+    def test_command(self, recipes, tmp_path):
+        """Команда пишет выгрузку в файл."""
+        path = tmp_path / "recipes.jsonl.gz"
+
+        call_command("export_recipes", output=str(path), gzip=True)
+
+        with gzip.open(path) as output:
+            assert len(read_lines(output)) == 5
+
+    def test_api_staff_only(self, recipes, authenticated_client, admin_user):
+        """Выгрузка через API доступна только персоналу."""
+        url = reverse("api:v1:recipes-export-recipes")
+        assert (
+            authenticated_client.get(url).status_code
+            == status.HTTP_403_FORBIDDEN
+        )
+
+        client = APIClient()
+        client.force_authenticate(admin_user)
+        response = client.get(url, {"since": "2000-01-01"})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response["Content-Type"] == "application/x-ndjson"
+        assert len(read_lines(response.streaming_content)) == 5
+        assert (
+            client.get(url, {"since": "вчера"}).status_code
+            == status.HTTP_400_BAD_REQUEST
+        )
@@ -0,0 +1,112 @@
+"""Тесты материализованных лент подписок."""
+import pytest
+from apps.recipes.feed import (
+    backfill_timeline,
+    fanout_recipe,
+    timeline_queryset,
+    trim_timeline,
+)
+from apps.recipes.models import FeedEntry, Recipe
+from apps.users.models import Subscription
+from django.urls import reverse
+from rest_framework import status
+
+
+@pytest.fixture
+def fanout_settings(settings):
+    """Включает материализованные ленты."""
+    settings.FEED_FANOUT_ENABLED = True
+    settings.FEED_FANOUT_MAX_FOLLOWERS = 10
+    settings.FEED_BACKFILL_LIMIT = 10
+    return settings
+
+
+@pytest.mark.django_db
+class TestFanout:
+    """Тесты раскладки рецептов по лентам."""
+
+    def test_fanout_creates_entries(self, recipe, another_user):
+        """Рецепт попадает в ленты подписчиков автора."""
+        Subscription.objects.create(user=another_user, author=recipe.author)
+
+        assert fanout_recipe(recipe.id) == 1
+
+        recipe.refresh_from_db()
+        assert recipe.fanned_out
+        assert FeedEntry.objects.filter(
+            user=another_user, recipe=recipe
+        ).exists()
+
+    def test_fanout_skips_popular_authors(
+        self, fanout_settings, recipe, another_user
+    ):
+        """Рецепты популярных авторов подмешиваются при чтении."""
+        fanout_settings.FEED_FANOUT_MAX_FOLLOWERS = 0
+        Subscription.objects.create(user=another_user, author=recipe.author)
+
+        assert fanout_recipe(recipe.id) == 0
+
+        recipe.refresh_from_db()
+        assert not recipe.fanned_out
+        assert not FeedEntry.objects.exists()
+        assert list(timeline_queryset(another_user)) == [recipe]
+
+    def test_backfill_and_trim(self, recipe, another_user):
+        """Подписка заполняет ленту, отписка очищает ее."""
+        fanout_recipe(recipe.id)
+        Subscription.objects.create(user=another_user, author=recipe.author)
+
+        backfill_timeline(another_user.id, recipe.author_id)
+        assert list(timeline_queryset(another_user)) == [recipe]
+
+        Subscription.objects.filter(user=another_user).delete()
+        trim_timeline(another_user.id, recipe.author_id)
+        assert not timeline_queryset(another_user).exists()
+
+
+@pytest.mark.django_db
+class TestFanoutAPI:
+    """Тесты лент через API."""
+
+    def test_create_recipe_fans_out(
+        self,
+        fanout_settings,
+        authenticated_client,
+        recipe_data,
+        user,
+        another_user,
+        django_capture_on_commit_callbacks,
+    ):
+        """Созданный рецепт раскладывается после коммита транзакции."""
+        Subscription.objects.create(user=another_user, author=user)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = authenticated_client.post(
+                reverse("api:v1:recipes-list"), recipe_data, format="json"
+            )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        recipe = Recipe.objects.get(name=recipe_data["name"])
+        assert FeedEntry.objects.filter(
+            user=another_user, recipe=recipe
+        ).exists()
+
+    def test_feed_reads_timeline(
+        self, fanout_settings, api_client, recipe, another_user
+    ):
+        """Лента отдает рецепты из материализованной ленты."""
+        fanout_recipe(recipe.id)
+        api_client.force_authenticate(user=another_user)
+
+        response = api_client.post(
+            reverse("api:v1:users-subscribe", kwargs={"id": recipe.author_id})
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+        response = api_client.get(reverse("api:v1:recipes-feed"))
+        assert [item["id"] for item in response.data["results"]] == [recipe.id]
+
+        api_client.delete(
+            reverse("api:v1:users-subscribe", kwargs={"id": recipe.author_id})
+        )
+        assert not FeedEntry.objects.filter(user=another_user).exists()
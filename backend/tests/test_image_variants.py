@@ -0,0 +1,328 @@
+"""Тесты уменьшенных копий и WebP-вариантов изображений."""
+import base64
+from io import BytesIO, StringIO
+
+import pytest
+from apps.recipes import uploads
+from apps.recipes.models import Favorite, Recipe, StagedRecipeImage
+from apps.recipes.uploads import process_staged_image, stage_recipe_image
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.urls import reverse
+from foodgram import images
+from PIL import Image
+from rest_framework import status
+
+
+def make_jpeg(width=1000, height=600):
+    """Байты JPEG-изображения заданного размера."""
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), "orange").save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def photo_recipe(user, media_tmp):
+    """Рецепт с изображением 1000x600."""
+    recipe = Recipe(author=user, name="Фото", text="Описание", cooking_time=5)
+    recipe.image.save("photo.jpg", ContentFile(make_jpeg()))
+    return recipe
+
+
+@pytest.mark.django_db
+class TestImageVariants:
+    """Тесты создания вариантов изображений."""
+
+    def test_variants_created_on_save(self, photo_recipe, media_tmp):
+        """Для каждого размера сохраняются JPEG и WebP."""
+        photo_recipe.refresh_from_db()
+        variants = photo_recipe.image_variants
+
+        assert variants["source"] == photo_recipe.image.name
+        assert [
+            (size["name"], size["width"]) for size in variants["sizes"]
+        ] == [
+            ("thumb", 320),
+            ("medium", 800),
+        ]
+        thumb = variants["sizes"][0]
+        with Image.open(media_tmp / thumb["file"]) as image:
+            assert image.format == "JPEG"
+            assert image.size == (320, 192)
+        with Image.open(media_tmp / thumb["webp"]) as image:
+            assert image.format == "WEBP"
+
+    def test_unchanged_image_not_reprocessed(self, photo_recipe, monkeypatch):
+        """Повторное сохранение с тем же изображением не создает варианты."""
+
+        def fail_generate(field_file):
+            raise AssertionError("варианты не должны пересоздаваться")
+
+        monkeypatch.setattr(images, "generate_variants", fail_generate)
+        photo_recipe.name = "Новое название"
+        photo_recipe.save()
+
+    def test_recipe_without_image(self, user):
+        """Рецепт без изображения не имеет вариантов."""
+        recipe = Recipe.objects.create(
+            author=user, name="Без фото", text="Описание", cooking_time=5
+        )
+
+        assert recipe.image_variants == {}
+
+    def test_recipe_api_exposes_variants(self, api_client, photo_recipe):
+        """API рецепта отдает URL миниатюры и srcset WebP-вариантов."""
+        response = api_client.get(
+            reverse("api:v1:recipes-detail", kwargs={"pk": photo_recipe.pk})
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        thumb_file = photo_recipe.image_variants["sizes"][0]["file"]
+        assert response.data["image_thumb"].endswith(thumb_file)
+        thumb, medium = response.data["image_srcset"].split(", ")
+        assert thumb.startswith("http://testserver/")
+        assert thumb.endswith(".webp 320w")
+        assert medium.endswith(".webp 800w")
+
+    def test_avatar_variants(
+        self,
+        authenticated_client,
+        user,
+        media_tmp,
+        django_capture_on_commit_callbacks,
+    ):
+        """Варианты аватара создаются задачей после фиксации транзакции."""
+        avatar = (
+            "data:image/jpeg;base64,"
+            + base64.b64encode(make_jpeg(400, 400)).decode()
+        )
+        with django_capture_on_commit_callbacks() as callbacks:
+            authenticated_client.put(
+                reverse("api:v1:users-avatar"),
+                {"avatar": avatar},
+                format="json",
+            )
+
+        user.refresh_from_db()
+        assert user.avatar
+        assert user.image_variants == {}
+        assert len(callbacks) == 1
+
+        callbacks[0]()
+        response = authenticated_client.get(
+            reverse("api:v1:users-detail", kwargs={"id": user.id})
+        )
+
+        assert response.data["avatar_thumb"].endswith(".jpg")
+        assert response.data["avatar_srcset"].endswith(".webp 400w")
+
+    def test_avatar_removal_clears_variants(
+        self,
+        authenticated_client,
+        user,
+        media_tmp,
+        django_capture_on_commit_callbacks,
+    ):
+        """Удаление аватара сразу очищает варианты без задачи."""
+        with django_capture_on_commit_callbacks(execute=True):
+            user.avatar.save("avatar.jpg", ContentFile(make_jpeg(400, 400)))
+        user.refresh_from_db()
+        assert user.image_variants["sizes"]
+
+        with django_capture_on_commit_callbacks() as callbacks:
+            authenticated_client.delete(reverse("api:v1:users-avatar"))
+
+        user.refresh_from_db()
+        assert user.image_variants == {}
+        assert not callbacks
+
+
+@pytest.mark.django_db
+class TestImagePreview:
+    """Тесты встроенных превью изображений."""
+
+    def test_preview_created_with_variants(self, photo_recipe):
+        """Превью - маленький JPEG в виде data URL."""
+        preview = photo_recipe.image_variants["preview"]
+
+        assert preview.startswith("data:image/jpeg;base64,")
+        data = base64.b64decode(preview.split(",", 1)[1])
+        assert len(data) < 1024
+        with Image.open(BytesIO(data)) as image:
+            assert image.size == (16, 10)
+
+    def test_preview_in_api(self, api_client, photo_recipe, user):
+        """Превью отдается в полном и минифицированном рецепте."""
+        response = api_client.get(
+            reverse("api:v1:recipes-detail", kwargs={"pk": photo_recipe.pk})
+        )
+        assert response.data["image_preview"] == (
+            photo_recipe.image_variants["preview"]
+        )
+
+        Favorite.objects.create(user=user, recipe=photo_recipe)
+        api_client.force_authenticate(user)
+        response = api_client.get(reverse("api:v1:users-favorites"))
+        assert response.data["results"][0]["image_preview"].startswith(
+            "data:image/jpeg;base64,"
+        )
+
+    def test_no_preview_without_image(self, api_client, recipe):
+        """Пока изображение не обработано, превью нет."""
+        Recipe.objects.filter(pk=recipe.pk).update(image_variants={})
+
+        response = api_client.get(
+            reverse("api:v1:recipes-detail", kwargs={"pk": recipe.pk})
+        )
+
+        assert response.data["image_preview"] is None
+
+    def test_backfill_command(self, photo_recipe, monkeypatch):
+        """Команда добавляет превью, не пересоздавая варианты."""
+        sizes = photo_recipe.image_variants["sizes"]
+        Recipe.objects.filter(pk=photo_recipe.pk).update(
+            image_variants={"source": photo_recipe.image.name, "sizes": sizes}
+        )
+
+        def fail_generate(field_file):
+            raise AssertionError("варианты не должны пересоздаваться")
+
+        monkeypatch.setattr(images, "generate_variants", fail_generate)
+        out = StringIO()
+        call_command("backfill_image_previews", stdout=out)
+
+        photo_recipe.refresh_from_db()
+        assert photo_recipe.image_variants["sizes"] == sizes
+        assert photo_recipe.image_variants["preview"].startswith("data:")
+        assert "Создано превью: 1" in out.getvalue()
+
+
+@pytest.mark.django_db
+class TestBackgroundImageProcessing:
+    """Тесты фоновой обработки изображений рецептов."""
+
+    def create_recipe(self, client, recipe_data, image):
+        """Создает рецепт через API с заданным изображением."""
+        recipe_data["image"] = "data:image/jpeg;base64," + (
+            base64.b64encode(image).decode()
+        )
+        return client.post(
+            reverse("api:v1:recipes-list"), recipe_data, format="json"
+        )
+
+    def test_image_processed_after_commit(
+        self,
+        authenticated_client,
+        recipe_data,
+        media_tmp,
+        django_capture_on_commit_callbacks,
+    ):
+        """До фиксации транзакции рецепт отдает заглушку."""
+        with django_capture_on_commit_callbacks() as callbacks:
+            response = self.create_recipe(
+                authenticated_client, recipe_data, make_jpeg()
+            )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data["image_status"] == "processing"
+        assert response.data["image"].endswith("recipes/placeholder.svg")
+        assert response.data["image_thumb"] == response.data["image"]
+        recipe = Recipe.objects.get(pk=response.data["id"])
+        assert not recipe.image
+        staged = StagedRecipeImage.objects.get(recipe=recipe)
+        assert staged.key.startswith("uploads/staged/")
+        assert (media_tmp / staged.key).exists()
+
+        for callback in callbacks:
+            callback()
+
+        recipe.refresh_from_db()
+        assert recipe.image_status == Recipe.ImageStatus.READY
+        assert (media_tmp / recipe.image.name).exists()
+        assert recipe.image_variants["source"] == recipe.image.name
+        assert not StagedRecipeImage.objects.exists()
+        assert not (media_tmp / staged.key).exists()
+
+    def test_broken_image_marked_failed(
+        self,
+        authenticated_client,
+        recipe_data,
+        media_tmp,
+        django_capture_on_commit_callbacks,
+    ):
+        """Поврежденное изображение помечается ошибкой обработки."""
+        with django_capture_on_commit_callbacks(execute=True):
+            response = self.create_recipe(
+                authenticated_client,
+                recipe_data,
+                b"\xff\xd8\xff\xe0" + b"broken" * 10,
+            )
+
+        recipe = Recipe.objects.get(pk=response.data["id"])
+        assert recipe.image_status == Recipe.ImageStatus.FAILED
+        assert not recipe.image
+        assert not StagedRecipeImage.objects.exists()
+
+    def test_update_keeps_old_image_until_processed(
+        self,
+        authenticated_client,
+        recipe,
+        recipe_data,
+        media_tmp,
+        django_capture_on_commit_callbacks,
+    ):
+        """При замене изображения старое отдается до конца обработки."""
+        old_name = recipe.image.name
+        recipe_data["image"] = "data:image/jpeg;base64," + (
+            base64.b64encode(make_jpeg(200, 200)).decode()
+        )
+        url = reverse("api:v1:recipes-detail", kwargs={"pk": recipe.pk})
+
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            response = authenticated_client.patch(
+                url, recipe_data, format="json"
+            )
+            assert response.data["image_status"] == "processing"
+            assert response.data["image"].endswith(old_name)
+
+        assert len(callbacks) == 1
+        recipe.refresh_from_db()
+        assert recipe.image.name != old_name
+        assert recipe.image_status == Recipe.ImageStatus.READY
+
+    def test_restaged_image_survives_running_task(
+        self, recipe, media_tmp, monkeypatch
+    ):
+        """Повторная загрузка во время обработки не теряется."""
+        stage_recipe_image(recipe, ContentFile(make_jpeg(), name="a.jpg"))
+        first_key = StagedRecipeImage.objects.get(recipe=recipe).key
+        verify = uploads.verify_image
+
+        def restage_then_verify(file):
+            monkeypatch.setattr(uploads, "verify_image", verify)
+            stage_recipe_image(recipe, ContentFile(make_jpeg(), name="a.jpg"))
+            verify(file)
+
+        monkeypatch.setattr(uploads, "verify_image", restage_then_verify)
+        assert process_staged_image(recipe.pk)
+
+        staged = StagedRecipeImage.objects.get(recipe=recipe)
+        assert staged.key != first_key
+        assert not (media_tmp / first_key).exists()
+        assert (media_tmp / staged.key).exists()
+
+        assert process_staged_image(recipe.pk)
+        assert not StagedRecipeImage.objects.exists()
+        assert not (media_tmp / staged.key).exists()
+
+    def test_missing_staged_file_marked_failed(self, recipe, media_tmp):
+        """Без служебного файла изображение помечается ошибкой."""
+        StagedRecipeImage.objects.create(
+            recipe=recipe, name="a.jpg", key="uploads/staged/gone/a.jpg"
+        )
+
+        assert not process_staged_image(recipe.pk)
+
+        recipe.refresh_from_db()
+        assert recipe.image_status == Recipe.ImageStatus.FAILED
+        assert not StagedRecipeImage.objects.exists()
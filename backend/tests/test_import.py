@@ -0,0 +1,173 @@
+"""Тесты массового импорта рецептов из JSON Lines."""
+import json
+from io import StringIO
+
+import pytest
+from apps.recipes.importer import RecipeImporter
+from apps.recipes.models import Recipe, RecipeLSHBucket
+from botocore.exceptions import ClientError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from .conftest import short_base64
+
+
+def make_line(**overrides):
+    """Строка JSON Lines с валидным рецептом."""
+    data = {
+        "name": "Блины",
+        "text": "Смешать и пожарить",
+        "cooking_time": 20,
+        "tags": ["Завтрак"],
+        "ingredients": [{"name": "Мука", "amount": 200}],
+    }
+    data.update(overrides)
+    return json.dumps(data, ensure_ascii=False)
+
+
+@pytest.mark.django_db
+class TestRecipeImporter:
+    """Тесты импорта рецептов."""
+
+    def test_import_valid_and_invalid_lines(self, user, tag, ingredient):
+        """Валидные строки импортируются, ошибки привязаны к строкам."""
+        lines = [
+            make_line(name=f"Рецепт {index}", image=short_base64)
+            for index in range(5)
+        ]
+        lines.insert(1, "{не json")
+        lines.insert(3, make_line(tags=["Неизвестный"]))
+        lines.append("")
+
+        report = RecipeImporter(user, batch_size=2).run(lines)
+
+        assert report["created"] == 5
+        assert [error["line"] for error in report["errors"]] == [2, 4]
+        assert "Неизвестный" in report["errors"][1]["errors"][0]
+
+        recipe = Recipe.objects.get(name="Рецепт 0")
+        assert recipe.author == user
+        assert list(recipe.tags.all()) == [tag]
+        assert list(
+            recipe.recipe_ingredients.values_list("ingredient_id", "amount")
+        ) == [(ingredient.id, 200)]
+        assert recipe.image.name.startswith("recipes/")
+        assert recipe.image_variants["source"] == recipe.image.name
+        assert recipe.image_variants["preview"].startswith("data:image/")
+        assert RecipeLSHBucket.objects.filter(recipe=recipe).exists()
+
+    def test_ingredient_with_ambiguous_unit(self, user, tag, ingredient):
+        """Без единицы измерения неоднозначный ингредиент не находится."""
+        ingredient.__class__.objects.create(
+            name="Мука", measurement_unit="стакан"
+        )
+        importer = RecipeImporter(user)
+
+        report = importer.run(
+            [
+                make_line(),
+                make_line(
+                    ingredients=[
+                        {"name": "мука", "measurement_unit": "г", "amount": 1}
+                    ]
+                ),
+            ]
+        )
+
+        assert report["created"] == 1
+        assert report["errors"][0]["line"] == 1
+
+    def test_boolean_cooking_time_rejected(self, user, tag, ingredient):
+        """Логическое значение не принимается за время приготовления."""
+        report = RecipeImporter(user).run([make_line(cooking_time=True)])
+
+        assert report["created"] == 0
+        assert "Время приготовления" in report["errors"][0]["errors"][0]
+
+    def test_boolean_amount_rejected(self, user, tag, ingredient):
+        """Логическое значение не принимается за количество ингредиента."""
+        report = RecipeImporter(user).run(
+            [make_line(ingredients=[{"name": "Мука", "amount": True}])]
+        )
+
+        assert report["created"] == 0
+        assert "Количество ингредиента" in report["errors"][0]["errors"][0]
+
+    @pytest.mark.parametrize(
+        "error",
+        [
+            OSError("No space left on device"),
+            ClientError({"Error": {"Code": "SlowDown"}}, "PutObject"),
+        ],
+    )
+    def test_storage_error_reported(
+        self, user, tag, ingredient, monkeypatch, error
+    ):
+        """Сбой хранилища дает ошибку строки, а не прерывает импорт."""
+        importer = RecipeImporter(user)
+
+        def fail(name, content):
+            raise error
+
+        monkeypatch.setattr(importer.image_field.storage, "save", fail)
+        report = importer.run(
+            [make_line(name="С фото", image=short_base64), make_line()]
+        )
+
+        assert report["created"] == 1
+        assert report["errors"][0]["line"] == 1
+        assert "не удалось сохранить" in report["errors"][0]["errors"][0]
+
+    def test_invalid_image_reported(self, user, tag, ingredient):
+        """Поврежденное изображение дает ошибку строки."""
+        report = RecipeImporter(user).run(
+            [make_line(image="data:image/png;base64,bm90IGFuIGltYWdl")]
+        )
+
+        assert report["created"] == 0
+        assert report["errors"][0]["line"] == 1
+
+    def test_command(self, user, tag, ingredient, tmp_path):
+        """Команда импортирует файл и печатает скорость и ошибки."""
+        path = tmp_path / "recipes.jsonl"
+        path.write_text(
+            "\n".join([make_line(), make_line(cooking_time=0)]),
+            encoding="utf-8",
+        )
+        out, err = StringIO(), StringIO()
+
+        call_command(
+            "import_recipes",
+            str(path),
+            author=user.username,
+            stdout=out,
+            stderr=err,
+        )
+
+        assert Recipe.objects.count() == 1
+        assert "Импортировано рецептов: 1" in out.getvalue()
+        assert "Строка 2" in err.getvalue()
+
+    def test_api_staff_only(
+        self, authenticated_client, admin_user, tag, ingredient
+    ):
+        """Импорт через API доступен только персоналу."""
+        url = reverse("api:v1:recipes-import-recipes")
+        upload = SimpleUploadedFile(
+            "recipes.jsonl", "\n".join([make_line()] * 3).encode("utf-8")
+        )
+
+        response = authenticated_client.post(url, {"file": upload})
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+        client = APIClient()
+        client.force_authenticate(admin_user)
+        upload.seek(0)
+        response = client.post(url, {"file": upload})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["created"] == 3
+        assert Recipe.objects.filter(author=admin_user).count() == 3
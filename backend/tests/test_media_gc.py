@@ -0,0 +1,174 @@
+"""Тесты удаления неиспользуемых медиа-файлов."""
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
+
+import pytest
+from apps.recipes.media_gc import collect_garbage
+from apps.recipes.models import Recipe, StagedRecipeImage
+from apps.recipes.tasks import gc_media_task
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from moto.core import DEFAULT_ACCOUNT_ID
+from moto.s3.models import s3_backends
+from foodgram.storage import MinIOMediaStorage
+from PIL import Image
+
+from .conftest import S3_BUCKET
+
+NO_GRACE = timedelta(0)
+
+
+def make_png(color="green"):
+    """Байты PNG-изображения."""
+    buffer = BytesIO()
+    Image.new("RGB", (40, 30), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def bucket_names(s3):
+    """Имена файлов в бакете без префикса media/."""
+    listed = s3.list_objects_v2(Bucket=S3_BUCKET, Prefix="media/")
+    return {obj["Key"][len("media/") :] for obj in listed.get("Contents", [])}
+
+
+def put(s3, name, body=b"data"):
+    """Загружает файл в бакет в обход Django."""
+    s3.put_object(Bucket=S3_BUCKET, Key=f"media/{name}", Body=body)
+
+
+def age(name, delta):
+    """Сдвигает время изменения файла в moto в прошлое."""
+    bucket = s3_backends[DEFAULT_ACCOUNT_ID]["global"].get_bucket(S3_BUCKET)
+    bucket.keys[f"media/{name}"].last_modified -= delta
+
+
+@pytest.fixture
+def stored_recipe(user, s3):
+    """Рецепт с изображением и его вариантами в хранилище."""
+    recipe = Recipe(author=user, name="Фото", text="Описание", cooking_time=5)
+    recipe.image.save("photo.png", ContentFile(make_png()))
+    return recipe
+
+
+@pytest.mark.django_db
+class TestMediaGarbageCollector:
+    """Тесты сборщика мусора в MinIO."""
+
+    def test_orphans_deleted(self, stored_recipe, user, s3):
+        """Удаляются только файлы без ссылок из базы."""
+        user.avatar.save("avatar.png", ContentFile(make_png("red")))
+        put(s3, "recipes/old.png")
+        put(s3, "avatars/old.png")
+        referenced = bucket_names(s3) - {"recipes/old.png", "avatars/old.png"}
+
+        result = collect_garbage(grace=NO_GRACE)
+
+        assert result["deleted"] == 2
+        assert bucket_names(s3) == referenced
+        assert stored_recipe.image.name in referenced
+        assert stored_recipe.image_variants["sizes"][0]["webp"] in referenced
+
+    def test_grace_period_keeps_fresh_files(self, stored_recipe, s3):
+        """Недавно загруженные файлы не удаляются."""
+        put(s3, "recipes/new.png")
+
+        result = collect_garbage()
+
+        assert result["deleted"] == 0
+        assert "recipes/new.png" in bucket_names(s3)
+
+    def test_pending_upload_kept(self, stored_recipe, user, s3):
+        """Прямая загрузка, ожидающая обработки, не удаляется."""
+        key = f"uploads/recipe/{user.pk}/pending.png"
+        put(s3, key)
+        StagedRecipeImage.objects.create(
+            recipe=stored_recipe, name="pending.png", key=key
+        )
+
+        collect_garbage(grace=NO_GRACE)
+
+        assert key in bucket_names(s3)
+
+    def test_reused_orphan_kept(self, user, s3):
+        """Файл, на который сослались во время сборки, не удаляется."""
+        data = make_png("blue")
+        storage = MinIOMediaStorage()
+        name = storage.save("recipes/photo.png", ContentFile(data))
+        age(name, timedelta(days=2))
+        listing = storage.list_objects
+
+        def list_then_reuse(*args, **kwargs):
+            # Листинг уже прочитан, а новая запись ссылается на тот же файл
+            yield from listing(*args, **kwargs)
+            Recipe(
+                author=user, name="Копия", text="Описание", cooking_time=5
+            ).image.save("copy.png", ContentFile(data))
+
+        with mock.patch.object(storage, "list_objects", list_then_reuse):
+            result = collect_garbage(storage=storage)
+
+        assert result["found"] == 1
+        assert result["deleted"] == 0
+        assert name in bucket_names(s3)
+
+    def test_batches(self, s3):
+        """Файлы удаляются пачками заданного размера."""
+        for number in range(5):
+            put(s3, f"recipes/{number}.png")
+
+        result = collect_garbage(grace=NO_GRACE, chunk_size=2)
+
+        assert result["deleted"] == 5
+        assert bucket_names(s3) == set()
+
+    def test_batch_rechecked_by_listing(self, s3):
+        """Перед удалением пачка перечитывается листингом, без HEAD."""
+        for number in range(4):
+            put(s3, f"recipes/{number}.png")
+        storage = MinIOMediaStorage()
+        listing = mock.Mock(wraps=storage.list_objects)
+
+        with mock.patch.object(storage, "list_objects", listing):
+            with mock.patch.object(storage, "head") as head:
+                result = collect_garbage(
+                    grace=NO_GRACE, chunk_size=2, storage=storage
+                )
+
+        assert result["deleted"] == 4
+        head.assert_not_called()
+        assert [call.kwargs for call in listing.call_args_list] == [
+            {},
+            {"start_after": ""},
+            {"start_after": "recipes/1.png"},
+        ]
+
+    def test_dry_run(self, s3):
+        """В режиме dry-run файлы только перечисляются."""
+        put(s3, "recipes/old.png")
+
+        result = collect_garbage(grace=NO_GRACE, dry_run=True)
+
+        assert result["orphans"] == ["recipes/old.png"]
+        assert result["deleted"] == 0
+        assert "recipes/old.png" in bucket_names(s3)
+
+    def test_command(self, s3):
+        """Команда удаляет мусор и выводит итог."""
+        put(s3, "recipes/old.png")
+        out = StringIO()
+
+        call_command("gc_media", "--grace-hours", "0", stdout=out)
+
+        assert "удалено: 1" in out.getvalue()
+        assert bucket_names(s3) == set()
+
+    def test_command_requires_s3_storage(self):
+        """Без MinIO команда завершается ошибкой."""
+        with pytest.raises(CommandError):
+            call_command("gc_media")
+
+    def test_task_skips_filesystem_storage(self):
+        """Периодическая задача ничего не делает без MinIO."""
+        assert gc_media_task() == 0
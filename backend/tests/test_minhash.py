@@ -0,0 +1,156 @@
+"""Тесты поиска рецептов с похожими ингредиентами (MinHash LSH)."""
+import time
+
+import pytest
+from apps.recipes.minhash import (
+    compute_signature,
+    index_recipe,
+    similar_by_ingredients,
+)
+from apps.recipes.models import Ingredient, Recipe, RecipeLSHBucket
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+
+
+def create_recipe(author, name, ingredient_ids):
+    """Создает рецепт и индексирует его ингредиенты."""
+    recipe = Recipe.objects.create(
+        author=author, name=name, text="Описание", cooking_time=10
+    )
+    index_recipe(recipe.pk, ingredient_ids)
+    return recipe
+
+
+@pytest.fixture
+def ingredients():
+    """Создает 400 ингредиентов."""
+    Ingredient.objects.bulk_create(
+        Ingredient(name=f"Ингредиент {index}", measurement_unit="г")
+        for index in range(400)
+    )
+    return list(Ingredient.objects.values_list("pk", flat=True))
+
+
+@pytest.mark.django_db
+class TestMinHash:
+    """Тесты сигнатур и поиска похожих рецептов."""
+
+    def test_signature_estimates_jaccard(self):
+        """Доля совпадающих хешей близка к коэффициенту Жаккара."""
+        first = compute_signature(range(0, 100))
+        second = compute_signature(range(50, 150))
+
+        assert abs((first == second).mean() - 1 / 3) < 0.15
+        assert (
+            compute_signature(range(10))
+            == compute_signature(reversed(range(10)))
+        ).all()
+
+    def test_similar_recipes_ranked(self, user, ingredients):
+        """Рецепты ранжируются по сходству, непохожие не попадают."""
+        base = ingredients[:20]
+        target = create_recipe(user, "Исходный", base)
+        close = create_recipe(user, "Почти такой же", base[:19] + [400])
+        farther = create_recipe(
+            user, "Похожий", base[:14] + ingredients[20:26]
+        )
+        create_recipe(user, "Другой", ingredients[100:120])
+
+        result = similar_by_ingredients(target.pk)
+
+        assert [recipe for recipe, _ in result] == [close, farther]
+        assert result[0][1] > result[1][1]
+
+    def test_api_create_and_update_reindex(
+        self, authenticated_client, recipe_data, ingredient
+    ):
+        """Рецепт индексируется при создании и переиндексируется при правке."""
+        response = authenticated_client.post(
+            reverse("api:v1:recipes-list"), recipe_data, format="json"
+        )
+        recipe = Recipe.objects.get(pk=response.data["id"])
+        keys = set(recipe.lsh_buckets.values_list("key", flat=True))
+        assert keys
+
+        other = Ingredient.objects.create(name="Соль", measurement_unit="г")
+        recipe_data["ingredients"] = [{"id": other.id, "amount": 5}]
+        authenticated_client.patch(
+            reverse("api:v1:recipes-detail", kwargs={"pk": recipe.pk}),
+            recipe_data,
+            format="json",
+        )
+        assert set(recipe.lsh_buckets.values_list("key", flat=True)) != keys
+
+    def test_similar_ingredients_endpoint(self, api_client, user, ingredients):
+        """Endpoint отдает похожие рецепты с оценкой сходства."""
+        target = create_recipe(user, "Исходный", ingredients[:10])
+        twin = create_recipe(user, "Двойник", ingredients[:10])
+
+        response = api_client.get(
+            reverse(
+                "api:v1:recipes-similar-ingredients", kwargs={"pk": target.pk}
+            )
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data[0]["id"] == twin.id
+        assert response.data[0]["similarity"] == 1.0
+
+
+@pytest.mark.slow
+@pytest.mark.django_db
+class TestMinHashBenchmark:
+    """Бенчмарк: поиск просматривает только рецепты из общих корзин."""
+
+    def measure(self, user, ingredients, catalog_size, target):
+        """Добавляет шумовые рецепты и замеряет поиск похожих."""
+        base = ingredients[:20]
+        existing = Recipe.objects.count()
+        for index in range(existing, catalog_size):
+            shared = index % 11
+            offset = 20 + (index * 7) % 360
+            create_recipe(
+                user,
+                f"Шум {index}",
+                base[:shared] + ingredients[offset : offset + 20 - shared],
+            )
+
+        candidates = (
+            RecipeLSHBucket.objects.filter(
+                key__in=target.lsh_buckets.values("key")
+            )
+            .exclude(recipe=target)
+            .values("recipe")
+            .distinct()
+            .count()
+        )
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            result = similar_by_ingredients(target.pk)
+            elapsed = time.perf_counter() - started
+        return result, candidates, len(queries.captured_queries), elapsed
+
+    def test_lookup_scans_shared_buckets_only(self, user, ingredients):
+        """Кандидатов с ростом каталога больше, но это малая его доля."""
+        target = create_recipe(user, "Исходный", ingredients[:20])
+        close = create_recipe(user, "Похожий", ingredients[:18])
+
+        small, small_candidates, small_queries, small_time = self.measure(
+            user, ingredients, 100, target
+        )
+        large, large_candidates, large_queries, large_time = self.measure(
+            user, ingredients, 1000, target
+        )
+
+        print(
+            "\nMinHash LSH lookup: "
+            f"100 рецептов — {small_candidates} кандидатов, "
+            f"{small_time * 1000:.2f} мс; "
+            f"1000 рецептов — {large_candidates} кандидатов, "
+            f"{large_time * 1000:.2f} мс"
+        )
+        assert small[0][0] == large[0][0] == close
+        assert small_queries == large_queries
+        assert small_candidates < large_candidates < 1000 // 4
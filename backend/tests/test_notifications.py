@@ -0,0 +1,195 @@
+"""Тесты уведомлений подписчиков о новых рецептах."""
+from io import StringIO
+from unittest import mock
+
+import pytest
+from apps.recipes import tasks
+from apps.recipes.models import NotificationQueue, Recipe
+from apps.users.models import Subscription
+from celery.exceptions import Retry
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+User = get_user_model()
+
+
+@pytest.fixture
+def subscribers(user):
+    """Создает трех подписчиков пользователя user."""
+    result = []
+    for index in range(3):
+        subscriber = User.objects.create_user(
+            username=f"subscriber{index}",
+            email=f"subscriber{index}@example.com",
+            first_name="Sub",
+            last_name="Scriber",
+            password="subscriberpass123",
+        )
+        Subscription.objects.create(user=subscriber, author=user)
+        result.append(subscriber)
+    return result
+
+
+@pytest.mark.django_db
+class TestRecipeNotifications:
+    """Тесты рассылки уведомлений."""
+
+    def test_notifications_sent_in_batches(
+        self, recipe, subscribers, mailoutbox
+    ):
+        """Подписчики получают по одному письму, пачками."""
+        with mock.patch.object(tasks, "NOTIFICATION_BATCH_SIZE", 2):
+            batches = tasks.notify_subscribers_task.delay(recipe.id).get()
+
+        assert batches == 2
+        assert sorted(email.to[0] for email in mailoutbox) == sorted(
+            subscriber.email for subscriber in subscribers
+        )
+        assert all(len(email.to) == 1 for email in mailoutbox)
+        assert recipe.name in mailoutbox[0].body
+
+    def test_batch_retried_on_smtp_error(self):
+        """При ошибке соединения пачка ставится на повтор."""
+        with mock.patch.object(
+            tasks,
+            "send_recipe_notification",
+            side_effect=OSError("connection refused"),
+        ), pytest.raises(Retry):
+            tasks.send_notification_batch_task.delay(
+                ["subscriber@example.com"], "Рецепт"
+            )
+
+    def test_retry_skips_delivered_recipients(self, subscribers, mailoutbox):
+        """Повтор отправляет письма только тем, кому они не ушли."""
+        emails = [subscriber.email for subscriber in subscribers]
+        send = tasks.send_recipe_notification
+        failed = []
+
+        def flaky(user_emails, recipe_title, connection=None):
+            if user_emails == emails[1:2] and not failed:
+                failed.append(user_emails)
+                raise OSError("connection reset")
+            return send(user_emails, recipe_title, connection=connection)
+
+        with mock.patch.object(
+            tasks, "send_recipe_notification", side_effect=flaky
+        ), pytest.raises(Retry) as retry:
+            tasks.send_notification_batch_task.delay(emails, "Рецепт")
+
+        assert retry.value.sig.args == (emails[1:], "Рецепт")
+        retry.value.sig.apply()
+        assert sorted(email.to[0] for email in mailoutbox) == sorted(emails)
+
+    def test_recipe_creation_enqueues_notifications(
+        self,
+        authenticated_client,
+        recipe_data,
+        subscribers,
+        mailoutbox,
+        django_capture_on_commit_callbacks,
+    ):
+        """Создание рецепта рассылает уведомления после коммита."""
+        with django_capture_on_commit_callbacks() as callbacks:
+            response = authenticated_client.post(
+                reverse("api:v1:recipes-list"), recipe_data, format="json"
+            )
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert not mailoutbox
+
+        for callback in callbacks:
+            callback()
+        assert len(mailoutbox) == len(subscribers)
+
+
+@pytest.mark.django_db
+class TestDigestNotifications:
+    """Тесты ежедневных сводок."""
+
+    @pytest.fixture
+    def digest_subscribers(self, subscribers):
+        """Переводит двух подписчиков в режим сводки."""
+        digest = subscribers[:2]
+        User.objects.filter(pk__in=[user.pk for user in digest]).update(
+            notification_mode=User.NotificationMode.DIGEST
+        )
+        return digest
+
+    def test_digest_users_are_queued(
+        self, recipe, subscribers, digest_subscribers, mailoutbox
+    ):
+        """Подписчики в режиме сводки не получают письмо сразу."""
+        tasks.notify_subscribers_task.delay(recipe.id)
+
+        assert [email.to[0] for email in mailoutbox] == [subscribers[2].email]
+        assert set(
+            NotificationQueue.objects.values_list("user_id", flat=True)
+        ) == {user.pk for user in digest_subscribers}
+
+    def test_one_digest_per_user(
+        self, recipe, user, digest_subscribers, mailoutbox
+    ):
+        """Каждый пользователь получает одно письмо со всеми рецептами."""
+        second = Recipe.objects.create(
+            author=user, name="Второй рецепт", text="Описание", cooking_time=5
+        )
+        tasks.notify_subscribers_task.delay(recipe.id)
+        tasks.notify_subscribers_task.delay(second.id)
+        mailoutbox.clear()
+
+        with mock.patch.object(tasks, "DIGEST_USERS_CHUNK_SIZE", 1):
+            call_command("send_digests", stdout=StringIO())
+
+        assert sorted(email.to[0] for email in mailoutbox) == sorted(
+            subscriber.email for subscriber in digest_subscribers
+        )
+        assert all(
+            recipe.name in email.body and second.name in email.body
+            for email in mailoutbox
+        )
+        assert not NotificationQueue.objects.exists()
+
+    def test_failed_run_keeps_only_undelivered(
+        self, recipe, digest_subscribers, mailoutbox
+    ):
+        """После сбоя в очереди остаются только неотправленные сводки."""
+        tasks.notify_subscribers_task.delay(recipe.id)
+        send = tasks.send_recipe_digest
+        failing = digest_subscribers[1].email
+
+        def flaky(user_email, recipe_titles, connection=None):
+            if user_email == failing:
+                raise OSError("connection reset")
+            return send(user_email, recipe_titles, connection=connection)
+
+        with mock.patch.object(
+            tasks, "send_recipe_digest", side_effect=flaky
+        ), pytest.raises(OSError):
+            tasks.send_digests_task.delay()
+
+        assert list(
+            NotificationQueue.objects.values_list("user__email", flat=True)
+        ) == [failing]
+
+        mailoutbox.clear()
+        tasks.send_digests_task.delay()
+        assert [email.to[0] for email in mailoutbox] == [failing]
+
+    def test_notification_mode_endpoint(self, authenticated_client, user):
+        """Пользователь может переключить режим уведомлений."""
+        url = reverse("api:v1:users-notifications")
+
+        response = authenticated_client.put(
+            url, {"notification_mode": "digest"}, format="json"
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        user.refresh_from_db()
+        assert user.notification_mode == User.NotificationMode.DIGEST
+
+        response = authenticated_client.put(
+            url, {"notification_mode": "weekly"}, format="json"
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
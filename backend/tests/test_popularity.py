@@ -0,0 +1,168 @@
+"""Тесты популярности рецептов."""
+import base64
+import json
+import sys
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from apps.recipes.models import (
+    Favorite,
+    Recipe,
+    RecipePopularity,
+    ShoppingCart,
+)
+from apps.recipes.popularity import (
+    EPOCH,
+    HALF_LIFE,
+    REBASE_INTERVAL,
+    decayed_weight,
+    refresh_popularity,
+)
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+
+@pytest.fixture
+def recipes(user):
+    """Создает три рецепта."""
+    return [
+        Recipe.objects.create(
+            author=user,
+            name=f"Рецепт {index}",
+            text="Описание рецепта",
+            cooking_time=10,
+        )
+        for index in range(3)
+    ]
+
+
+@pytest.mark.django_db
+class TestRefreshPopularity:
+    """Тесты пересчета популярности."""
+
+    def test_scores_follow_actions(self, recipes, user, another_user):
+        """Избранное весит больше корзины, рецепты без действий — ноль."""
+        Favorite.objects.create(user=user, recipe=recipes[0])
+        Favorite.objects.create(user=another_user, recipe=recipes[0])
+        ShoppingCart.objects.create(user=user, recipe=recipes[1])
+
+        refresh_popularity()
+
+        scores = dict(RecipePopularity.objects.values_list("recipe", "score"))
+        assert scores[recipes[0].id] > scores[recipes[1].id] > 0
+        assert scores[recipes[2].id] == 0
+
+    def test_recent_actions_weigh_more(self, recipes, user):
+        """Старое действие весит меньше свежего."""
+        Favorite.objects.create(user=user, recipe=recipes[0])
+        Favorite.objects.create(user=user, recipe=recipes[1])
+        Favorite.objects.filter(recipe=recipes[0]).update(
+            created=timezone.now() - timedelta(days=30)
+        )
+
+        refresh_popularity()
+
+        old, new = (
+            RecipePopularity.objects.get(recipe=recipe).score
+            for recipe in recipes[:2]
+        )
+        assert old < new / 8
+
+    def test_incremental_matches_rebuild(self, recipes, user, another_user):
+        """Инкрементальный пересчет дает тот же результат, что и полный."""
+        Favorite.objects.create(user=user, recipe=recipes[0])
+        refresh_popularity()
+        Favorite.objects.create(user=another_user, recipe=recipes[0])
+        ShoppingCart.objects.create(user=user, recipe=recipes[2])
+
+        assert refresh_popularity() == 2
+        incremental = dict(
+            RecipePopularity.objects.values_list("recipe", "score")
+        )
+
+        call_command("refresh_popularity", "--rebuild", stdout=StringIO())
+        rebuilt = dict(RecipePopularity.objects.values_list("recipe", "score"))
+        assert incremental == pytest.approx(rebuilt)
+
+    def test_rebase_matches_rebuild(self, recipes, user, another_user):
+        """Сдвиг опорного момента не меняет результат пересчета."""
+        first = EPOCH + REBASE_INTERVAL / 2
+        second = first + REBASE_INTERVAL * 3
+        Favorite.objects.create(user=user, recipe=recipes[0])
+        Favorite.objects.update(created=first)
+        refresh_popularity(now=first)
+
+        Favorite.objects.create(user=another_user, recipe=recipes[1])
+        Favorite.objects.filter(recipe=recipes[1]).update(created=second)
+        refresh_popularity(now=second)
+        incremental = dict(
+            RecipePopularity.objects.values_list("recipe", "score")
+        )
+
+        refresh_popularity(rebuild=True, now=second)
+        rebuilt = dict(RecipePopularity.objects.values_list("recipe", "score"))
+        assert incremental == pytest.approx(rebuilt)
+        assert rebuilt[recipes[1].id] <= 2 ** (REBASE_INTERVAL / HALF_LIFE)
+
+    def test_scores_past_float_limit(self, recipes, user):
+        """Score остаются конечными там, где прямой вклад переполняет float."""
+        now = EPOCH + HALF_LIFE * (sys.float_info.max_exp + 10)
+        with pytest.raises(OverflowError):
+            decayed_weight(1, now)
+
+        Favorite.objects.create(user=user, recipe=recipes[0])
+        Favorite.objects.update(created=now - timedelta(days=1))
+        refresh_popularity(now=now - HALF_LIFE)
+        refresh_popularity(now=now)
+
+        score = RecipePopularity.objects.get(recipe=recipes[0]).score
+        assert 0 < score < 2 ** (REBASE_INTERVAL / HALF_LIFE)
+
+
+@pytest.mark.django_db
+class TestPopularOrdering:
+    """Тесты сортировки рецептов по популярности."""
+
+    def test_popular_ordering_with_keyset_pages(
+        self, api_client, recipes, user, another_user
+    ):
+        """Рецепты идут по убыванию популярности, курсор не теряет записи."""
+        Favorite.objects.create(user=user, recipe=recipes[1])
+        Favorite.objects.create(user=another_user, recipe=recipes[1])
+        ShoppingCart.objects.create(user=user, recipe=recipes[2])
+        refresh_popularity()
+
+        url = reverse("api:v1:recipes-list")
+        response = api_client.get(url, {"ordering": "popular", "limit": 2})
+        ids = [item["id"] for item in response.data["results"]]
+        assert response.status_code == status.HTTP_200_OK
+        assert ids == [recipes[1].id, recipes[2].id]
+
+        response = api_client.get(response.data["next"])
+        assert [item["id"] for item in response.data["results"]] == [
+            recipes[0].id
+        ]
+        assert response.data["next"] is None
+
+    @pytest.mark.parametrize(
+        "values", [["garbage", "1"], [None, None], ["1.5", None]]
+    )
+    def test_malformed_cursor(self, api_client, recipes, values):
+        """Курсор с нечисловыми или пустыми значениями возвращает 404."""
+        cursor = base64.urlsafe_b64encode(json.dumps(values).encode())
+
+        response = api_client.get(
+            reverse("api:v1:recipes-list"),
+            {"ordering": "popular", "cursor": cursor.decode()},
+        )
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_default_ordering_unchanged(self, api_client, recipes):
+        """Без ordering=popular используется обычная пагинация."""
+        response = api_client.get(reverse("api:v1:recipes-list"))
+
+        assert response.data["count"] == len(recipes)
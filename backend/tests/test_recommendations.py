@@ -0,0 +1,109 @@
+"""Тесты рекомендаций похожих рецептов по избранному."""
+from io import StringIO
+
+import pytest
+from apps.recipes.models import Favorite, Recipe, RecipeSimilarity
+from apps.recipes.recommendations import rebuild_similarities
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+
+User = get_user_model()
+
+
+@pytest.fixture
+def favorites(user, another_user, admin_user):
+    """
+    Создает избранное трех пользователей для четырех рецептов.
+
+    Рецепты 0 и 1 добавлены вместе двумя пользователями,
+    рецепты 0 и 2 — одним, рецепт 3 никто не добавил вместе с другими.
+    """
+    recipes = [
+        Recipe.objects.create(
+            author=user,
+            name=f"Рецепт {index}",
+            text="Описание рецепта",
+            cooking_time=10,
+        )
+        for index in range(4)
+    ]
+    pattern = {
+        user: [0, 1, 2],
+        another_user: [0, 1],
+        admin_user: [3],
+    }
+    for owner, indexes in pattern.items():
+        for index in indexes:
+            Favorite.objects.create(user=owner, recipe=recipes[index])
+    return recipes
+
+
+@pytest.mark.django_db
+class TestRebuildSimilarities:
+    """Тесты расчета похожих рецептов."""
+
+    def test_cosine_scores(self, favorites):
+        """Сходство считается по косинусу столбцов избранного."""
+        rebuild_similarities(top_k=10, chunk_size=2)
+
+        scores = {
+            (item.recipe_id, item.similar_recipe_id): item.score
+            for item in RecipeSimilarity.objects.all()
+        }
+        first, second, third, lonely = (recipe.id for recipe in favorites)
+        assert scores[(first, second)] == pytest.approx(1.0)
+        assert scores[(first, third)] == pytest.approx(0.5**0.5)
+        assert (first, first) not in scores
+        assert not any(lonely in pair for pair in scores)
+
+    def test_top_k_and_chunking(self, favorites):
+        """Размер блока не влияет на результат, top-K ограничивает выдачу."""
+        call_command(
+            "compute_similar_recipes",
+            "--top-k=1",
+            "--chunk-size=1",
+            stdout=StringIO(),
+        )
+
+        first = favorites[0]
+        assert list(
+            RecipeSimilarity.objects.filter(recipe=first).values_list(
+                "similar_recipe", flat=True
+            )
+        ) == [favorites[1].id]
+        assert RecipeSimilarity.objects.count() == 3
+
+    def test_empty_favorites(self):
+        """Без избранного таблица остается пустой."""
+        assert rebuild_similarities() == 0
+
+
+@pytest.mark.django_db
+class TestSimilarEndpoint:
+    """Тесты endpoint похожих рецептов."""
+
+    def test_similar_recipes_ordered(
+        self, api_client, favorites, django_assert_num_queries
+    ):
+        """Похожие рецепты отдаются одним запросом по убыванию сходства."""
+        rebuild_similarities()
+        url = reverse("api:v1:recipes-similar", kwargs={"pk": favorites[0].id})
+
+        with django_assert_num_queries(1):
+            response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [item["id"] for item in response.data] == [
+            favorites[1].id,
+            favorites[2].id,
+        ]
+
+    def test_similar_missing_recipe(self, api_client):
+        """Несуществующий рецепт возвращает 404."""
+        response = api_client.get(
+            reverse("api:v1:recipes-similar", kwargs={"pk": 999999})
+        )
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,240 @@
+"""Тесты хранилища с адресацией по содержимому."""
+import hashlib
+import os
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+import pytest
+from apps.recipes.models import Recipe
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.urls import reverse
+from foodgram import storage as storage_module
+from foodgram.s3 import (
+    get_s3_client,
+    get_s3_config,
+    get_s3_resource,
+    s3_metrics,
+)
+from foodgram.storage import (
+    ContentAddressedFileSystemStorage,
+    MinIOMediaStorage,
+)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    """Хранилище во временном каталоге."""
+    return ContentAddressedFileSystemStorage(location=tmp_path)
+
+
+class TestContentAddressedStorage:
+    """Тесты ключей по SHA-256 содержимого."""
+
+    def test_name_derived_from_content(self, storage):
+        """Ключ файла - SHA-256 содержимого в каталоге upload_to."""
+        name = storage.save("recipes/Photo.JPG", ContentFile(b"image"))
+
+        digest = hashlib.sha256(b"image").hexdigest()
+        assert name == f"recipes/{digest}.jpg"
+        with storage.open(name) as stored:
+            assert stored.read() == b"image"
+
+    def test_duplicate_upload_skipped(self, storage, monkeypatch):
+        """Повторная загрузка того же содержимого не пишет файл."""
+        first = storage.save("recipes/a.png", ContentFile(b"same"))
+
+        def fail_save(name, content):
+            raise AssertionError("файл не должен загружаться повторно")
+
+        monkeypatch.setattr(storage, "_save", fail_save)
+        second = storage.save("recipes/b.png", ContentFile(b"same"))
+
+        assert first == second
+
+    def test_different_content_different_keys(self, storage):
+        """Разное содержимое сохраняется под разными ключами."""
+        first = storage.save("avatars/a.png", ContentFile(b"first"))
+        second = storage.save("avatars/a.png", ContentFile(b"second"))
+
+        assert first != second
+        assert storage.exists(first) and storage.exists(second)
+
+
+@pytest.mark.django_db
+class TestSharedS3Client:
+    """Тесты общего клиента S3 и его метрик."""
+
+    def test_client_shared_between_storages(self, s3):
+        """Хранилища и команды используют один клиент на процесс."""
+        first, second = MinIOMediaStorage(), MinIOMediaStorage()
+
+        client = first.connection.meta.client
+        assert second.connection.meta.client is client
+        assert get_s3_client() is client
+
+    def test_resource_per_thread(self, s3):
+        """Каждый поток получает свой ресурс поверх общего клиента."""
+        resources = []
+        thread = threading.Thread(
+            target=lambda: resources.append(get_s3_resource())
+        )
+        thread.start()
+        thread.join()
+
+        assert resources[0] is not get_s3_resource()
+        assert resources[0].meta.client is get_s3_client()
+
+    def test_pool_configured_from_settings(self, settings):
+        """Размер пула и таймауты берутся из настроек."""
+        settings.AWS_S3_MAX_POOL_CONNECTIONS = 50
+        settings.AWS_S3_READ_TIMEOUT = 7
+
+        config = get_s3_config()
+
+        assert config.max_pool_connections == 50
+        assert config.read_timeout == 7
+        assert config.tcp_keepalive is True
+
+    def test_metrics_count_requests(self, s3):
+        """Метрики учитывают запросы и ошибки по операциям."""
+        storage = MinIOMediaStorage()
+        s3_metrics.reset()
+
+        storage.save("recipes/a.png", ContentFile(b"image"))
+        assert storage.head("recipes/missing.png") is None
+
+        metrics = s3_metrics.snapshot()
+        assert metrics["PutObject"]["count"] == 1
+        assert metrics["HeadObject"]["errors"] >= 1
+        assert metrics["PutObject"]["max_ms"] >= metrics["PutObject"]["avg_ms"]
+
+    def test_setup_minio_uses_shared_client(self, s3):
+        """setup_minio работает через общий клиент."""
+        s3_metrics.reset()
+        out = StringIO()
+
+        call_command("setup_minio", stdout=out)
+
+        assert "уже существует" in out.getvalue()
+        assert s3_metrics.snapshot()["HeadBucket"]["count"] == 1
+
+
+@pytest.mark.django_db
+class TestMediaURLs:
+    """Тесты построения URL файлов MinIO."""
+
+    def test_url_built_from_media_url(self, s3, settings, monkeypatch):
+        """URL строится от MEDIA_URL без чтения окружения."""
+        settings.MEDIA_URL = "https://example.com/media/"
+        storage = MinIOMediaStorage()
+
+        def fail_getenv(*args, **kwargs):
+            raise AssertionError("окружение не должно читаться")
+
+        monkeypatch.setattr(os.environ, "get", fail_getenv)
+
+        assert storage.url("recipes/a.jpg") == (
+            "https://example.com/media/recipes/a.jpg"
+        )
+        assert storage.url("media/recipes/a.jpg") == (
+            "https://example.com/media/recipes/a.jpg"
+        )
+
+    def test_signed_url_cached(self, s3, settings):
+        """Подписанный URL переиспользуется, пока не истекла половина срока."""
+        settings.AWS_QUERYSTRING_AUTH = True
+        storage = MinIOMediaStorage()
+
+        first = storage.url("recipes/a.jpg")
+
+        assert "Signature" in first
+        assert "/media/recipes/a.jpg" in first
+        assert storage.url("recipes/a.jpg") is first
+        assert storage.url("recipes/b.jpg") != first
+
+    def test_signed_url_renewed(self, s3, settings, monkeypatch):
+        """После половины срока действия URL подписывается заново."""
+        settings.AWS_QUERYSTRING_AUTH = True
+        settings.AWS_QUERYSTRING_EXPIRE = 600
+        storage = MinIOMediaStorage()
+        first = storage.url("recipes/a.jpg")
+
+        later = time.monotonic() + 301
+        monkeypatch.setattr(storage_module.time, "monotonic", lambda: later)
+
+        assert storage.url("recipes/a.jpg") is not first
+
+
+def legacy_url(name):
+    """Прежняя реализация url(): чтение DEBUG и окружения на каждый вызов."""
+    from django.conf import settings
+
+    if getattr(settings, "DEBUG", False):
+        minio_host = os.environ.get("MINIO_HOST", "localhost")
+        return f"http://{minio_host}:9000/foodgram/media/{name}"
+    domain = os.environ.get("DOMAIN_NAME", "foodgram.freedynamicdns.net")
+    return f"https://{domain}/media/{name}"
+
+
+@pytest.mark.slow
+@pytest.mark.django_db
+class TestMediaURLBenchmark:
+    """Бенчмарк: стоимость URL на странице из 100 рецептов."""
+
+    def test_recipe_page_url_cost(self, s3, settings, user, api_client):
+        """Считает вызовы url() на странице и сравнивает их стоимость."""
+        user.avatar = "avatars/author.png"
+        user.save()
+        Recipe.objects.bulk_create(
+            Recipe(
+                author=user,
+                name=f"Рецепт {index}",
+                text="Описание",
+                cooking_time=5,
+                image=f"recipes/{index}.jpg",
+            )
+            for index in range(100)
+        )
+        names = []
+        original_url = MinIOMediaStorage.url
+
+        def counting_url(storage, name):
+            names.append(name)
+            return original_url(storage, name)
+
+        with mock.patch.object(MinIOMediaStorage, "url", counting_url):
+            response = api_client.get(
+                reverse("api:v1:recipes-list"), {"limit": 100}
+            )
+        assert len(response.data["results"]) == 100
+
+        storage = MinIOMediaStorage()
+        timings = {}
+        for mode, build in (
+            ("прежний", legacy_url),
+            ("MEDIA_URL", storage.url),
+        ):
+            started = time.perf_counter()
+            for name in names:
+                build(name)
+            timings[mode] = (time.perf_counter() - started) * 1000
+
+        settings.AWS_QUERYSTRING_AUTH = True
+        signed = MinIOMediaStorage()
+        for attempt in ("подпись", "кеш подписи"):
+            started = time.perf_counter()
+            for name in names:
+                signed.url(name)
+            timings[attempt] = (time.perf_counter() - started) * 1000
+
+        print(
+            f"\nURL на странице из 100 рецептов ({len(names)} вызовов): "
+            + ", ".join(
+                f"{mode} — {ms:.2f} мс" for mode, ms in timings.items()
+            )
+        )
+        assert len(names) >= 200
+        assert len(signed._signed_urls) == len(set(names))